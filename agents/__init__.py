@@ -1,20 +1,23 @@
 from .master_agent import run_analysis
 from .python_agent import analyze_data
-from typing import Dict, Any, Optional
+from .sql_agent import answer_with_sql
+from config import OPENAI_BASE_URL, SQL_FAST_PATH
+from typing import Dict, Any, List, Optional
+from utils.profiler import get_file_profile
+from utils.upload_prep import read_instructions, resolve_drop_columns, resolve_upload_format, upload_dataset
 from utils.setup import debug
 from openai import OpenAI
 from pathlib import Path
 
-client = OpenAI()
+client = OpenAI(base_url=OPENAI_BASE_URL)
 
-def upload_file(file_path: str) -> str:
-    """Upload file to OpenAI and return file ID."""
-    with open(file_path, 'rb') as file:
-        response = client.files.create(
-            file=file,
-            purpose='assistants'
-        )
-        return response.id
+def upload_file(
+    file_path: str,
+    upload_format: Optional[str] = None,
+    drop_columns: Optional[List[str]] = None
+) -> str:
+    """Upload file to OpenAI and return file ID, reusing the upload for identical content."""
+    return upload_dataset(client, file_path, upload_format=upload_format, drop_columns=drop_columns)
 
 __all__ = ['run_analysis', 'analyze_data']
 
@@ -25,20 +28,39 @@ def run_analysis(
     initialize: bool = False,
     thread_id: Optional[str] = None,
     file_id: Optional[str] = None,
-    user_prompt: Optional[str] = None
+    user_prompt: Optional[str] = None,
+    upload_format: Optional[str] = None,
+    drop_columns: Optional[List[str]] = None
 ) -> Dict[str, Any]:
-    """Run analysis on data."""
+    """Run analysis on data.
+
+    ``upload_format`` (csv, gzip, zip or parquet) and ``drop_columns`` control
+    how the file is prepared before it is sent to the code interpreter.
+    """
     try:
+        # Answer simple aggregate questions locally before using the code interpreter
+        if SQL_FAST_PATH and file_path and not initialize:
+            result = answer_with_sql(query, file_path, thread_id=thread_id, file_id=file_id)
+            if result is not None:
+                return result
+
         # Upload file if provided and not already uploaded
-        if file_path and not file_id:
-            file_id = upload_file(file_path)
+        file_instructions = None
+        if file_path:
+            upload_format = resolve_upload_format(file_path, upload_format)
+            drop_columns = resolve_drop_columns(file_path, drop_columns)
+            file_instructions = read_instructions(upload_format, drop_columns)
+            if not file_id:
+                file_id = upload_file(file_path, upload_format=upload_format, drop_columns=drop_columns)
             
         # Run analysis
         result = analyze_data(
             query=query,
             file_id=file_id,
             thread_id=thread_id,
-            user_prompt=user_prompt
+            user_prompt=user_prompt,
+            dataset_profile=get_file_profile(file_path) if file_path else None,
+            file_instructions=file_instructions
         )
         
         return result
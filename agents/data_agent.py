@@ -1,7 +1,7 @@
 # Data processing agent
 from typing import Dict, Any
-import pandas as pd
 from config import DEBUG_MODE
+from utils.frame_cache import load_dataset
 from .python_agent import analyze_data
 
 class DataAgent:
@@ -18,7 +18,8 @@ class DataAgent:
                 print(f"Loading file: {state['file_path']}")
                 
             # Load and verify the data
-            df = pd.read_csv(state['file_path'])
+            # Files above the out-of-core threshold are streamed; only a sample is kept in memory
+            df, dataset = load_dataset(state['file_path'], columns=state.get('columns'))
             
             if df.empty:
                 raise ValueError("DataFrame is empty")
@@ -31,8 +32,9 @@ class DataAgent:
                 print("\nData types:")
                 print(df.dtypes)
             
-            # Store DataFrame and analysis function in state
+            # Store DataFrame (a sample when streamed), the stream and analysis function in state
             state['df'] = df
+            state['dataset'] = dataset
             state['analyze_data'] = analyze_data
             
             if DEBUG_MODE:
@@ -1,21 +1,25 @@
 # Main agent for coordinating analysis
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 from langchain_openai import ChatOpenAI
 from pathlib import Path
-from config import MODEL_NAME, DEBUG_MODE, OPENAI_API_KEY
+from config import MODEL_NAME, DEBUG_MODE, OPENAI_API_KEY, OPENAI_BASE_URL, SQL_FAST_PATH
 import pandas as pd
 from .query_agent import analyze_query
 from io import StringIO
 from openai import OpenAI
 from .python_agent import analyze_data
+from .sql_agent import answer_with_sql
+from utils.frame_cache import load_dataset
+from utils.profiler import get_file_profile
+from utils.upload_prep import read_instructions, resolve_drop_columns, resolve_upload_format, upload_dataset
 from utils.setup import debug
 
 # Initialize OpenAI client
-client = OpenAI(api_key=OPENAI_API_KEY)
+client = OpenAI(api_key=OPENAI_API_KEY, base_url=OPENAI_BASE_URL)
 
 def create_llm():
     # Create LangChain ChatOpenAI instance
-    return ChatOpenAI(model_name=MODEL_NAME, temperature=0)
+    return ChatOpenAI(model_name=MODEL_NAME, temperature=0, base_url=OPENAI_BASE_URL)
 
 def process_data(state: Dict[str, Any]) -> Dict[str, Any]:
     # Process data from file
@@ -31,7 +35,8 @@ def process_data(state: Dict[str, Any]) -> Dict[str, Any]:
             print(f"Loading file: {state['file_path']}")
             
         # Load and verify the data
-        df = pd.read_csv(state['file_path'])
+        # Files above the out-of-core threshold are streamed; only a sample is kept in memory
+        df, dataset = load_dataset(state['file_path'], columns=state.get('columns'))
         
         if df.empty:
             raise ValueError("DataFrame is empty")
@@ -44,8 +49,9 @@ def process_data(state: Dict[str, Any]) -> Dict[str, Any]:
             print("\nData types:")
             print(df.dtypes)
         
-        # Store DataFrame in state
+        # Store DataFrame (a sample when streamed) and the stream for exact aggregations in state
         state['df'] = df
+        state['dataset'] = dataset
         
         if DEBUG_MODE:
             print("\nData processing complete")
@@ -57,14 +63,13 @@ def process_data(state: Dict[str, Any]) -> Dict[str, Any]:
             print(f"Error processing data: {str(e)}")
         raise ValueError(f"Error processing file: {str(e)}")
 
-def upload_file(file_path: str) -> str:
-    """Upload file to OpenAI and return file ID."""
-    with open(file_path, 'rb') as file:
-        response = client.files.create(
-            file=file,
-            purpose='assistants'
-        )
-        return response.id
+def upload_file(
+    file_path: str,
+    upload_format: Optional[str] = None,
+    drop_columns: Optional[List[str]] = None
+) -> str:
+    """Upload file to OpenAI and return file ID, reusing the upload for identical content."""
+    return upload_dataset(client, file_path, upload_format=upload_format, drop_columns=drop_columns)
 
 def run_analysis(
     query: str,
@@ -73,22 +78,41 @@ def run_analysis(
     initialize: bool = False,
     thread_id: Optional[str] = None,
     file_id: Optional[str] = None,
-    user_prompt: Optional[str] = None
+    user_prompt: Optional[str] = None,
+    upload_format: Optional[str] = None,
+    drop_columns: Optional[List[str]] = None
 ) -> Dict[str, Any]:
-    """Run analysis on data."""
+    """Run analysis on data.
+
+    ``upload_format`` (csv, gzip, zip or parquet) and ``drop_columns`` control
+    how the file is prepared before it is sent to the code interpreter.
+    """
     try:
         from .python_agent import analyze_data
         
+        # Answer simple aggregate questions locally before using the code interpreter
+        if SQL_FAST_PATH and file_path and not initialize:
+            result = answer_with_sql(query, file_path, thread_id=thread_id, file_id=file_id)
+            if result is not None:
+                return result
+
         # Upload file if provided and not already uploaded
-        if file_path and not file_id:
-            file_id = upload_file(file_path)
+        file_instructions = None
+        if file_path:
+            upload_format = resolve_upload_format(file_path, upload_format)
+            drop_columns = resolve_drop_columns(file_path, drop_columns)
+            file_instructions = read_instructions(upload_format, drop_columns)
+            if not file_id:
+                file_id = upload_file(file_path, upload_format=upload_format, drop_columns=drop_columns)
             
         # Run analysis
         result = analyze_data(
             query=query,
             file_id=file_id,
             thread_id=thread_id,
-            user_prompt=user_prompt
+            user_prompt=user_prompt,
+            dataset_profile=get_file_profile(file_path) if file_path else None,
+            file_instructions=file_instructions
         )
         
         return result
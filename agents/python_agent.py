@@ -2,17 +2,17 @@ from typing import Dict, Any, Optional
 import json
 import time
 import pandas as pd
-from io import StringIO
 import streamlit as st
 from openai import OpenAI
 from openai.types.beta import Assistant
 from openai.types.beta.threads import Run
-from config import DEBUG_MODE, OPENAI_API_KEY
+from config import DEBUG_MODE, OPENAI_API_KEY, OPENAI_BASE_URL
+from utils.profiler import format_profile, profile_dataframe
 from utils.setup import setup_project, debug
 from utils.vector_store import get_document_processor
 
 # Initialize OpenAI client
-client = OpenAI(api_key=OPENAI_API_KEY)
+client = OpenAI(api_key=OPENAI_API_KEY, base_url=OPENAI_BASE_URL)
 
 def get_assistant() -> Assistant:
     """Get or create an OpenAI Assistant."""
@@ -59,13 +59,23 @@ def get_assistant() -> Assistant:
         raise
 
 def get_df_info(df: pd.DataFrame) -> str:
-    """Get DataFrame info as string."""
-    buffer = StringIO()
-    df.info(buf=buffer)
-    return buffer.getvalue()
+    """Get a compact DataFrame profile (schema, statistics, sample rows) as string."""
+    return format_profile(profile_dataframe(df))
 
-def analyze_data(query: str, file_id: Optional[str] = None, thread_id: Optional[str] = None, user_prompt: Optional[str] = None) -> Dict[str, Any]:
-    """Run analysis on uploaded data."""
+def analyze_data(
+    query: str,
+    file_id: Optional[str] = None,
+    thread_id: Optional[str] = None,
+    user_prompt: Optional[str] = None,
+    dataset_profile: Optional[str] = None,
+    file_instructions: Optional[str] = None
+) -> Dict[str, Any]:
+    """Run analysis on uploaded data.
+
+    When ``dataset_profile`` is given it is attached to the thread with the
+    file, and initialization returns it directly instead of starting a run.
+    ``file_instructions`` tells the assistant how to load the attached file.
+    """
     debug_output = []
     
     try:
@@ -161,12 +171,20 @@ Keep only the essential information about previous analyses and findings."""
                 debug(f"Error verifying file: {str(e)}", debug_output)
                 raise
 
+            file_text = "Please analyze this CSV file when asked to do so."
+            if file_instructions:
+                file_text += f" {file_instructions}"
+            if dataset_profile:
+                file_text += (
+                    "\n\nThe file has already been profiled. Use this profile instead of re-inspecting "
+                    f"its columns, types and values:\n{dataset_profile}"
+                )
             file_message = client.beta.threads.messages.create(
                 thread_id=thread_id,
                 role="user",
                 content=[{
                     "type": "text",
-                    "text": "Please analyze this CSV file when asked to do so."
+                    "text": file_text
                 }],
                 attachments=[{
                     "file_id": file_id,
@@ -178,6 +196,25 @@ Keep only the essential information about previous analyses and findings."""
         elif file_id:
             debug("File already uploaded in this session, skipping upload", debug_output)
 
+        # The precomputed profile already covers what an initialization run would discover
+        if is_initialization and dataset_profile:
+            debug("\n=== Dataset Profile ===", debug_output)
+            debug(dataset_profile, debug_output)
+            debug("Skipping initialization run, profile attached to thread", debug_output)
+            profile_lines = dataset_profile.splitlines()
+            return {
+                'status': 'success',
+                'response': {
+                    'code': '',
+                    'steps': ["Profile the dataset locally", "Attach the file and its profile to the thread"],
+                    'results': profile_lines,
+                    'final_answer': f"Data loaded. {profile_lines[0]}."
+                },
+                'thread_id': thread_id,
+                'file_id': file_id,
+                'debug_output': '\n'.join(debug_output)
+            }
+
         # STEP 4: Create analysis prompt
         if is_initialization:
             analysis_prompt = f"Consider the uploaded file and analyze: {query}"
@@ -0,0 +1,130 @@
+# Text-to-SQL fast path for simple aggregate questions
+import json
+import re
+from typing import Dict, Any, Optional, Tuple
+import pandas as pd
+from openai import OpenAI
+from config import MODEL_NAME, OPENAI_API_KEY, OPENAI_BASE_URL
+from utils.database import DatabaseManager, is_read_only_sql
+from utils.dataset_registry import get_dataset_registry
+from utils.rollups import describe_rollups
+from utils.setup import debug
+
+# Initialize OpenAI client
+client = OpenAI(api_key=OPENAI_API_KEY, base_url=OPENAI_BASE_URL)
+
+# Questions that need the code interpreter, charts or earlier answers skip the fast path
+COMPLEX_QUESTION_RE = re.compile(
+    r"\b(plot|chart|graph|visuali[sz]e|forecast|predict|regression|correlat\w*|model|"
+    r"previous|last analysis|above|earlier|that result|explain why)\b",
+    re.IGNORECASE
+)
+MAX_RESULT_ROWS = 200
+QUERY_TIMEOUT_SECONDS = 10
+
+SQL_SYSTEM_PROMPT = """You translate business questions into a single SQLite SELECT query.
+Use only the tables and columns in the schema and the listed rollups. A rollup <table>__<grain>[_by_<column>]
+has year[, month[, day]] for its grain, the dimension column if any, row_count, and
+count_X/sum_X/min_X/max_X for each listed measure X; prefer it when the
+question's granularity matches (averages are sum_X / count_X).
+If one read-only query cannot fully answer the question, return {"sql": null}.
+Otherwise return {"sql": "<query>", "answer_template": "<one-sentence answer containing {result}>"}."""
+
+def get_database() -> DatabaseManager:
+    """Get the process-wide SQLite DatabaseManager used by the fast path.
+
+    The fast path runs only on SQLite: it reads rollups and the catalog that
+    the DuckDB benchmark backend does not provide.
+    """
+    return get_dataset_registry().db
+
+def ensure_table(file_path: str) -> str:
+    """Ingest a CSV into the analysis database unless its content is already there."""
+    return get_dataset_registry().ensure_table(file_path).table_name
+
+def generate_sql(query: str, schema: str) -> Dict[str, Any]:
+    """Ask the model for one SQL query answering the question, or {"sql": None}."""
+    response = client.chat.completions.create(
+        model=MODEL_NAME,
+        temperature=0,
+        response_format={"type": "json_object"},
+        messages=[
+            {"role": "system", "content": SQL_SYSTEM_PROMPT},
+            {"role": "user", "content": f"Schema:\n{schema}\n\nQuestion: {query}"}
+        ]
+    )
+    return json.loads(response.choices[0].message.content)
+
+def format_result(result: pd.DataFrame) -> Tuple[str, list]:
+    """Render a query result as an answer value and a list of result strings."""
+    if result.shape == (1, 1):
+        value = result.iat[0, 0]
+        if isinstance(value, float):
+            value = round(value, 4)
+        return str(value), [f"{result.columns[0]}: {value}"]
+    rows = [", ".join(f"{col}={row[col]}" for col in result.columns) for _, row in result.head(20).iterrows()]
+    if len(result) > 20:
+        rows.append(f"... {len(result) - 20} more rows")
+    return "; ".join(rows), rows
+
+def answer_with_sql(
+    query: str,
+    file_path: str,
+    thread_id: Optional[str] = None,
+    file_id: Optional[str] = None
+) -> Optional[Dict[str, Any]]:
+    """Try to answer a question with one local SQL query.
+
+    Returns a result in the same shape as analyze_data on success, or None so
+    the caller falls back to the code interpreter.
+    """
+    debug_output = []
+    try:
+        debug("\n=== SQL Fast Path ===", debug_output)
+        if COMPLEX_QUESTION_RE.search(query):
+            debug("Question needs the code interpreter, skipping fast path", debug_output)
+            return None
+
+        table_name = ensure_table(file_path)
+        db = get_database()
+        # Rollups are listed by name only; their columns follow from the base table
+        schema = "\n".join(part for part in (
+            db.describe_schema([table_name]), describe_rollups(db.get_rollups(table_name))
+        ) if part)
+        generated = generate_sql(query, schema)
+        sql = generated.get('sql')
+        debug(f"Table: {table_name}", debug_output)
+        debug(f"Generated SQL: {sql}", debug_output)
+        if not sql or not is_read_only_sql(sql):
+            debug("No valid read-only SQL, falling back", debug_output)
+            return None
+
+        result = db.execute_query(sql, max_rows=MAX_RESULT_ROWS, timeout=QUERY_TIMEOUT_SECONDS)
+        value, results = format_result(result)
+        template = generated.get('answer_template') or "{result}"
+        final_answer = template.replace("{result}", value) if "{result}" in template else f"{template} {value}"
+        debug(f"Result: {value}", debug_output)
+
+        # Keep the thread's history complete so follow-up questions have context
+        if thread_id:
+            client.beta.threads.messages.create(thread_id=thread_id, role="user", content=query)
+            client.beta.threads.messages.create(thread_id=thread_id, role="assistant", content=final_answer)
+
+        debug("=== SQL Fast Path Complete ===\n", debug_output)
+        return {
+            'status': 'success',
+            'response': {
+                'code': sql,
+                'steps': [f"Translate the question into SQL over '{table_name}'", "Run the query locally"],
+                'results': results,
+                'final_answer': final_answer
+            },
+            'thread_id': thread_id,
+            'file_id': file_id,
+            'debug_output': '\n'.join(debug_output)
+        }
+    except Exception as e:
+        debug(f"SQL fast path failed, falling back: {str(e)}", debug_output)
+        return None
+
+__all__ = ['answer_with_sql']
@@ -7,4 +7,10 @@ load_dotenv()
 # Get environment variables with defaults
 DEBUG_MODE = os.getenv('DEBUG_MODE', 'false').lower() == 'true'
 MODEL_NAME = os.getenv('MODEL_NAME', 'gpt-4o-mini')
-OPENAI_API_KEY = os.getenv('OPENAI_API_KEY') 
\ No newline at end of file
+OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
+OPENAI_BASE_URL = os.getenv('OPENAI_BASE_URL') or None  # e.g. the local stand-in from utils/openai_standin.py
+SQL_FAST_PATH = os.getenv('SQL_FAST_PATH', 'false').lower() == 'true'  # Answer simple aggregates with generated SQL
+FRAME_CACHE_MB = int(os.getenv('FRAME_CACHE_MB', '1024'))  # RAM budget for DataFrames shared across sessions
+OUT_OF_CORE_THRESHOLD_MB = float(os.getenv('OUT_OF_CORE_THRESHOLD_MB', '512'))  # CSVs above this are streamed in chunks
+UPLOAD_FORMAT = os.getenv('UPLOAD_FORMAT', 'csv').lower()  # csv, gzip, zip or parquet for code interpreter uploads
+UPLOAD_CACHE_MB = int(os.getenv('UPLOAD_CACHE_MB', '2048'))  # Disk budget for prepared upload variants
@@ -0,0 +1,111 @@
+import argparse
+import importlib.util
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Add project root to path first
+project_root = Path(__file__).parent.parent.absolute()
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from utils.database import create_database_manager
+
+# Typical analytical queries over a mock_data.csv-style sales table
+QUERIES = {
+    'count': "SELECT COUNT(*) AS n FROM sales",
+    'filter_count': "SELECT COUNT(*) AS n FROM sales WHERE PRICE < 13",
+    'filter_avg': "SELECT AVG(QUANTITY) AS q FROM sales WHERE PRICE BETWEEN 13 AND 14",
+    'month_by_sku': (
+        "SELECT year, month, SKU, SUM(QUANTITY) AS qty, SUM(PRICE * QUANTITY) AS revenue "
+        "FROM sales GROUP BY year, month, SKU ORDER BY year, month, SKU"
+    ),
+    'top_skus': (
+        "SELECT SKU, SUM(QUANTITY) AS qty FROM sales GROUP BY SKU ORDER BY qty DESC LIMIT 10"
+    ),
+    'daily_avg_price': (
+        "SELECT year, month, day, AVG(PRICE) AS avg_price FROM sales "
+        "GROUP BY year, month, day ORDER BY year, month, day"
+    ),
+}
+
+def make_sales_csv(path: Path, rows: int, seed: int = 42) -> None:
+    """Write a synthetic sales extract shaped like uploads/mock_data.csv."""
+    rng = np.random.default_rng(seed)
+    sell_ids = rng.integers(1000, 3000, rows)
+    categories = rng.integers(0, 3, rows)
+    df = pd.DataFrame({
+        'month': rng.integers(1, 13, rows),
+        'day': rng.integers(1, 29, rows),
+        'year': rng.integers(2012, 2016, rows),
+        'PRICE': np.round(rng.uniform(10, 16.5, rows), 2),
+        'QUANTITY': rng.integers(8, 125, rows),
+        'SELL_ID': sell_ids,
+        'SELL_CATEGORY': categories,
+        'SKU': [f"{s}_{c}" for s, c in zip(sell_ids, categories)],
+    })
+    df.to_csv(path, index=False)
+
+def benchmark(backend: str, csv_path: Path, workdir: Path, repeats: int) -> dict:
+    """Ingest the CSV into one backend and time each query."""
+    if backend == 'duckdb':
+        db = create_database_manager('duckdb', data_dir=str(workdir / 'parquet'), cache_results=False)
+    else:
+        db = create_database_manager('sqlite', db_path=str(workdir / 'bench.db'),
+                                     cache_results=False, auto_index=False)
+
+    timings = {}
+    start = time.perf_counter()
+    db.ingest_csv(str(csv_path), 'sales')
+    timings['ingest'] = time.perf_counter() - start
+
+    for name, query in QUERIES.items():
+        runs = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            db.execute_query(query)
+            runs.append(time.perf_counter() - start)
+        timings[name] = min(runs)
+
+    db.close()
+    return timings
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the SQLite and DuckDB database backends.")
+    parser.add_argument('--csv', help="CSV to benchmark (defaults to a synthetic sales extract)")
+    parser.add_argument('--rows', type=int, default=2_000_000, help="Rows in the synthetic extract")
+    parser.add_argument('--repeats', type=int, default=3, help="Runs per query; the best is reported")
+    parser.add_argument('--backends', nargs='+', default=['sqlite', 'duckdb'])
+    args = parser.parse_args()
+    if 'duckdb' in args.backends and importlib.util.find_spec('duckdb') is None:
+        # duckdb is an optional dependency, only needed for this comparison
+        print("duckdb is not installed (pip install duckdb), benchmarking the other backends only")
+        args.backends = [backend for backend in args.backends if backend != 'duckdb']
+
+    workdir = Path(tempfile.mkdtemp(prefix='baai_bench_'))
+    try:
+        csv_path = Path(args.csv) if args.csv else workdir / 'sales.csv'
+        if not args.csv:
+            print(f"Generating {args.rows} synthetic rows...")
+            make_sales_csv(csv_path, args.rows)
+
+        results = {}
+        for backend in args.backends:
+            print(f"Benchmarking {backend}...")
+            results[backend] = benchmark(backend, csv_path, workdir, args.repeats)
+
+        report = pd.DataFrame(results)
+        if {'sqlite', 'duckdb'} <= set(report.columns):
+            report['speedup'] = report['sqlite'] / report['duckdb']
+        print("\nSeconds (best of {} runs):".format(args.repeats))
+        print(report.round(4).to_string())
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
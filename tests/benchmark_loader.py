@@ -0,0 +1,55 @@
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+# Add project root to path first
+project_root = Path(__file__).parent.parent.absolute()
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from utils.data_loader import load_csv
+
+DEFAULT_FILES = [
+    project_root / 'uploads' / 'mock_data.csv',
+    project_root / 'uploads' / 'train_df.csv',
+]
+
+def measure(load, repeats: int) -> tuple:
+    """Return (best seconds, DataFrame MB) for a loader."""
+    best = float('inf')
+    df = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        df = load()
+        best = min(best, time.perf_counter() - start)
+    return best, df.memory_usage(deep=True).sum() / 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare pd.read_csv with the typed loader.")
+    parser.add_argument('files', nargs='*', default=[str(f) for f in DEFAULT_FILES])
+    parser.add_argument('--repeats', type=int, default=3, help="Runs per loader; the best is reported")
+    args = parser.parse_args()
+
+    rows = []
+    for file_path in args.files:
+        baseline_time, baseline_mb = measure(lambda: pd.read_csv(file_path), args.repeats)
+        # The first typed load infers and caches the dtype plan; later loads reuse it
+        cold_time, _ = measure(lambda: load_csv(file_path), 1)
+        warm_time, warm_mb = measure(lambda: load_csv(file_path), args.repeats)
+        rows.append({
+            'file': Path(file_path).name,
+            'read_csv_s': baseline_time,
+            'typed_cold_s': cold_time,
+            'typed_warm_s': warm_time,
+            'read_csv_mb': baseline_mb,
+            'typed_mb': warm_mb,
+            'memory_saved': 1 - warm_mb / baseline_mb if baseline_mb else 0.0,
+        })
+
+    print(pd.DataFrame(rows).round(4).to_string(index=False))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,7 @@
+import sys
+from pathlib import Path
+
+# Add project root to path first
+project_root = Path(__file__).parent.parent.absolute()
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
@@ -0,0 +1,242 @@
+import argparse
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+# Add project root to path first
+project_root = Path(__file__).parent.parent.absolute()
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from utils.results_store import RESULTS_DB, ResultsStore
+
+DEFAULT_DIRS = [project_root / 'output', project_root / 'output' / 'archive']
+PERCENTILES = (0.5, 0.9, 0.99)
+# Per-stage timings are any stage_<name>_seconds columns a run recorded
+STAGE_PREFIX, STAGE_SUFFIX = 'stage_', '_seconds'
+ALL_LEVELS = 'All'
+
+def find_result_files(paths: list) -> list:
+    """Expand directories into the eval result CSVs they contain (not recursive)."""
+    files = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            files.extend(sorted(path.glob('*.csv')))
+        elif path.exists():
+            files.append(path)
+        else:
+            print(f"Skipping missing path {path}")
+    return files
+
+def _question_keys(df: pd.DataFrame) -> pd.Series:
+    """Identify questions within a run: by their numbering when unique, since sets repeat question texts."""
+    for column in ['question_id', 'Sl.No.', 'No', 'No.', 'ID', 'Id', 'id']:
+        # Files combining several runs repeat the numbering once per run
+        if column in df.columns and df[column].notna().all() and not df.duplicated(['run_id', column]).any():
+            values = df[column]
+            if pd.api.types.is_float_dtype(values) and (values % 1 == 0).all():
+                values = values.astype('int64')
+            return values.astype(str)
+    return df['Question'].astype(str) if 'Question' in df.columns else pd.Series(df.index.astype(str), index=df.index)
+
+def load_store_results(store_path: Path) -> pd.DataFrame:
+    """Read every run in the results store in the layout of the result CSVs."""
+    results = ResultsStore(store_path).query()
+    results = results.rename(columns={'question': 'Question', 'complexity_level': 'Complexity Level'})
+    results['source_file'] = str(store_path)
+    results['question_key'] = results['question_id']
+    return results
+
+def load_results(files: list, store_path: Path = None) -> pd.DataFrame:
+    """Read result files, and runs in the results store, into one frame with one row per (run, question).
+
+    The same run is often saved several times (progress, final and archived
+    copies, combined exports), so rows repeated across files are kept once.
+    """
+    frames = []
+    for file in files:
+        try:
+            df = pd.read_csv(file, encoding='utf-8-sig')
+        except UnicodeDecodeError:
+            df = pd.read_csv(file, encoding='latin1')
+        # Combined exports name the status column differently
+        df = df.rename(columns={'run status': 'status'})
+        if 'duration_seconds' not in df.columns or 'run_id' not in df.columns:
+            print(f"Skipping {file}: no duration_seconds/run_id columns")
+            continue
+        df['source_file'] = str(file)
+        # Blank lines in a questions file produce error rows without a question
+        if 'Question' in df.columns:
+            blank = df['Question'].isna()
+            if blank.any():
+                print(f"Ignoring {blank.sum()} rows without a question in {file}")
+            df = df[~blank]
+        df = df.assign(question_key=_question_keys(df))
+        frames.append(df)
+    # Later frames win duplicates, so a run in the store overrides its CSV copies
+    if store_path is not None and Path(store_path).exists():
+        frames.append(load_store_results(store_path))
+    if not frames:
+        return pd.DataFrame()
+
+    results = pd.concat(frames, ignore_index=True)
+    results['run_id'] = results['run_id'].astype(str)
+    results['Complexity Level'] = results.get('Complexity Level', pd.Series(index=results.index)).fillna('Unknown')
+    results['duration_seconds'] = pd.to_numeric(results['duration_seconds'], errors='coerce')
+    results['passed'] = results['test_status'].astype(str).str.lower().eq('true') if 'test_status' in results else False
+    # Combined exports carry no status, so their error rate is unknown (NaN) rather than zero
+    status = results['status'] if 'status' in results else pd.Series(index=results.index, dtype=object)
+    results['errored'] = status.ne('success').astype(float).where(status.notna())
+    # Timestamps are not part of the key: spreadsheet round trips reformat them
+    key = ['run_id', 'question_key']
+    # Prefer rows that know their status when a run was saved several times
+    results = results.sort_values('errored', na_position='first', kind='stable')
+    return results.drop_duplicates(subset=key, keep='last').reset_index(drop=True)
+
+def stage_columns(results: pd.DataFrame) -> list:
+    return [
+        col for col in results.columns
+        if col.startswith(STAGE_PREFIX) and col.endswith(STAGE_SUFFIX) and results[col].notna().any()
+    ]
+
+def summarize(results: pd.DataFrame) -> pd.DataFrame:
+    """Latency percentiles, pass rate and error rate per run and complexity level.
+
+    Each run also gets an ``All`` row across levels. Stage timing columns
+    get their own p50/p90 columns.
+    """
+    by_level = results.assign(level=results['Complexity Level'])
+    overall = results.assign(level=ALL_LEVELS)
+    combined = pd.concat([by_level, overall], ignore_index=True)
+    grouped = combined.groupby(['run_id', 'level'], sort=True)
+
+    summary = grouped['duration_seconds'].quantile(list(PERCENTILES)).unstack()
+    summary.columns = [f"p{int(q * 100)}_s" for q in summary.columns]
+    summary.insert(0, 'questions', grouped.size())
+    summary['mean_s'] = grouped['duration_seconds'].mean()
+    summary['pass_rate'] = grouped['passed'].mean()
+    summary['error_rate'] = grouped['errored'].mean()
+    for col in stage_columns(results):
+        stage = col[len(STAGE_PREFIX):-len(STAGE_SUFFIX)]
+        stage_times = pd.to_numeric(combined[col], errors='coerce').groupby([combined['run_id'], combined['level']])
+        summary[f"{stage}_p50_s"] = stage_times.quantile(0.5)
+        summary[f"{stage}_p90_s"] = stage_times.quantile(0.9)
+    return summary.reset_index()
+
+def find_regressions(
+    summary: pd.DataFrame,
+    baseline: str = None,
+    latency_threshold: float = 0.2,
+    rate_threshold: float = 0.05
+) -> pd.DataFrame:
+    """Compare each run with the previous one (or a fixed baseline run) per complexity level.
+
+    A level regresses when p50 or p90 latency grows by more than
+    ``latency_threshold`` (relative), or its pass rate falls or error rate
+    rises by more than ``rate_threshold`` (absolute).
+    """
+    runs = sorted(summary['run_id'].unique())
+    rows = []
+    for i, run in enumerate(runs):
+        reference = baseline if baseline else (runs[i - 1] if i else None)
+        if reference is None or reference == run:
+            continue
+        current = summary[summary['run_id'] == run].set_index('level')
+        previous = summary[summary['run_id'] == reference].set_index('level')
+        for level in current.index.intersection(previous.index):
+            now, before = current.loc[level], previous.loc[level]
+            checks = [
+                (f"p{p}_s", now[f"p{p}_s"] / before[f"p{p}_s"] - 1 if before[f"p{p}_s"] else 0.0, latency_threshold)
+                for p in (50, 90)
+            ] + [
+                ('pass_rate', before['pass_rate'] - now['pass_rate'], rate_threshold),
+                ('error_rate', now['error_rate'] - before['error_rate'], rate_threshold),
+            ]
+            for metric, change, threshold in checks:
+                if pd.notna(change) and change > threshold:
+                    rows.append({
+                        'run_id': run, 'baseline': reference, 'level': level, 'metric': metric,
+                        'before': before[metric], 'after': now[metric],
+                    })
+    return pd.DataFrame(rows, columns=['run_id', 'baseline', 'level', 'metric', 'before', 'after'])
+
+def _format(df: pd.DataFrame) -> pd.DataFrame:
+    """Round seconds and show rates as percentages."""
+    df = df.copy()
+    for col in df.columns:
+        if col.endswith('_rate'):
+            df[col] = (df[col] * 100).map(lambda v: '' if pd.isna(v) else f"{v:.1f}%")
+        elif col.endswith('_s') or col in ('before', 'after'):
+            df[col] = df[col].map(lambda v: '' if pd.isna(v) else f"{v:.3g}" if abs(v) < 1 else f"{v:.1f}")
+    if {'metric', 'before', 'after'} <= set(df.columns):
+        # before/after of rate metrics are shown as percentages too
+        rates = df['metric'].str.endswith('_rate')
+        for col in ('before', 'after'):
+            df.loc[rates, col] = (df.loc[rates, col].astype(float) * 100).map(lambda v: f"{v:.1f}%")
+    return df
+
+def _markdown_table(df: pd.DataFrame) -> str:
+    if df.empty:
+        return "_None._"
+    header = "| " + " | ".join(map(str, df.columns)) + " |"
+    divider = "| " + " | ".join('---' for _ in df.columns) + " |"
+    body = ["| " + " | ".join(str(v) for v in row) + " |" for row in df.itertuples(index=False)]
+    return "\n".join([header, divider] + body)
+
+def render(summary: pd.DataFrame, regressions: pd.DataFrame, sources: list, fmt: str) -> str:
+    """Render the report as Markdown or HTML."""
+    title = f"Eval latency report ({datetime.now().strftime('%Y-%m-%d %H:%M')})"
+    sources = ', '.join(str(Path(f).relative_to(project_root)) if Path(f).is_relative_to(project_root) else str(f) for f in sources)
+    sections = [
+        ('Runs by complexity level', _format(summary)),
+        ('Regressions', _format(regressions)),
+    ]
+    if fmt == 'html':
+        parts = [f"<h1>{title}</h1>", f"<p>Sources: {sources}</p>"]
+        for heading, table in sections:
+            content = table.to_html(index=False, border=0) if not table.empty else "<p>None.</p>"
+            parts.append(f"<h2>{heading}</h2>\n{content}")
+        return "<html><body>\n" + "\n".join(parts) + "\n</body></html>\n"
+    parts = [f"# {title}", f"Sources: {sources}"]
+    for heading, table in sections:
+        parts.append(f"## {heading}\n\n{_markdown_table(table)}")
+    return "\n\n".join(parts) + "\n"
+
+def main():
+    parser = argparse.ArgumentParser(description="Latency percentiles, pass and error rates across eval runs.")
+    parser.add_argument('paths', nargs='*', default=[str(d) for d in DEFAULT_DIRS],
+                        help="Result CSVs or directories of them (default output/ and output/archive/)")
+    parser.add_argument('--store', default=str(project_root / RESULTS_DB),
+                        help="Results store to include runs from (default output/results.db)")
+    parser.add_argument('--no-store', action='store_true', help="Only read result CSVs")
+    parser.add_argument('--format', choices=['markdown', 'html'], default='markdown')
+    parser.add_argument('--out', help="Report file (default output/reports/latency_report.md or .html)")
+    parser.add_argument('--baseline', help="Compare every run with this run instead of the previous one")
+    parser.add_argument('--latency-threshold', type=float, default=0.2,
+                        help="Relative p50/p90 increase flagged as a regression")
+    parser.add_argument('--rate-threshold', type=float, default=0.05,
+                        help="Absolute pass/error rate change flagged as a regression")
+    args = parser.parse_args()
+
+    files = find_result_files(args.paths)
+    store_path = None if args.no_store else Path(args.store)
+    results = load_results(files, store_path)
+    if results.empty:
+        print("No eval results found")
+        return
+    summary = summarize(results)
+    regressions = find_regressions(summary, args.baseline, args.latency_threshold, args.rate_threshold)
+
+    extension = '.html' if args.format == 'html' else '.md'
+    out = Path(args.out) if args.out else project_root / 'output' / 'reports' / f"latency_report{extension}"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(render(summary, regressions, sorted(results['source_file'].unique()), args.format), encoding='utf-8')
+
+    print(_format(summary).to_string(index=False))
+    print(f"\n{len(regressions)} regressions across {summary['run_id'].nunique()} runs")
+    print(f"Report written to {out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+import argparse
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+# Add project root to path first
+project_root = Path(__file__).parent.parent.absolute()
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+def rss_mb(pid: int):
+    """Resident memory of a process in MB, or None where it cannot be read."""
+    if psutil is not None:
+        try:
+            return psutil.Process(pid).memory_info().rss / 1e6
+        except psutil.Error:
+            return None
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1e3
+    except OSError:
+        return None
+    return None
+
+class MemoryMonitor:
+    """Sample the peak RSS of some processes on a background thread."""
+
+    def __init__(self, pids: dict, interval: float = 0.5):
+        self.pids = pids
+        self.interval = interval
+        self.peaks = {name: None for name in pids}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while True:
+            for name, pid in self.pids.items():
+                value = rss_mb(pid)
+                if value is not None:
+                    self.peaks[name] = max(self.peaks[name] or 0.0, value)
+            if self._stop.wait(self.interval):
+                return
+
+    def __enter__(self) -> 'MemoryMonitor':
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+def start_synthetic_standin(latency_scale: float, run_seconds: float, chat_seconds: float):
+    """Start the synthetic OpenAI stand-in in its own process and return (process, base_url)."""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    process = subprocess.Popen(
+        [
+            sys.executable, '-m', 'utils.openai_standin', 'synthetic', '--port', str(port),
+            '--latency-scale', str(latency_scale), '--run-seconds', str(run_seconds),
+            '--chat-seconds', str(chat_seconds),
+        ],
+        cwd=project_root, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return process, f"http://127.0.0.1:{port}/v1"
+        except OSError:
+            if process.poll() is not None:
+                raise RuntimeError("The OpenAI stand-in exited during startup")
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError("The OpenAI stand-in did not start within 30 seconds")
+
+def load_question_pool(suite_names: list) -> list:
+    """Questions from the named suites (all suites when empty)."""
+    from run_questions import load_questions, prepare_questions
+    from run_suites import load_manifest
+
+    suites = load_manifest()
+    pool = []
+    for name in suite_names or list(suites):
+        suite = suites[name]
+        questions = prepare_questions(load_questions(Path(suite['questions'])), suite.get('columns'))
+        pool.extend(questions['Question'].astype(str))
+    return pool
+
+def run_session(session: int, file_path: str, questions: list, think_time: float, rng: random.Random,
+                session_state, records: list, lock: threading.Lock) -> None:
+    """One simulated analyst: upload and initialize, then ask questions with think time in between."""
+    from agents import run_analysis
+
+    session_state.current().debug_mode = False
+
+    def timed(operation: str, **kwargs) -> dict:
+        start = time.perf_counter()
+        try:
+            result = run_analysis(debug_mode=False, **kwargs)
+        except Exception as e:
+            result = {'status': 'error', 'error': str(e)}
+        with lock:
+            records.append({
+                'session': session, 'operation': operation, 'start': start,
+                'seconds': time.perf_counter() - start,
+                'status': result.get('status', 'error'), 'error': result.get('error', ''),
+            })
+        return result
+
+    # Sessions arrive spread over one think time rather than all at once
+    time.sleep(rng.uniform(0, think_time))
+    init = timed('initialize', query="Initialize data analysis", file_path=file_path, initialize=True)
+    if init.get('status') != 'success':
+        return
+    thread_id, file_id = init.get('thread_id'), init.get('file_id')
+    for question in questions:
+        if think_time > 0:
+            time.sleep(rng.expovariate(1 / think_time))
+        timed('question', query=question, file_path=file_path, thread_id=thread_id, file_id=file_id)
+
+def run_level(sessions: int, args, pool: list, assistant, standin_pid) -> dict:
+    """Run one concurrency level and summarize it."""
+    from run_questions import ThreadLocalSessionState
+
+    session_state = ThreadLocalSessionState(assistant)
+    sys.modules['streamlit'].session_state = session_state
+    sys.modules['streamlit'].write = lambda msg: session_state.write(msg)
+
+    records, lock = [], threading.Lock()
+    pids = {'load_rss_mb': os.getpid()}
+    if standin_pid is not None:
+        pids['standin_rss_mb'] = standin_pid
+    workers = []
+    for session in range(sessions):
+        rng = random.Random(args.seed * 100003 + session)
+        questions = rng.sample(pool, min(args.questions_per_session, len(pool)))
+        workers.append(threading.Thread(
+            target=run_session, daemon=True,
+            args=(session, args.data, questions, args.think_time, rng, session_state, records, lock)
+        ))
+
+    start = time.perf_counter()
+    with MemoryMonitor(pids) as monitor:
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+    wall = time.perf_counter() - start
+
+    df = pd.DataFrame(records, columns=['session', 'operation', 'start', 'seconds', 'status', 'error'])
+    questions = df[df['operation'] == 'question']
+    inits = df[df['operation'] == 'initialize']
+    latency = questions['seconds'].quantile([0.5, 0.9, 0.99]) if len(questions) else pd.Series([None] * 3)
+    return {
+        'sessions': sessions,
+        'questions': len(questions),
+        'wall_s': wall,
+        'throughput_qpm': len(questions) / wall * 60 if wall else 0.0,
+        'p50_s': latency.iloc[0],
+        'p90_s': latency.iloc[1],
+        'p99_s': latency.iloc[2],
+        'init_p50_s': inits['seconds'].median() if len(inits) else None,
+        'error_rate': (df['status'] != 'success').mean() if len(df) else 0.0,
+        **monitor.peaks,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate concurrent analyst sessions against run_analysis.")
+    parser.add_argument('--sessions', default='1,5,10,30', help="Comma-separated concurrency levels to run in turn")
+    parser.add_argument('--questions-per-session', type=int, default=5, help="Follow-up questions each session asks")
+    parser.add_argument('--think-time', type=float, default=5.0, help="Mean seconds between a session's questions")
+    parser.add_argument('--suites', nargs='*', default=[], help="Suites to draw questions from (default: all)")
+    parser.add_argument('--data', default=str(project_root / 'uploads' / 'mock_data.csv'), help="Dataset each session uploads")
+    parser.add_argument('--base-url', help="Use a running stand-in instead of starting a synthetic one")
+    parser.add_argument('--latency-scale', type=float, default=1.0, help="Scale for the synthetic stand-in's latencies")
+    parser.add_argument('--run-seconds', type=float, default=3.0, help="Synthetic assistant run time")
+    parser.add_argument('--chat-seconds', type=float, default=0.5, help="Synthetic chat completion time")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    levels = [int(level) for level in args.sessions.split(',') if level.strip()]
+
+    standin = None
+    base_url = args.base_url
+    if base_url is None:
+        standin, base_url = start_synthetic_standin(args.latency_scale, args.run_seconds, args.chat_seconds)
+        print(f"Started synthetic OpenAI stand-in at {base_url} (pid {standin.pid})")
+    # The clients read these when the agents are imported, so they must be set first
+    os.environ['OPENAI_BASE_URL'] = base_url
+    os.environ.setdefault('OPENAI_API_KEY', 'standin')
+    os.environ['DEBUG_MODE'] = 'false'
+
+    workdir = tempfile.TemporaryDirectory(prefix='load_test_')
+    registry = None
+    try:
+        import streamlit  # noqa: F401 - session state is replaced per level
+        from run_questions import create_test_assistant
+        from utils.database import DatabaseManager
+        from utils.dataset_registry import get_dataset_registry
+        from utils.setup import setup_project
+
+        setup_project()
+        # Sessions ingest and upload the dataset; keep their tables and stand-in file ids out of data/analysis.db
+        db_path = str(Path(workdir.name) / 'analysis.db')
+        registry = get_dataset_registry(DatabaseManager(db_path))
+        if registry.db.db_path != db_path:
+            raise RuntimeError("The dataset registry was opened before the load test could redirect it")
+        pool = load_question_pool(args.suites)
+        assistant = create_test_assistant()
+        print(f"{len(pool)} questions in the pool; levels {levels}")
+
+        rows = []
+        for sessions in levels:
+            print(f"\n=== {sessions} concurrent sessions ===")
+            row = run_level(sessions, args, pool, assistant, standin.pid if standin else None)
+            rows.append(row)
+            print(pd.DataFrame([row]).round(3).to_string(index=False))
+    finally:
+        if standin is not None:
+            standin.terminate()
+            standin.wait()
+        if registry is not None:
+            registry.db.close()
+        workdir.cleanup()
+
+    summary = pd.DataFrame(rows).round(3)
+    print("\n=== Load Test Summary ===")
+    print(summary.to_string(index=False))
+
+    out = project_root / 'output' / 'reports' / f"load_test_{datetime.now().strftime('%Y%m%d_%H%M%S')}.md"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    settings = (
+        f"questions/session={args.questions_per_session}, think time={args.think_time}s, "
+        f"stand-in={'synthetic' if standin else base_url}, latency scale={args.latency_scale}"
+    )
+    out.write_text(
+        f"# Load test ({datetime.now().strftime('%Y-%m-%d %H:%M')})\n\n{settings}\n\n"
+        f"```\n{summary.to_string(index=False)}\n```\n",
+        encoding='utf-8'
+    )
+    print(f"Report written to {out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+import json
+import os
+import threading
+from pathlib import Path
+import pandas as pd
+from utils.results_store import RESULTS_DB, ResultsStore, get_results_store
+
+project_root = Path(__file__).parent.parent.absolute()
+
+RETRY_POLICIES = ('none', 'errors', 'failures')
+RUNS_DIR = project_root / 'output' / 'runs'
+
+def needs_retry(record: dict, policy: str) -> bool:
+    """Whether a logged result should be run again under a retry policy."""
+    if policy == 'none':
+        return False
+    if record.get('status') != 'success':
+        return True
+    # Answers still waiting for the batch judge have not failed yet
+    return policy == 'failures' and not record.get('test_status') and record.get('judged_by') != 'pending'
+
+def is_finished(record: dict, attempts: int, policy: str, max_attempts: int) -> bool:
+    """Whether a resumed run skips a question, given its latest logged attempt (None if never run)."""
+    return record is not None and (not needs_retry(record, policy) or attempts >= max_attempts)
+
+class RunLog:
+    """Append-only JSONL log of per-question results for one run.
+
+    Every attempt is appended and flushed as soon as it finishes, so a
+    crashed run can be resumed from its log: questions whose latest attempt
+    succeeded are skipped and the rest are retried per the retry policy.
+    """
+
+    def __init__(self, run_id: str, runs_dir: Path = None):
+        runs_dir = Path(runs_dir or RUNS_DIR)
+        self.run_id = run_id
+        self.path = runs_dir / f"{run_id}.jsonl"
+        self.meta_path = runs_dir / f"{run_id}.meta.json"
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def write_meta(self, meta: dict) -> None:
+        self.meta_path.write_text(json.dumps(meta, indent=2))
+
+    def read_meta(self) -> dict:
+        return json.loads(self.meta_path.read_text()) if self.meta_path.exists() else {}
+
+    def append(self, record: dict) -> None:
+        """Append one attempt and force it to disk."""
+        line = json.dumps({'run_id': self.run_id, **record}, default=str)
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+
+    def records(self) -> list:
+        """Read every logged attempt, ignoring a line cut off by a crash."""
+        if not self.path.exists():
+            return []
+        records = []
+        with open(self.path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    print(f"Skipping incomplete log line in {self.path}")
+        return records
+
+    def latest(self) -> dict:
+        """Latest attempt per question id."""
+        return {record['question_id']: record for record in self.records()}
+
+    def attempts(self) -> dict:
+        """Number of attempts per question id; re-judged copies of an attempt do not count."""
+        counts = {}
+        for record in self.records():
+            question_id = record['question_id']
+            counts[question_id] = max(counts.get(question_id, 0), record.get('attempt', 1))
+        return counts
+
+def latest_run_id(runs_dir: Path = None):
+    """Id of the most recently started run, or None."""
+    logs = sorted(Path(runs_dir or RUNS_DIR).glob('*.meta.json'), key=lambda p: p.stat().st_mtime)
+    return logs[-1].name[:-len('.meta.json')] if logs else None
+
+def load_questions(questions_file: Path) -> pd.DataFrame:
+    """Read a questions CSV, trying the encodings our question files come in."""
+    try:
+        # Try UTF-8 with BOM first
+        return pd.read_csv(questions_file, encoding='utf-8-sig')
+    except UnicodeDecodeError:
+        try:
+            # Try latin1 as fallback
+            return pd.read_csv(questions_file, encoding='latin1')
+        except Exception as e:
+            print(f"Error reading questions file with latin1 encoding: {e}")
+            # Try cp1252 as last resort (common for Windows files)
+            return pd.read_csv(questions_file, encoding='cp1252')
+
+def prepare_questions(questions_df: pd.DataFrame, column_map: dict = None) -> pd.DataFrame:
+    """Rename a question set's columns to the harness names and drop blank rows."""
+    questions_df = questions_df.rename(columns=column_map or {})
+    blank = questions_df['Question'].isna() | (questions_df['Question'].astype(str).str.strip() == '')
+    if blank.any():
+        print(f"Skipping {blank.sum()} rows without a question")
+    return questions_df[~blank].reset_index(drop=True)
+
+def find_golden_answer_column(questions_df: pd.DataFrame):
+    """Return the name of the golden answer column, or None."""
+    for possible_name in ['Answer', 'Golden Answer', 'GoldenAnswer', 'Golden_Answer', 'Expected Answer', 'ExpectedAnswer']:
+        if possible_name in questions_df.columns:
+            return possible_name
+    return None
+
+# Result columns added to the questions, with their defaults
+RESULT_COLUMNS = {
+    'ai_answer': '', 'status': '', 'error': '', 'test_status': False, 'run_id': '',
+    'thread_id': '', 'file_id': '', 'timestamp': '', 'duration_seconds': 0.0, 'debug_output': '',
+    'code': '', 'steps': '', 'results': '', 'conversation_history': '', 'raw_response': '',
+    'judged_by': '', 'judge_reason': '',
+    # Per-stage timings, summarized by tests/latency_report.py
+    'stage_analysis_seconds': None, 'stage_judge_seconds': None,
+}
+
+def question_ids(questions_df: pd.DataFrame) -> list:
+    """Stable ids for questions: the file's numbering column when present, otherwise the row number."""
+    for column in ['Sl.No.', 'No', 'No.', 'ID', 'Id', 'id']:
+        if column in questions_df.columns and questions_df[column].notna().all() and questions_df[column].is_unique:
+            values = questions_df[column]
+            # Numbering read as float because of blank rows: 1.0 -> 1
+            if pd.api.types.is_float_dtype(values) and (values % 1 == 0).all():
+                values = values.astype('int64')
+            return [str(value) for value in values]
+    return [str(i + 1) for i in range(len(questions_df))]
+
+def merge_run(run_log: RunLog, questions_df: pd.DataFrame, store: ResultsStore = None,
+              exports: list = (), export_blobs: bool = False) -> pd.DataFrame:
+    """Merge the latest attempt of every question into the results store.
+
+    ``exports`` lists CSV/XLSX files to also write the merged run to.
+    """
+    store = store or get_results_store(Path(project_root) / RESULTS_DB)
+    latest = run_log.latest()
+    test_df = questions_df.copy()
+    for column, default in RESULT_COLUMNS.items():
+        test_df[column] = default
+    test_df['run_id'] = run_log.run_id
+    for idx, question_id in zip(test_df.index, question_ids(questions_df)):
+        record = latest.get(question_id)
+        if record is None:
+            test_df.at[idx, 'status'] = 'not run'
+            continue
+        for column in RESULT_COLUMNS:
+            if column in record:
+                test_df.at[idx, column] = record[column]
+
+    store.write_run(
+        run_log.run_id, test_df, question_ids(questions_df), list(questions_df.columns), run_log.read_meta()
+    )
+    for export in exports:
+        try:
+            print(f"Exported run {run_log.run_id} to {store.export(run_log.run_id, export, include_blobs=export_blobs)}")
+        except ImportError:
+            print(f"openpyxl is not installed, skipping the export to {export}")
+    return test_df
@@ -1,9 +1,11 @@
+import argparse
 import pandas as pd
+import queue
 import sys
+import threading
 from pathlib import Path
 import time
 import os
-import json
 from datetime import datetime
 
 # Add project root to path first
@@ -23,11 +25,19 @@ if not api_key:
     raise ValueError("OPENAI_API_KEY not found in environment variables. Please check your .env file.")
 
 from openai import OpenAI
+from config import OPENAI_BASE_URL
 from agents import run_analysis
+from utils.answer_judge import PASS, judge_answer, judge_with_llm, plan_batches
+from utils.results_store import get_results_store
+from run_log import (
+    RETRY_POLICIES, RUNS_DIR, RunLog, find_golden_answer_column, is_finished, latest_run_id, load_questions,
+    merge_run, needs_retry, prepare_questions, question_ids
+)
+from token_bucket import TokenBucket
 from utils.setup import setup_project, debug
 
 # Initialize OpenAI client with API key from environment
-client = OpenAI(api_key=api_key)
+client = OpenAI(api_key=api_key, base_url=OPENAI_BASE_URL)
 
 def create_test_assistant():
     """Create an OpenAI Assistant for testing."""
@@ -75,292 +85,524 @@ def compare_answers(client, actual_answer, expected_answer):
         print(f"Error comparing answers: {e}")
         return False
 
-def run_test_questions():
+class MockSessionState:
+    """Stand-in for Streamlit's session state, one per worker."""
+
+    def __init__(self, assistant):
+        self._data = {
+            'openai_assistant': assistant,
+            'file_uploaded': False,
+            'debug_mode': True,
+            'conversation_history': [],
+            'current_thread_id': None,
+            'debug_output': []
+        }
+
+    def __getattr__(self, name):
+        return self._data.get(name)
+
+    def get(self, key, default=None):
+        return self._data.get(key, default)
+
+    def __setattr__(self, name, value):
+        if name == '_data':
+            super().__setattr__(name, value)
+        else:
+            self._data[name] = value
+
+    def __delattr__(self, name):
+        self._data.pop(name, None)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def write(self, msg):
+        """Mock Streamlit's write function for debug output"""
+        if self._data.get('debug_mode'):
+            print(f"[DEBUG] {msg}")
+            self._data['debug_output'].append(msg)
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self):
+        return len(self._data)
+
+    def keys(self):
+        return self._data.keys()
+
+    def values(self):
+        return self._data.values()
+
+    def items(self):
+        return self._data.items()
+
+class ThreadLocalSessionState:
+    """Session state proxy giving every worker thread its own MockSessionState.
+
+    Streamlit keeps one session state per browser session; the agents read
+    and write it freely (attached file, upload flag), so concurrent workers
+    must not share one.
+    """
+
+    def __init__(self, assistant):
+        object.__setattr__(self, '_assistant', assistant)
+        object.__setattr__(self, '_local', threading.local())
+
+    def current(self) -> MockSessionState:
+        local = object.__getattribute__(self, '_local')
+        if not hasattr(local, 'state'):
+            local.state = MockSessionState(object.__getattribute__(self, '_assistant'))
+        return local.state
+
+    def __getattr__(self, name):
+        return getattr(self.current(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self.current(), name, value)
+
+    def __delattr__(self, name):
+        delattr(self.current(), name)
+
+    def __contains__(self, key):
+        return key in self.current()
+
+    def __iter__(self):
+        return iter(self.current())
+
+    def __len__(self):
+        return len(self.current())
+
+def cleanup_active_runs(thread_id):
+    """Cancel any active runs on the thread"""
+    try:
+        runs = client.beta.threads.runs.list(thread_id=thread_id)
+        for run in runs.data:
+            if run.status in ['queued', 'in_progress', 'requires_action']:
+                print(f"Canceling active run {run.id}")
+                client.beta.threads.runs.cancel(thread_id=thread_id, run_id=run.id)
+                time.sleep(1)  # Give the API time to process the cancellation
+    except Exception as e:
+        print(f"Error cleaning up runs: {str(e)}")
+
+def grade_answer(question, ai_answer, golden_answer, local_judge=True, rel_tol=0.0, abs_tol=1e-9, batch=True):
+    """Grade an answer locally when the verdict is clear-cut, otherwise with the LLM.
+
+    Returns (test_status, judged_by, reason) where judged_by is 'local' or
+    'llm', or 'pending' when ``batch`` defers the LLM verdict to judge_pending.
+    """
+    if local_judge:
+        verdict = judge_answer(question, str(golden_answer), ai_answer, rel_tol=rel_tol, abs_tol=abs_tol)
+        if verdict.decided:
+            return verdict.verdict == PASS, 'local', verdict.reason
+        reason = f"ambiguous locally: {verdict.reason}"
+    else:
+        reason = "local judge disabled"
+    if batch:
+        return False, 'pending', reason
+    return compare_answers(client, ai_answer, str(golden_answer)), 'llm', reason
+
+def judge_pending(run_log: RunLog, questions_df: pd.DataFrame, golden_answer_column: str,
+                  max_items: int = 20, max_tokens: int = 6000) -> int:
+    """Grade every answer waiting for the LLM judge in batched requests and log the verdicts."""
+    pending = [record for record in run_log.latest().values() if record.get('judged_by') == 'pending']
+    if not pending:
+        return 0
+    by_id = dict(zip(question_ids(questions_df), zip(questions_df['Question'], questions_df[golden_answer_column])))
+    items = [
+        (by_id[record['question_id']][0], str(by_id[record['question_id']][1]), record.get('ai_answer', ''))
+        for record in pending
+    ]
+    print(f"\nJudging {len(items)} ambiguous answers in {len(plan_batches(items, max_items, max_tokens))} batched requests")
+    verdicts = judge_with_llm(client, items, max_items=max_items, max_tokens=max_tokens)
+    for record, verdict in zip(pending, verdicts):
+        # Re-logged with the same attempt number, so the verdict becomes the latest record
+        run_log.append({
+            **record, 'test_status': verdict.verdict == PASS, 'judged_by': 'llm', 'judge_reason': verdict.reason
+        })
+    return len(pending)
+
+def evaluate_question(question, golden_answer, file_path, thread_id, file_id, session_state, run_id, position,
+                      judge_options=None):
+    """Run one question on a worker's thread and return its result columns."""
+    question_start_time = time.time()
+    print(f"\nProcessing question {position}: {question}")
+    row = {
+        'ai_answer': '', 'status': '', 'error': '', 'test_status': False,
+        'run_id': run_id, 'thread_id': thread_id, 'file_id': file_id,
+    }
+    try:
+        result = run_analysis(
+            query=question,
+            file_path=str(file_path),
+            debug_mode=True,
+            initialize=False,
+            thread_id=thread_id,
+            file_id=file_id
+        )
+        row['stage_analysis_seconds'] = time.time() - question_start_time
+
+        row['timestamp'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        row['debug_output'] = '\n'.join(result.get('debug_output', '').split('\n')) if result.get('debug_output') else ''
+        row['conversation_history'] = str(session_state.conversation_history)
+        row['raw_response'] = str(result)
+
+        if result and result.get('status') == 'success':
+            response = result.get('response', {})
+            row['status'] = 'success'
+            if isinstance(response, dict):
+                ai_answer = response.get('final_answer', '')
+                row['ai_answer'] = ai_answer
+                row['code'] = response.get('code', '')
+                row['steps'] = str(response.get('steps', []))
+                row['results'] = str(response.get('results', []))
+
+                # Compare with golden answer
+                if golden_answer is not None:
+                    if pd.isna(golden_answer):
+                        print(f"Warning: Golden answer is missing for question {position}")
+                    else:
+                        judge_start_time = time.time()
+                        row['test_status'], row['judged_by'], row['judge_reason'] = grade_answer(
+                            question, ai_answer, golden_answer, **(judge_options or {})
+                        )
+                        row['stage_judge_seconds'] = time.time() - judge_start_time
+                        outcome = 'PENDING' if row['judged_by'] == 'pending' else 'PASS' if row['test_status'] else 'FAIL'
+                        print(f"Answer comparison result for question {position}: "
+                              f"{outcome} ({row['judged_by']}: {row['judge_reason']})")
+            else:
+                row['ai_answer'] = str(response)
+        else:
+            row['status'] = 'error'
+            row['error'] = result.get('error', 'Unknown error')
+            # A failed or timed out question can leave a run active on the thread
+            cleanup_active_runs(thread_id)
+    except Exception as e:
+        print(f"Error processing question: {str(e)}")
+        row['status'] = 'error'
+        row['error'] = str(e)
+        cleanup_active_runs(thread_id)
+
+    row['duration_seconds'] = time.time() - question_start_time
+    return row
+
+def run_test_questions(
+    file_path: Path = None,
+    questions_file: Path = None,
+    concurrency: int = 4,
+    rate_per_minute: float = 30.0,
+    run_id: str = None,
+    max_attempts: int = 3,
+    retry_policy: str = 'errors',
+    judge_options: dict = None,
+    judge_batch_size: int = 20,
+    judge_batch_tokens: int = 6000,
+    exports: list = (),
+    export_blobs: bool = False,
+    suite: str = None,
+    column_map: dict = None,
+    golden_column: str = None
+):
+    """Run a question suite with a pool of workers, each on its own thread with the dataset attached.
+
+    Questions are handed out from a shared queue, starts are paced by a
+    token bucket, and every attempt is appended to the run's log. Passing
+    the ``run_id`` of an earlier run resumes it: completed questions are
+    skipped and the rest are retried (see needs_retry) up to
+    ``max_attempts`` attempts in total. The log is merged into the results
+    store at the end, and into any ``exports`` (CSV/XLSX) too.
+
+    ``suite``, ``column_map`` and ``golden_column`` come from a suite
+    manifest entry (see tests/run_suites.py): the suite name prefixes the
+    run id and the map renames the question file's columns to the names
+    used here. Returns the run id, or None if the run could not start.
+
+    Answers the local judge cannot decide are graded by the LLM after all
+    questions finish, ``judge_batch_size`` per request within a
+    ``judge_batch_tokens`` prompt budget; a batch size of 0 grades each one
+    as soon as it is answered. With the ``failures`` retry policy, answers
+    the batch judge fails are retried in a further round of workers.
+    """
+    if retry_policy not in RETRY_POLICIES:
+        raise ValueError(f"Unknown retry policy '{retry_policy}', expected one of {RETRY_POLICIES}")
+    judge_options = {**(judge_options or {}), 'batch': judge_batch_size > 0}
+    resuming = run_id is not None
+    run_id = run_id or (f"{suite}_" if suite else '') + datetime.now().strftime('%Y%m%d_%H%M%S')
+    run_log = RunLog(run_id)
+    if resuming:
+        # Reuse the files and column mapping the run started with unless others are given explicitly
+        meta = run_log.read_meta()
+        file_path = file_path or meta.get('file_path')
+        questions_file = questions_file or meta.get('questions_file')
+        suite = suite or meta.get('suite')
+        column_map = column_map or meta.get('column_map')
+        golden_column = golden_column or meta.get('golden_column')
     # Initialize project
     setup_project()
-    
+
     # Create test assistant and store its ID
     assistant = create_test_assistant()
     assistant_id = assistant.id
     print(f"Created test assistant with ID: {assistant_id}")
-    
-    # Create a mock session state for compatibility
-    class MockSessionState:
-        def __init__(self):
-            self._data = {
-                'openai_assistant': assistant,
-                'file_uploaded': False,
-                'debug_mode': True,
-                'current_file_id': None,
-                'conversation_history': [],
-                'current_thread_id': None,
-                'debug_output': []
-            }
-            
-        def __getattr__(self, name):
-            return self._data.get(name)
-            
-        def get(self, key, default=None):
-            return self._data.get(key, default)
-            
-        def __setattr__(self, name, value):
-            if name == '_data':
-                super().__setattr__(name, value)
-            else:
-                self._data[name] = value
-                
-        def __contains__(self, key):
-            return key in self._data
-                
-        def write(self, msg):
-            """Mock Streamlit's write function for debug output"""
-            if self._data.get('debug_mode'):
-                print(f"[DEBUG] {msg}")
-                self._data['debug_output'].append(msg)
-                
-        def __iter__(self):
-            return iter(self._data)
-            
-        def __len__(self):
-            return len(self._data)
-            
-        def keys(self):
-            return self._data.keys()
-            
-        def values(self):
-            return self._data.values()
-            
-        def items(self):
-            return self._data.items()
-            
-    # Set up mock Streamlit session state
+
+    # Set up mock Streamlit session state, one per worker thread
     import streamlit as st
-    mock_state = MockSessionState()
-    sys.modules['streamlit'].session_state = mock_state
-    
+    session_state = ThreadLocalSessionState(assistant)
+    sys.modules['streamlit'].session_state = session_state
+
     # Also mock st.write for debug output
-    sys.modules['streamlit'].write = mock_state.write
-    
+    sys.modules['streamlit'].write = lambda msg: session_state.write(msg)
+
     print("\n=== Test Run Starting ===")
-    print(f"Debug mode: {mock_state.debug_mode}")
-    
+    print(f"Concurrency: {concurrency}, rate limit: {rate_per_minute:g} questions/minute")
+
     # Initialize file paths
-    file_path = Path(project_root) / 'uploads' / 'mock_data.csv'
+    file_path = Path(file_path or Path(project_root) / 'uploads' / 'mock_data.csv')
     if not file_path.exists():
         print(f"Error: Could not find {file_path}")
         return
-        
-    questions_file = Path(project_root) / 'uploads' / '100qs_part2.csv'
+
+    questions_file = Path(questions_file or Path(project_root) / 'uploads' / '100qs_part2.csv')
     if not questions_file.exists():
         print(f"Error: Could not find {questions_file}")
         return
-        
+
     # Load questions
     try:
-        # Try UTF-8 with BOM first
-        questions_df = pd.read_csv(questions_file, encoding='utf-8-sig')
-    except UnicodeDecodeError:
-        try:
-            # Try latin1 as fallback
-            questions_df = pd.read_csv(questions_file, encoding='latin1')
-        except Exception as e:
-            print(f"Error reading questions file with latin1 encoding: {e}")
-            try:
-                # Try cp1252 as last resort (common for Windows files)
-                questions_df = pd.read_csv(questions_file, encoding='cp1252')
-            except Exception as e:
-                print(f"Failed to read questions file with any encoding: {e}")
-                return
+        questions_df = prepare_questions(load_questions(questions_file), column_map)
+    except Exception as e:
+        print(f"Failed to read questions file with any encoding: {e}")
+        return
 
     total_questions = len(questions_df)
     print(f"Successfully loaded {total_questions} questions from {questions_file}")
-    
-    # Check for required columns
-    required_columns = ['Question']
-    golden_answer_column = None
-    for possible_name in ['Answer', 'Golden Answer', 'GoldenAnswer', 'Golden_Answer', 'Expected Answer', 'ExpectedAnswer']:
-        if possible_name in questions_df.columns:
-            golden_answer_column = possible_name
-            break
-    
+
+    golden_answer_column = golden_column or find_golden_answer_column(questions_df)
     if golden_answer_column is None:
         print("Warning: No golden answer column found. Test status will not be computed.")
     else:
         print(f"Using '{golden_answer_column}' as the golden answer column")
-    
+
     print(f"Found columns: {', '.join(questions_df.columns)}")
-    
-    # Prepare results dataframe - use all questions
-    test_df = questions_df.copy()
-    test_df['ai_answer'] = ''
-    test_df['status'] = ''
-    test_df['error'] = ''
-    test_df['test_status'] = False  # Add test status column
-    test_df['run_id'] = datetime.now().strftime('%Y%m%d_%H%M%S')
-    test_df['thread_id'] = ''
-    test_df['file_id'] = ''
-    test_df['timestamp'] = ''
-    test_df['duration_seconds'] = 0.0
-    test_df['debug_output'] = ''
-    test_df['code'] = ''
-    test_df['steps'] = ''
-    test_df['results'] = ''
-    test_df['conversation_history'] = ''
-    test_df['raw_response'] = ''
-    
-    # Initialize analysis with mock data
-    print("\nInitializing analysis...")
-    init_result = run_analysis(
-        query="Initialize data analysis",
-        file_path=str(file_path),
-        debug_mode=True,
-        initialize=True
-    )
-    
-    if init_result.get('status') != 'success':
-        print(f"Failed to initialize: {init_result.get('error', 'Unknown error')}")
-        return
-        
-    # Store initialization results in mock session state
-    thread_id = init_result.get('thread_id')
-    file_id = init_result.get('file_id')
-    mock_state.current_thread_id = thread_id
-    mock_state.current_file_id = file_id
-    
-    print(f"Initialized with thread_id: {thread_id}, file_id: {file_id}")
-    
-    # Run each question
+
+    run_log.write_meta({
+        'run_id': run_id,
+        'file_path': str(file_path),
+        'questions_file': str(questions_file),
+        'started_at': run_log.read_meta().get('started_at', datetime.now().isoformat()),
+        'resumed_at': datetime.now().isoformat() if resuming else None,
+        'max_attempts': max_attempts,
+        'retry_policy': retry_policy,
+        'suite': suite,
+        'column_map': column_map,
+        'golden_column': golden_answer_column,
+    })
+    print(f"Run {run_id}: logging results to {run_log.path}")
+
+    # Queue questions that have not finished yet
+    ids = question_ids(questions_df)
+    attempts = run_log.attempts()
+    work = queue.Queue()
+
+    def queue_unfinished():
+        """Queue every question whose latest logged attempt still needs running and return how many."""
+        latest = run_log.latest()
+        queued = 0
+        for (idx, row), question_id in zip(questions_df.iterrows(), ids):
+            if is_finished(latest.get(question_id), attempts.get(question_id, 0), retry_policy, max_attempts):
+                continue
+            golden_answer = row[golden_answer_column] if golden_answer_column else None
+            work.put((idx, question_id, row['Question'], golden_answer))
+            queued += 1
+        return queued
+
+    queued = queue_unfinished()
+    if resuming:
+        print(f"Resuming: {total_questions - queued} questions already complete, {queued} to run")
+    pending = [queued]
+
+    bucket = TokenBucket(rate=rate_per_minute / 60.0, capacity=max(concurrency, 1))
+    results_lock = threading.Lock()
+    completed = [0]
     start_time = time.time()
-    run_id = datetime.now().strftime('%Y%m%d_%H%M%S')
-    
-    def cleanup_active_runs(thread_id):
-        """Cancel any active runs on the thread"""
-        try:
-            runs = client.beta.threads.runs.list(thread_id=thread_id)
-            for run in runs.data:
-                if run.status in ['queued', 'in_progress', 'requires_action']:
-                    print(f"Canceling active run {run.id}")
-                    client.beta.threads.runs.cancel(thread_id=thread_id, run_id=run.id)
-                    time.sleep(1)  # Give the API time to process the cancellation
-        except Exception as e:
-            print(f"Error cleaning up runs: {str(e)}")
-    
-    for idx, row in test_df.iterrows():
-        question = row['Question']
-        question_start_time = time.time()
-        print(f"\nProcessing question {idx + 1}/{total_questions}: {question}")
-        
-        try:
-            # Clean up any active runs before starting new one
-            cleanup_active_runs(thread_id)
-            
-            result = run_analysis(
-                query=question,
-                file_path=str(file_path),
-                debug_mode=True,
-                initialize=False,
-                thread_id=thread_id,
-                file_id=file_id
+
+    successes = [0]
+
+    def save_progress():
+        """Report progress; the run log already holds every finished attempt."""
+        done = completed[0]
+        elapsed_time = time.time() - start_time
+        estimated_remaining_time = max(pending[0] - done, 0) * elapsed_time / done
+
+        print(f"\nProgress Update:")
+        print(f"Completed: {done}/{pending[0]} attempts ({(done/pending[0])*100:.1f}%)")
+        print(f"Success rate: {successes[0]/done*100:.1f}%")
+        print(f"Elapsed time: {elapsed_time/60:.1f} minutes")
+        print(f"Estimated remaining time: {estimated_remaining_time/60:.1f} minutes")
+        print(f"Progress saved to: {run_log.path}")
+
+    def worker(worker_number):
+        """Attach the dataset to a fresh thread, then answer questions until the queue is empty."""
+        bucket.acquire()
+        init_result = run_analysis(
+            query="Initialize data analysis",
+            file_path=str(file_path),
+            debug_mode=True,
+            initialize=True
+        )
+        if init_result.get('status') != 'success':
+            print(f"Worker {worker_number} failed to initialize: {init_result.get('error', 'Unknown error')}")
+            return
+
+        thread_id = init_result.get('thread_id')
+        file_id = init_result.get('file_id')
+        session_state.current_thread_id = thread_id
+        print(f"Worker {worker_number} initialized with thread_id: {thread_id}, file_id: {file_id}")
+
+        while True:
+            try:
+                idx, question_id, question, golden_answer = work.get_nowait()
+            except queue.Empty:
+                return
+            bucket.acquire()
+            row = evaluate_question(
+                question, golden_answer, file_path, thread_id, file_id,
+                session_state, run_id, f"{idx + 1}/{total_questions}", judge_options
             )
-            
-            # Update basic info
-            test_df.at[idx, 'run_id'] = run_id
-            test_df.at[idx, 'thread_id'] = thread_id
-            test_df.at[idx, 'file_id'] = file_id
-            test_df.at[idx, 'timestamp'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            test_df.at[idx, 'duration_seconds'] = time.time() - question_start_time
-            test_df.at[idx, 'debug_output'] = '\n'.join(result.get('debug_output', '').split('\n')) if result.get('debug_output') else ''
-            test_df.at[idx, 'conversation_history'] = str(mock_state.conversation_history)
-            test_df.at[idx, 'raw_response'] = str(result)
-            
-            if result and result.get('status') == 'success':
-                response = result.get('response', {})
-                if isinstance(response, dict):
-                    ai_answer = response.get('final_answer', '')
-                    test_df.at[idx, 'ai_answer'] = ai_answer
-                    test_df.at[idx, 'code'] = response.get('code', '')
-                    test_df.at[idx, 'steps'] = str(response.get('steps', []))
-                    test_df.at[idx, 'results'] = str(response.get('results', []))
-                    test_df.at[idx, 'status'] = 'success'
-                    
-                    # Compare with golden answer
-                    if golden_answer_column:
-                        try:
-                            golden_answer = row[golden_answer_column]
-                            if pd.isna(golden_answer):
-                                print(f"Warning: Golden answer is missing for question {idx + 1}")
-                                test_df.at[idx, 'test_status'] = False
-                            else:
-                                test_status = compare_answers(client, ai_answer, str(golden_answer))
-                                test_df.at[idx, 'test_status'] = test_status
-                                print(f"Answer comparison result: {'PASS' if test_status else 'FAIL'}")
-                        except Exception as e:
-                            print(f"Error comparing answers: {str(e)}")
-                            test_df.at[idx, 'test_status'] = False
-                    else:
-                        test_df.at[idx, 'test_status'] = False
+            with results_lock:
+                attempts[question_id] = attempts.get(question_id, 0) + 1
+                run_log.append({'question_id': question_id, 'attempt': attempts[question_id], **row})
+                completed[0] += 1
+                successes[0] += row['status'] == 'success'
+                if needs_retry(row, retry_policy) and attempts[question_id] < max_attempts:
+                    print(f"Retrying question {question_id} (attempt {attempts[question_id] + 1}/{max_attempts})")
+                    pending_retry = (idx, question_id, question, golden_answer)
                 else:
-                    test_df.at[idx, 'ai_answer'] = str(response)
-                    test_df.at[idx, 'status'] = 'success'
-                    test_df.at[idx, 'test_status'] = False
-            else:
-                test_df.at[idx, 'status'] = 'error'
-                test_df.at[idx, 'error'] = result.get('error', 'Unknown error')
-                
-            # Save progress after each question
-            if (idx + 1) % 10 == 0:
-                progress_file = Path(project_root) / 'output' / 'test_results_progress.csv'
-                try:
-                    test_df.to_csv(progress_file, index=False, encoding='utf-8-sig')
-                except UnicodeDecodeError:
-                    test_df.to_csv(progress_file, index=False, encoding='latin1')
-                elapsed_time = time.time() - start_time
-                avg_time_per_question = elapsed_time / (idx + 1)
-                remaining_questions = total_questions - (idx + 1)
-                estimated_remaining_time = remaining_questions * avg_time_per_question
-                
-                print(f"\nProgress Update:")
-                print(f"Completed: {idx + 1}/{total_questions} questions ({((idx + 1)/total_questions)*100:.1f}%)")
-                print(f"Success rate: {(test_df['status'] == 'success').sum()/(idx + 1)*100:.1f}%")
-                print(f"Elapsed time: {elapsed_time/60:.1f} minutes")
-                print(f"Estimated remaining time: {estimated_remaining_time/60:.1f} minutes")
-                print(f"Progress saved to: {progress_file}")
-                
-        except Exception as e:
-            print(f"Error processing question: {str(e)}")
-            test_df.at[idx, 'status'] = 'error'
-            test_df.at[idx, 'error'] = str(e)
-        
-        # Sleep between questions to avoid rate limiting
-        time.sleep(2)
-    
-    # Save final results
-    output_file = Path(project_root) / 'output' / 'test_results_final.csv'
-    output_file.parent.mkdir(exist_ok=True)
-    try:
-        test_df.to_csv(output_file, index=False, encoding='utf-8-sig')
-    except UnicodeDecodeError:
-        test_df.to_csv(output_file, index=False, encoding='latin1')
-    
+                    pending_retry = None
+                if completed[0] % 10 == 0:
+                    save_progress()
+            if pending_retry is not None:
+                work.put(pending_retry)
+
+    while True:
+        # No more workers than questions, each one costs an initialization
+        workers = [
+            threading.Thread(target=worker, args=(i + 1,), daemon=True)
+            for i in range(min(max(concurrency, 1), work.qsize()))
+        ]
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+
+        if not work.empty():
+            print(f"{work.qsize()} questions were not run because no worker initialized; resume with --resume {run_id}")
+
+        # Grade deferred answers, including ones left pending by an interrupted run
+        if golden_answer_column is not None:
+            judge_pending(run_log, questions_df, golden_answer_column, max(judge_batch_size, 1), judge_batch_tokens)
+
+        # Answers the batch judge failed are retried like failures decided locally
+        if not work.empty() or retry_policy != 'failures':
+            break
+        queued = queue_unfinished()
+        if not queued:
+            break
+        pending[0] += queued
+        print(f"\nRetrying {queued} questions the LLM judge failed")
+
+    # Merge the log into the final results
+    test_df = merge_run(run_log, questions_df, exports=exports, export_blobs=export_blobs)
+
     # Calculate total time
     total_time = time.time() - start_time
-    
-    print(f"\nTest complete. Results saved to {output_file}")
+
+    print(f"\nTest complete. Results of run {run_id} saved to {get_results_store().path}")
     print(f"\nFinal Summary:")
     print(f"Total questions processed: {total_questions}")
     success_count = (test_df['status'] == 'success').sum()
     print(f"Successful: {success_count} ({(success_count/total_questions)*100:.1f}%)")
     print(f"Failed: {total_questions - success_count} ({((total_questions-success_count)/total_questions)*100:.1f}%)")
-    
+
     # Add test status statistics
     test_pass_count = (test_df['test_status'] == True).sum()
     print(f"\nTest Results:")
     print(f"Passed: {test_pass_count} ({(test_pass_count/total_questions)*100:.1f}%)")
     print(f"Failed: {total_questions - test_pass_count} ({((total_questions-test_pass_count)/total_questions)*100:.1f}%)")
-    
+
+    # Every graded answer used to cost one LLM call
+    graded = (test_df['judged_by'] != '').sum()
+    llm_calls = (test_df['judged_by'] == 'llm').sum()
+    print(f"\nJudging:")
+    print(f"Graded answers: {graded}")
+    print(f"Decided locally: {graded - llm_calls}")
+    print(f"Judged by LLM: {llm_calls} ({graded - llm_calls} judge calls saved)")
+
     print(f"\nTiming:")
     print(f"Total time: {total_time/60:.1f} minutes")
-    print(f"Average time per question: {total_time/total_questions:.1f} seconds")
+    if completed[0]:
+        print(f"Average time per attempt: {total_time/completed[0]:.1f} seconds")
+        print(f"Attempts per minute: {completed[0] / (total_time / 60):.1f}")
+
+    run_log.write_meta({**run_log.read_meta(), 'finished_at': datetime.now().isoformat()})
+    return run_id
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a question suite against the analysis pipeline.")
+    parser.add_argument('--data', help="Dataset CSV (default uploads/mock_data.csv)")
+    parser.add_argument('--questions', help="Questions CSV (default uploads/100qs_part2.csv)")
+    parser.add_argument('--concurrency', type=int, default=4, help="Worker threads, each with its own assistant thread")
+    parser.add_argument('--rate', type=float, default=30.0, help="Maximum questions started per minute across workers")
+    parser.add_argument('--resume', metavar='RUN_ID', help="Resume a run from its log ('latest' for the newest run)")
+    parser.add_argument('--max-attempts', type=int, default=3, help="Attempts per question, including retries")
+    parser.add_argument('--retry', choices=RETRY_POLICIES, default='errors',
+                        help="Retry questions that errored, that errored or failed the answer check, or none")
+    parser.add_argument('--merge-only', action='store_true', help="Only merge the run log into the results store")
+    parser.add_argument('--export', action='append', default=[], metavar='PATH',
+                        help="Also export the run to a .csv or .xlsx file (repeatable)")
+    parser.add_argument('--export-blobs', action='store_true',
+                        help="Include debug output, raw responses and conversation history in exports")
+    parser.add_argument('--no-local-judge', action='store_true', help="Grade every answer with the LLM")
+    parser.add_argument('--rel-tol', type=float, default=0.0,
+                        help="Extra relative tolerance for decimal answers (integers always match exactly)")
+    parser.add_argument('--abs-tol', type=float, default=1e-9, help="Absolute tolerance for numeric answers")
+    parser.add_argument('--judge-batch-size', type=int, default=20,
+                        help="Answers graded per LLM judge request at the end of the run (0 grades each immediately)")
+    parser.add_argument('--judge-batch-tokens', type=int, default=6000, help="Prompt token budget per judge request")
+    args = parser.parse_args()
+
+    run_id = latest_run_id() if args.resume == 'latest' else args.resume
+    if args.resume and run_id is None:
+        parser.error("No earlier run to resume")
+    if args.merge_only:
+        if run_id is None:
+            parser.error("--merge-only needs --resume RUN_ID")
+        run_log = RunLog(run_id)
+        meta = run_log.read_meta()
+        questions_file = args.questions or meta.get('questions_file')
+        if not questions_file:
+            parser.error(f"Run {run_id} has no recorded questions file; pass --questions")
+        questions_df = prepare_questions(load_questions(Path(questions_file)), meta.get('column_map'))
+        test_df = merge_run(run_log, questions_df, exports=args.export,
+                            export_blobs=args.export_blobs)
+        print(f"Merged {len(run_log.latest())}/{len(test_df)} questions of run {run_id} into {get_results_store().path}")
+        return
+
+    run_test_questions(
+        # Resumed runs default to the files recorded in their log
+        file_path=Path(args.data) if args.data else None,
+        questions_file=Path(args.questions) if args.questions else None,
+        concurrency=args.concurrency,
+        rate_per_minute=args.rate,
+        run_id=run_id,
+        max_attempts=args.max_attempts,
+        retry_policy=args.retry,
+        judge_options={'local_judge': not args.no_local_judge, 'rel_tol': args.rel_tol, 'abs_tol': args.abs_tol},
+        judge_batch_size=args.judge_batch_size,
+        judge_batch_tokens=args.judge_batch_tokens,
+        exports=args.export,
+        export_blobs=args.export_blobs
+    )
 
 if __name__ == "__main__":
-    run_test_questions() 
\ No newline at end of file
+    main()
@@ -0,0 +1,148 @@
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+# Add project root to path first
+project_root = Path(__file__).parent.parent.absolute()
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+MANIFEST = Path(__file__).parent / 'suites.json'
+REQUIRED_KEYS = ('dataset', 'questions')
+
+def load_manifest(manifest_path: Path = MANIFEST) -> dict:
+    """Read the suite manifest, resolving file paths against the project root.
+
+    Each suite maps to a dataset, a questions file and optionally the
+    golden answer column and a ``columns`` map renaming the file's columns
+    to the harness names (Question, Answer, Sl.No., Complexity Level).
+    """
+    suites = json.loads(Path(manifest_path).read_text(encoding='utf-8'))
+    for name, suite in suites.items():
+        missing = [key for key in REQUIRED_KEYS if key not in suite]
+        if missing:
+            raise ValueError(f"Suite '{name}' in {manifest_path} is missing {', '.join(missing)}")
+        for key in REQUIRED_KEYS:
+            suite[key] = str(project_root / suite[key])
+    return suites
+
+def unfinished_run(suite_name: str, runs_dir: Path):
+    """Newest run of a suite that was interrupted before it finished, or None."""
+    candidates = []
+    for meta_path in Path(runs_dir).glob('*.meta.json'):
+        meta = json.loads(meta_path.read_text())
+        if meta.get('suite') == suite_name and not meta.get('finished_at'):
+            candidates.append((meta_path.stat().st_mtime, meta['run_id']))
+    return max(candidates)[1] if candidates else None
+
+def main():
+    parser = argparse.ArgumentParser(description="Run named benchmark suites from the suite manifest.")
+    parser.add_argument('suites', nargs='*', help="Suites to run (default: all in the manifest)")
+    parser.add_argument('--manifest', default=str(MANIFEST), help="Suite manifest JSON")
+    parser.add_argument('--list', action='store_true', help="List the suites and exit")
+    parser.add_argument('--concurrency', type=int, default=4, help="Worker threads per suite")
+    parser.add_argument('--rate', type=float, default=30.0, help="Maximum questions started per minute")
+    parser.add_argument('--max-attempts', type=int, default=3, help="Attempts per question, including retries")
+    parser.add_argument('--retry', choices=['none', 'errors', 'failures'], default='errors')
+    parser.add_argument('--fresh', action='store_true', help="Start new runs instead of resuming interrupted ones")
+    parser.add_argument('--no-local-judge', action='store_true', help="Grade every answer with the LLM")
+    parser.add_argument('--judge-batch-size', type=int, default=20, help="Answers per LLM judge request")
+    # Caching options are read from config at import, so they are set in the environment first
+    parser.add_argument('--upload-format', choices=['csv', 'gzip', 'zip', 'parquet'], help="Code interpreter upload format")
+    parser.add_argument('--frame-cache-mb', type=int, help="DataFrame cache budget")
+    parser.add_argument(
+        '--sql-fast-path', action=argparse.BooleanOptionalAction, default=None,
+        help="Answer simple aggregate questions with SQL, or send every question to the code interpreter "
+             "(default: SQL_FAST_PATH)"
+    )
+    parser.add_argument('--export-dir', help="Also export each suite's run as CSV into this directory")
+    parser.add_argument('--report-format', choices=['markdown', 'html'], default='markdown')
+    args = parser.parse_args()
+
+    suites = load_manifest(Path(args.manifest))
+    if args.list:
+        for name, suite in suites.items():
+            print(f"{name:15} {Path(suite['questions']).name:35} {suite.get('description', '')}")
+        return
+    unknown = [name for name in args.suites if name not in suites]
+    if unknown:
+        parser.error(f"Unknown suites: {', '.join(unknown)}; choose from {', '.join(suites)}")
+    selected = args.suites or list(suites)
+
+    if args.upload_format:
+        os.environ['UPLOAD_FORMAT'] = args.upload_format
+    if args.frame_cache_mb is not None:
+        os.environ['FRAME_CACHE_MB'] = str(args.frame_cache_mb)
+    if args.sql_fast_path is not None:
+        os.environ['SQL_FAST_PATH'] = 'true' if args.sql_fast_path else 'false'
+
+    import pandas as pd
+    from latency_report import find_regressions, load_results, render, summarize
+    from run_log import RUNS_DIR
+    from run_questions import run_test_questions
+    from utils.results_store import get_results_store
+
+    run_ids = {}
+    timings = {}
+    for name in selected:
+        suite = suites[name]
+        run_id = None if args.fresh else unfinished_run(name, RUNS_DIR)
+        print(f"\n=== Suite {name}{f' (resuming {run_id})' if run_id else ''} ===")
+        start = time.time()
+        exports = [Path(args.export_dir) / f"{name}.csv"] if args.export_dir else []
+        run_ids[name] = run_test_questions(
+            file_path=Path(suite['dataset']),
+            questions_file=Path(suite['questions']),
+            concurrency=args.concurrency,
+            rate_per_minute=args.rate,
+            run_id=run_id,
+            max_attempts=args.max_attempts,
+            retry_policy=args.retry,
+            judge_options={'local_judge': not args.no_local_judge},
+            judge_batch_size=args.judge_batch_size,
+            exports=exports,
+            suite=name,
+            column_map=suite.get('columns'),
+            golden_column=suite.get('golden_column')
+        )
+        timings[name] = time.time() - start
+
+    finished = {name: run_id for name, run_id in run_ids.items() if run_id}
+    if not finished:
+        print("No suite ran")
+        return
+    store = get_results_store()
+    all_results = load_results([], store.path)
+    summary = summarize(all_results[all_results['run_id'].isin(finished.values())])
+    summary.insert(0, 'suite', summary['run_id'].map({run_id: name for name, run_id in finished.items()}))
+
+    # Compare each suite with its previous stored run
+    regressions = []
+    for name, run_id in finished.items():
+        # Run ids are <suite>_<timestamp>; matching the whole id keeps 100qs apart from 100qs_part2
+        same_suite = all_results['run_id'].str.fullmatch(rf"{re.escape(name)}_\d{{8}}_\d{{6}}")
+        history = all_results[same_suite & (all_results['run_id'] <= run_id)]
+        if history['run_id'].nunique() > 1:
+            found = find_regressions(summarize(history))
+            regressions.append(found[found['run_id'] == run_id].assign(suite=name))
+    regressions = pd.concat(regressions, ignore_index=True) if regressions else pd.DataFrame()
+
+    overall = summary[summary['level'] == 'All'][['suite', 'run_id', 'questions', 'p50_s', 'p90_s', 'pass_rate', 'error_rate']]
+    overall = overall.assign(wall_minutes=overall['suite'].map(timings) / 60)
+    print("\n=== Suite Summary ===")
+    print(overall.round(3).to_string(index=False))
+
+    extension = '.html' if args.report_format == 'html' else '.md'
+    out = project_root / 'output' / 'reports' / f"suites_{datetime.now().strftime('%Y%m%d_%H%M%S')}{extension}"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(render(summary, regressions, [store.path], args.report_format), encoding='utf-8')
+    print(f"{len(regressions)} regressions against the previous run of each suite")
+    print(f"Report written to {out}")
+
+if __name__ == "__main__":
+    main()
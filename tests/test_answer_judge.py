@@ -0,0 +1,137 @@
+import json
+
+import pytest
+from openai import OpenAI
+
+import utils.answer_judge as answer_judge
+from utils.answer_judge import AMBIGUOUS, FAIL, PASS, judge_answer, judge_answers, judge_with_llm, plan_batches
+from utils.openai_standin import StandIn, SyntheticAPI
+
+@pytest.mark.parametrize('question, expected, actual, verdict', [
+    # The golden number only appears because the answer repeats the question's threshold
+    ('How many SKUs have PRICE above 4?', '4', 'There are 3 SKUs with a PRICE above 4.', FAIL),
+    ('How many SKUs have PRICE above 4?', '3', 'There are 3 SKUs with a PRICE above 4.', PASS),
+    # Integer counts and totals must match exactly
+    ('How many transactions were there?', '3569', '3572 transactions', FAIL),
+    ('What is the total quantity sold?', '239588', '239,400', FAIL),
+    ('What is the total quantity sold?', '239588', 'The total is 239,588 units.', PASS),
+    ('How many transactions were there?', '3569', '3569.0', PASS),
+    # Decimals match within their precision, or when the answer keeps fewer decimals
+    ('What is the average price?', '12.87', 'The average price is 12.8712', PASS),
+    ('What is the average price?', '12.87', 'The average price is 12.91', FAIL),
+    ('What is the average price?', '25.704', '25.7', PASS),
+    ('What share came from burgers?', '20.56%', '0.2056', PASS),
+    # Rounding to a whole number is left to the LLM judge
+    ('What is the average quantity?', '44.3', '44', AMBIGUOUS),
+    ('What is the average quantity?', '13', '12.87', AMBIGUOUS),
+    ('What is the average quantity?', '44.3', '47', FAIL),
+])
+def test_numeric_answers(question, expected, actual, verdict):
+    assert judge_answer(question, expected, actual).verdict == verdict
+
+@pytest.mark.parametrize('expected, actual, verdict', [
+    ('2053_2', 'SKU 2053_2 sold the most.', PASS),
+    ('2053_2', 'SKU 2052_2 sold most, ahead of 2053_2', AMBIGUOUS),
+    ('2053_2', 'SKU 2052_2 sold the most.', AMBIGUOUS),
+    ('Monday', 'Sales peak on Monday.', PASS),
+    ('Monday', 'Sales peak on Tuesday, then Monday.', AMBIGUOUS),
+])
+def test_named_answers(expected, actual, verdict):
+    assert judge_answer('Which SKU sold the most on the busiest day?', expected, actual).verdict == verdict
+
+def test_names_from_the_question_are_not_extra():
+    verdict = judge_answer('Did SKU 1070_2 outsell SKU 2053_2?', '2053_2', '2053_2 outsold 1070_2')
+    assert verdict.verdict == PASS
+
+def test_yes_no_and_empty_answers():
+    assert judge_answer('Is it profitable?', 'Yes', 'Yes, it is.').verdict == PASS
+    assert judge_answer('Is it profitable?', 'Yes', 'No.').verdict == FAIL
+    assert judge_answer('Is it profitable?', 'Yes', None).verdict == FAIL
+
+def test_batch_matches_single_judgements():
+    cases = [
+        ('How many SKUs have PRICE above 4?', '4', 'There are 3 SKUs with a PRICE above 4.'),
+        ('What is the average quantity?', '44.3', '44'),
+        ('What is the average price?', '12.87', '12.8712'),
+    ]
+    batch = judge_answers(*zip(*cases))
+    assert [v.verdict for v in batch] == [judge_answer(*case).verdict for case in cases]
+
+class JudgeAPI(SyntheticAPI):
+    """Synthetic API whose chat completions grade judge items, optionally with broken replies."""
+
+    def __init__(self, batch_reply=None):
+        super().__init__(request_seconds=0, chat_seconds=0)
+        # Turns the correct verdicts of a multi-item request into the reply actually sent
+        self.batch_reply = batch_reply
+        self.batch_sizes = []
+
+    def handle(self, method, path, body):
+        status, response = super().handle(method, path, body)
+        if path.startswith('/chat/completions'):
+            items = json.loads(json.loads(body)['messages'][1]['content'])
+            self.batch_sizes.append(len(items))
+            verdicts = [
+                {'id': item['id'], 'equivalent': item['expected'] == item['actual'], 'reason': 'compared'}
+                for item in items
+            ]
+            reply = {'verdicts': verdicts}
+            if len(items) > 1 and self.batch_reply is not None:
+                reply = self.batch_reply(verdicts)
+            response['choices'][0]['message']['content'] = reply if isinstance(reply, str) else json.dumps(reply)
+        return status, response
+
+@pytest.fixture
+def judge_client():
+    def connect(api):
+        standin = StandIn(mode='synthetic', latency_scale=0, synthetic=api).start()
+        clients.append(standin)
+        return OpenAI(api_key='test', base_url=standin.base_url, max_retries=0)
+
+    clients = []
+    yield connect
+    for standin in clients:
+        standin.stop()
+
+ITEMS = [
+    ('Total sales?', '100', '100'),
+    ('Best SKU?', '2053_2', '2052_2'),
+    ('Busiest day?', 'Monday', 'Monday'),
+]
+
+def test_plan_batches_respects_item_and_token_limits(monkeypatch):
+    monkeypatch.setattr(answer_judge, 'estimate_tokens', len)
+    overhead = answer_judge._ITEM_OVERHEAD_TOKENS
+    small = ('q', 'e', 'a' * (60 - overhead - 2))
+    large = ('q', 'e', 'a' * 500)
+
+    assert plan_batches([small] * 5, max_items=2, max_tokens=10_000) == [[0, 1], [2, 3], [4]]
+    assert plan_batches([small] * 5, max_items=20, max_tokens=150) == [[0, 1], [2, 3], [4]]
+    # An item over the budget on its own still gets a batch
+    assert plan_batches([small, large, small], max_items=20, max_tokens=150) == [[0], [1], [2]]
+    assert plan_batches([], max_items=20, max_tokens=150) == []
+
+def test_batch_is_one_request(judge_client):
+    api = JudgeAPI()
+    verdicts = judge_with_llm(judge_client(api), ITEMS)
+    assert [v.verdict for v in verdicts] == [PASS, FAIL, PASS]
+    assert api.batch_sizes == [3]
+
+@pytest.mark.parametrize('batch_reply', [
+    # Missing, repeated, out-of-range and non-boolean verdicts
+    lambda verdicts: {'verdicts': [verdicts[0], {**verdicts[0], 'equivalent': False},
+                                   {**verdicts[1], 'equivalent': 'no'}, {**verdicts[2], 'id': 7}]},
+    lambda verdicts: 'not json',
+    lambda verdicts: {'answers': verdicts},
+])
+def test_malformed_verdicts_are_retried_singly(judge_client, batch_reply):
+    api = JudgeAPI(batch_reply)
+    verdicts = judge_with_llm(judge_client(api), ITEMS)
+    assert [v.verdict for v in verdicts] == [PASS, FAIL, PASS]
+    assert api.batch_sizes[0] == 3 and set(api.batch_sizes[1:]) == {1}
+
+def test_item_fails_when_the_retry_is_malformed_too(judge_client):
+    # The plain synthetic API answers every structured request with an empty object
+    verdicts = judge_with_llm(judge_client(SyntheticAPI(request_seconds=0, chat_seconds=0)), ITEMS)
+    assert [v.verdict for v in verdicts] == [FAIL] * 3
+    assert all(v.reason == "judge returned no verdict" for v in verdicts)
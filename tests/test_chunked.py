@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import utils.data_loader as data_loader
+from utils.chunked import ChunkedFrame
+from utils.profiler import profile_chunked, profile_dataframe
+
+@pytest.fixture
+def sales_csv(tmp_path, monkeypatch):
+    monkeypatch.setattr(data_loader, 'DTYPE_CACHE_DIR', tmp_path / 'dtype_cache')
+    rng = np.random.default_rng(1)
+    rows = 5000
+    path = tmp_path / 'sales.csv'
+    pd.DataFrame({
+        'year': rng.integers(2012, 2016, rows),
+        'SELL_ID': rng.choice([1070, 2051, 2052, 2053], rows),
+        'ITEM_NAME': rng.choice(['BURGER', 'COKE', 'LEMONADE'], rows),
+        'PRICE': np.round(rng.uniform(10, 16.5, rows), 2),
+        'QUANTITY': rng.integers(8, 125, rows).astype(float),
+    }).assign(QUANTITY=lambda df: df['QUANTITY'].mask(df.index % 97 == 0)).to_csv(path, index=False)
+    return str(path)
+
+def test_streamed_groupby_matches_pandas(sales_csv):
+    spec = {'PRICE': ['count', 'sum', 'mean', 'min', 'max', 'var', 'std'], 'QUANTITY': ['count', 'mean', 'std']}
+    streamed = ChunkedFrame(sales_csv, chunksize=700).filter("PRICE > 11").groupby(['year', 'SELL_ID']).agg(spec)
+    df = pd.read_csv(sales_csv)
+    expected = df[df['PRICE'] > 11].groupby(['year', 'SELL_ID']).agg(spec)
+    pd.testing.assert_frame_equal(streamed, expected, check_dtype=False, rtol=1e-10)
+
+def test_streamed_profile_matches_loaded_profile(sales_csv):
+    loaded = profile_dataframe(data_loader.load_csv(sales_csv))
+    streamed = profile_chunked(ChunkedFrame(sales_csv, chunksize=700))
+    assert streamed['rows'] == loaded['rows']
+    assert streamed['sample'] == loaded['sample']
+    for name, info in loaded['columns'].items():
+        # The compact in-memory dtypes are reported as the pd.read_csv ones
+        assert streamed['columns'][name]['dtype'] == info['dtype']
+        assert streamed['columns'][name]['null_count'] == info['null_count']
+        assert streamed['columns'][name]['distinct'] == info['distinct']
+        for stat in ('min', 'max', 'mean', 'std'):
+            assert streamed['columns'][name].get(stat) == pytest.approx(info.get(stat))
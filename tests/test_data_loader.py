@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import utils.data_loader as data_loader
+from utils.data_loader import infer_dtype_plan, load_csv
+
+@pytest.fixture
+def sales_csv(tmp_path, monkeypatch):
+    monkeypatch.setattr(data_loader, 'DTYPE_CACHE_DIR', tmp_path / 'dtype_cache')
+    monkeypatch.setattr(data_loader, '_dtype_plans', {})
+    rng = np.random.default_rng(0)
+    rows = 400
+    sell_ids = rng.choice([1070, 2051, 2052, 2053], rows)
+    path = tmp_path / 'sales.csv'
+    pd.DataFrame({
+        'SELL_ID': sell_ids,
+        'SELL_CATEGORY': rng.choice([0, 2], rows),
+        'QUANTITY': rng.integers(8, 125, rows),
+        'PRICE': np.round(rng.uniform(10, 16.5, rows), 2),
+        'ITEM_NAME': rng.choice(['BURGER', 'COKE', 'LEMONADE'], rows),
+        'NOTE': [f"order {i}" for i in range(rows)],
+    }).to_csv(path, index=False)
+    return str(path)
+
+def test_plan_keeps_integer_keys_numeric(sales_csv):
+    plan = infer_dtype_plan(pd.read_csv(sales_csv))
+    assert plan['SELL_ID'] == 'int16'
+    assert plan['SELL_CATEGORY'] == 'int8'
+    assert plan['QUANTITY'] == 'int8'
+    assert plan['PRICE'] == 'float64'
+    assert plan['ITEM_NAME'] == 'category'
+    assert plan['NOTE'] == 'str'
+
+def test_compact_load_answers_like_read_csv(sales_csv):
+    plain = pd.read_csv(sales_csv)
+    compact = load_csv(sales_csv)
+    assert compact['ITEM_NAME'].dtype == 'category'
+    # Numeric filters, sums and sorts on key columns behave as on the plain frame
+    assert (compact['SELL_ID'] > 2051).sum() == (plain['SELL_ID'] > 2051).sum()
+    assert compact['SELL_CATEGORY'].sum() == plain['SELL_CATEGORY'].sum()
+    assert compact.groupby('SELL_ID')['QUANTITY'].sum().to_dict() == plain.groupby('SELL_ID')['QUANTITY'].sum().to_dict()
+    assert compact.sort_values('SELL_ID', kind='stable').index.tolist() == plain.sort_values('SELL_ID', kind='stable').index.tolist()
+
+def test_plan_is_cached_by_content(sales_csv):
+    first = load_csv(sales_csv)
+    assert data_loader.get_dtype_plan(sales_csv) == infer_dtype_plan(pd.read_csv(sales_csv))
+    assert list(data_loader.DTYPE_CACHE_DIR.glob(f"*.v{data_loader.DTYPE_PLAN_VERSION}.json"))
+    pd.testing.assert_frame_equal(load_csv(sales_csv), first)
+
+def test_sidecar_matches_csv_and_goes_stale(sales_csv):
+    pytest.importorskip('pyarrow')
+    expected = load_csv(sales_csv, use_sidecar=False)
+    assert data_loader.write_sidecar(sales_csv).exists()
+    pd.testing.assert_frame_equal(load_csv(sales_csv), expected)
+
+    # Changed content makes the sidecar stale, so the CSV is parsed again
+    with open(sales_csv, 'a') as f:
+        f.write("9999,0,10,11.0,COKE,extra\n")
+    assert len(load_csv(sales_csv)) == len(expected) + 1
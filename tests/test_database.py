@@ -0,0 +1,191 @@
+import sqlite3
+import threading
+
+import pandas as pd
+import pytest
+
+from utils.database import ConnectionPool, DatabaseManager, is_read_only_sql
+
+@pytest.fixture
+def db(tmp_path):
+    db = DatabaseManager(str(tmp_path / 'analysis.db'), cache_results=False)
+    yield db
+    db.close()
+
+def test_reader_connections_of_exited_threads_are_closed(tmp_path):
+    pool = ConnectionPool(str(tmp_path / 'pool.db'))
+    opened = []
+
+    def read():
+        with pool.reader() as conn:
+            conn.execute("SELECT 1")
+            opened.append(conn)
+
+    for _ in range(5):
+        worker = threading.Thread(target=read)
+        worker.start()
+        worker.join()
+    assert pool.stats()['read']['open'] == 1
+    for conn in opened[:-1]:
+        with pytest.raises(sqlite3.ProgrammingError):
+            conn.execute("SELECT 1")
+    pool.close()
+
+def test_create_table_from_df_round_trips_values(db):
+    df = pd.DataFrame({
+        'id': pd.array([1, None, 3], dtype='Int64'),
+        'amount': [1.5, None, 2.0],
+        'name': ['a', None, 'c'],
+        'day': pd.to_datetime(['2024-01-01', None, '2024-01-03']),
+    })
+    db.create_table_from_df(df, 'sales')
+    result = db.execute_query("SELECT * FROM sales ORDER BY rowid")
+    assert result['id'].tolist()[0] == 1 and pd.isna(result['id'].tolist()[1])
+    assert result['name'].tolist()[::2] == ['a', 'c']
+    assert result['day'].tolist()[0].startswith('2024-01-01')
+
+    db.create_table_from_df(df.head(1), 'sales', if_exists='append')
+    assert db.execute_query("SELECT COUNT(*) AS n FROM sales")['n'].iloc[0] == 4
+    with pytest.raises(ValueError):
+        db.create_table_from_df(df, 'sales', if_exists='fail')
+
+def test_failed_create_table_from_df_rolls_back(db):
+    db.create_table_from_df(pd.DataFrame({'x': [1, 2]}), 'items')
+    version = db.table_versions()['items']
+
+    class Unbindable:
+        pass
+
+    with pytest.raises(Exception):
+        db.create_table_from_df(pd.DataFrame({'x': [3, Unbindable()]}), 'items')
+    assert db.execute_query("SELECT x FROM items")['x'].tolist() == [1, 2]
+    assert db.table_versions()['items'] == version
+
+def test_index_tuning_runs_outside_execute_query(db, monkeypatch):
+    db.create_table_from_df(pd.DataFrame({'region': ['n', 's'] * 500, 'amount': range(1000)}), 'sales')
+    db.index_advisor.tune_every = 2
+    started = threading.Event()
+    release = threading.Event()
+    tune = db.tune_indexes
+
+    def slow_tune():
+        started.set()
+        release.wait(5)
+        return tune()
+
+    monkeypatch.setattr(db, 'tune_indexes', slow_tune)
+    for region in ('n', 's'):
+        db.execute_query(f"SELECT SUM(amount) FROM sales WHERE region = '{region}'")
+    # Both queries returned while tuning is still blocked
+    assert started.wait(5)
+    release.set()
+    db._tuning.join()
+    assert 'auto_idx_sales_region' in db.index_report()
+
+def observe_region_queries(db):
+    db.index_advisor.tune_every = 0
+    for region in ('n', 's'):
+        db.execute_query(f"SELECT SUM(amount) FROM sales WHERE region = '{region}'")
+
+def test_fresh_process_keeps_existing_advisor_indexes(tmp_path):
+    path = str(tmp_path / 'analysis.db')
+    first = DatabaseManager(path, cache_results=False)
+    first.create_table_from_df(pd.DataFrame({'region': ['n', 's'] * 50, 'amount': range(100)}), 'sales')
+    observe_region_queries(first)
+    assert 'auto_idx_sales_region' in first.tune_indexes()
+    first.close()
+
+    # A new process has observed nothing; tuning (as after any ingest) must not drop the index
+    second = DatabaseManager(path, cache_results=False)
+    csv_path = tmp_path / 'other.csv'
+    pd.DataFrame({'x': [1, 2]}).to_csv(csv_path, index=False)
+    second.ingest_csv(str(csv_path), 'other')
+    second.tune_indexes()
+    with second.reader() as conn:
+        indexes = [row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")]
+    assert 'auto_idx_sales_region' in indexes
+    second.close()
+
+def test_tuning_times_queries_without_holding_the_writer(db, monkeypatch):
+    db.create_table_from_df(pd.DataFrame({'region': ['n', 's'] * 50, 'amount': range(100)}), 'sales')
+    observe_region_queries(db)
+    time_queries = db.index_advisor._time_queries
+    writer_free = []
+
+    def timed(conn, queries):
+        acquired = db.pool._write_lock.acquire(blocking=False)
+        writer_free.append(acquired)
+        if acquired:
+            db.pool._write_lock.release()
+        return time_queries(conn, queries)
+
+    monkeypatch.setattr(db.index_advisor, '_time_queries', timed)
+    db.tune_indexes()
+    assert writer_free == [True, True]
+
+@pytest.mark.parametrize('sql', [
+    "SELECT SUM(PRICE) FROM sales",
+    "select count(*) from sales;",
+    "WITH t AS (SELECT * FROM sales) SELECT AVG(PRICE) FROM t",
+    "SELECT REPLACE(ITEM_NAME, 'COKE', 'COLA') FROM sales",
+    "SELECT * FROM sales WHERE ITEM_NAME = 'drop; delete'",
+    "SELECT * FROM sales WHERE note = 'it''s; drop table sales'",
+    "SELECT 1 -- ; delete from sales",
+    "SELECT /* update */ 1",
+    "SELECT created_at, updated_by FROM sales",
+])
+def test_read_only_sql_is_accepted(sql):
+    assert is_read_only_sql(sql)
+
+@pytest.mark.parametrize('sql', [
+    "",
+    ";",
+    "DELETE FROM sales",
+    "UPDATE sales SET PRICE = 0",
+    "INSERT INTO sales VALUES (1)",
+    "REPLACE INTO sales VALUES (1)",
+    "DROP TABLE sales",
+    "CREATE TABLE t AS SELECT * FROM sales",
+    "PRAGMA table_info(sales)",
+    "ATTACH DATABASE 'other.db' AS other",
+    "WITH t AS (SELECT 1) DELETE FROM sales",
+    "WITH t AS (SELECT 1) INSERT OR REPLACE INTO sales SELECT * FROM t",
+    "SELECT 1; DROP TABLE sales",
+    "SELECT 1; SELECT 2",
+    "SELECT 'a'; DELETE FROM sales WHERE x = ';'",
+    "SELECT 1 /* ' */; DELETE FROM sales --'",
+    "SELECT 'unterminated",
+    "SELECT 1 /* unterminated",
+])
+def test_writes_and_stacked_statements_are_rejected(sql):
+    assert not is_read_only_sql(sql)
+
+def test_ingest_csv_honours_if_exists(db, tmp_path):
+    csv_path = tmp_path / 'sales.csv'
+    pd.DataFrame({'PRICE': [1.5, 2.5]}).to_csv(csv_path, index=False)
+    db.ingest_csv(str(csv_path), 'sales')
+
+    with pytest.raises(ValueError):
+        db.ingest_csv(str(csv_path), 'sales', if_exists='fail')
+    with pytest.raises(ValueError):
+        db.ingest_csv(str(csv_path), 'sales', if_exists='upsert')
+    assert db.execute_query("SELECT COUNT(*) AS n FROM sales")['n'][0] == 2
+
+    db.ingest_csv(str(csv_path), 'sales', if_exists='append')
+    assert db.execute_query("SELECT COUNT(*) AS n FROM sales")['n'][0] == 4
+    db.ingest_csv(str(csv_path), 'sales', if_exists='replace')
+    assert db.execute_query("SELECT COUNT(*) AS n FROM sales")['n'][0] == 2
+    db.ingest_csv(str(csv_path), 'fresh', if_exists='fail')
+    assert db.execute_query("SELECT COUNT(*) AS n FROM fresh")['n'][0] == 2
+
+def test_schema_lists_tables_with_quotes_in_their_names(db):
+    db.create_table_from_df(pd.DataFrame({'PRICE': [1.5]}), 'q3 "final" sales')
+    assert 'Table: q3 "final" sales\n  - PRICE (REAL)' in db.get_schema()
+
+def test_create_connection_is_a_separate_writable_connection(db):
+    conn = db.create_connection()
+    try:
+        conn.execute("CREATE TABLE scratch (x INTEGER)")
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+    finally:
+        conn.close()
@@ -0,0 +1,64 @@
+import threading
+
+import pandas as pd
+import pytest
+
+from utils.database import DatabaseManager
+from utils.dataset_registry import DATASETS_TABLE, DatasetRegistry
+
+@pytest.fixture
+def registry(tmp_path):
+    registry = DatasetRegistry(DatabaseManager(str(tmp_path / 'analysis.db'), cache_results=False))
+    yield registry
+    registry.db.close()
+
+def write_csv(path, values):
+    pd.DataFrame({'x': values}).to_csv(path, index=False)
+    return str(path)
+
+def test_identical_content_maps_to_one_table(registry, tmp_path):
+    first = registry.ensure_table(write_csv(tmp_path / 'sales.csv', [1, 2]))
+    (tmp_path / 'copy').mkdir()
+    copy = registry.ensure_table(write_csv(tmp_path / 'copy' / 'Sales.csv', [1, 2]))
+    assert copy.table_name == first.table_name == 'sales_v1'
+
+    changed = registry.ensure_table(write_csv(tmp_path / 'sales.csv', [1, 2, 3]))
+    assert (changed.version, changed.table_name) == (2, 'sales_v2')
+    assert registry.db.execute_query("SELECT COUNT(*) AS n FROM sales_v2")['n'].iloc[0] == 3
+
+def test_ingest_garbage_collects_idle_superseded_versions(registry, tmp_path):
+    registry.ensure_table(write_csv(tmp_path / 'sales.csv', [1]))
+    registry.ensure_table(write_csv(tmp_path / 'sales.csv', [1, 2]))
+    with registry.db.writer() as conn:
+        conn.execute(f"UPDATE {DATASETS_TABLE} SET last_used_at = 0")
+
+    registry.ensure_table(write_csv(tmp_path / 'sales.csv', [1, 2, 3]))
+    assert [v.table_name for v in registry.versions('sales')] == ['sales_v3']
+    assert 'sales_v1' not in registry.db.table_versions()
+    assert 'sales_v2' not in registry.db.table_versions()
+
+def test_different_datasets_ingest_concurrently(registry, tmp_path, monkeypatch):
+    paths = [write_csv(tmp_path / f"{name}.csv", [i]) for i, name in enumerate(('a', 'b'))]
+    both_ingesting = threading.Barrier(2, timeout=5)
+    ingest_csv = registry.db.ingest_csv
+
+    def ingest(path, table_name, **kwargs):
+        both_ingesting.wait()
+        return ingest_csv(path, table_name, **kwargs)
+
+    monkeypatch.setattr(registry.db, 'ingest_csv', ingest)
+    errors = []
+
+    def ensure(path):
+        try:
+            registry.ensure_table(path)
+        except Exception as e:
+            errors.append(e)
+
+    workers = [threading.Thread(target=ensure, args=(path,)) for path in paths]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    assert errors == []
+    assert {'a_v1', 'b_v1'} <= set(registry.db.table_versions())
@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import utils.chunked as chunked
+import utils.frame_cache as frame_cache
+from utils.frame_cache import FrameCache, load_dataset
+
+@pytest.fixture
+def csv_path(tmp_path):
+    path = tmp_path / 'sales.csv'
+    pd.DataFrame({
+        'region': ['n', 's'], 'amount': [1.0, 2.0], 'units': [3, 4], 'day': ['2024-01-01', '2024-01-02'],
+    }).to_csv(path, index=False)
+    return str(path)
+
+def try_edit(edit):
+    try:
+        edit()
+    except ValueError:
+        # Read-only arrays on pandas without copy-on-write
+        pass
+
+def test_callers_share_the_cached_data(csv_path):
+    cache = FrameCache()
+    first, second = cache.get(csv_path), cache.get(csv_path)
+    assert first is not second
+    for column in ('amount', 'units'):
+        assert np.shares_memory(first[column].to_numpy(), second[column].to_numpy())
+
+def test_callers_cannot_change_the_cached_frame(csv_path):
+    cache = FrameCache()
+    first = cache.get(csv_path)
+
+    def edit():
+        first.loc[0, 'amount'] = 100.0
+
+    def add_to_column():
+        first['units'] += 1
+
+    try_edit(edit)
+    try_edit(add_to_column)
+    first['extra'] = 1
+    second = cache.get(csv_path)
+    assert second['amount'].tolist() == [1.0, 2.0]
+    assert second['units'].tolist() == [3, 4]
+    assert 'extra' not in second.columns
+
+    subset = cache.get(csv_path, columns=['amount'])
+    try_edit(lambda: subset.iloc.__setitem__((1, 0), -1.0))
+    assert cache.get(csv_path)['amount'].tolist() == [1.0, 2.0]
+    assert cache.stats()['misses'] == 1
+
+def test_large_files_are_streamed_not_loaded(csv_path, monkeypatch):
+    monkeypatch.setattr(frame_cache, 'OUT_OF_CORE_SAMPLE_ROWS', 1)
+    monkeypatch.setattr(frame_cache, 'get_frame_cache', lambda: FrameCache())
+    df, dataset = load_dataset(csv_path)
+    assert len(df) == 2 and dataset is None
+
+    monkeypatch.setattr(chunked, 'OUT_OF_CORE_THRESHOLD_MB', 0)
+    monkeypatch.setattr(frame_cache, 'get_frame_cache', lambda: pytest.fail("loaded a file above the threshold"))
+    df, dataset = load_dataset(csv_path, columns=['region', 'amount'])
+    assert df.to_dict('list') == {'region': ['n'], 'amount': [1.0]}
+    assert dataset.agg({'amount': 'sum'})[('amount', 'sum')].tolist() == [3.0]
@@ -0,0 +1,71 @@
+import pandas as pd
+import pytest
+
+from latency_report import find_regressions, summarize
+
+def run(run_id, durations, level='Easy', passed=True, errored=0.0, judge_seconds=None):
+    return pd.DataFrame({
+        'run_id': run_id, 'Complexity Level': level, 'duration_seconds': durations,
+        'passed': passed, 'errored': errored,
+        'stage_judge_seconds': judge_seconds if judge_seconds is not None else [None] * len(durations),
+    })
+
+def row(summary, run_id, level):
+    return summary[(summary['run_id'] == run_id) & (summary['level'] == level)].iloc[0]
+
+def test_percentiles_and_rates_per_level_and_overall():
+    results = pd.concat([
+        run('r1', [float(s) for s in range(1, 11)], judge_seconds=[0.1] * 9 + [1.0]),
+        run('r1', [20.0, 40.0], level='Hard', passed=[True, False], errored=[0.0, 1.0]),
+    ], ignore_index=True)
+    summary = summarize(results)
+
+    easy = row(summary, 'r1', 'Easy')
+    assert easy['questions'] == 10
+    # Linear interpolation between the closest ranks, as pandas quantile does
+    assert (easy['p50_s'], easy['p90_s'], easy['p99_s']) == pytest.approx((5.5, 9.1, 9.91))
+    assert easy['mean_s'] == pytest.approx(5.5)
+    assert (easy['judge_p50_s'], easy['judge_p90_s']) == pytest.approx((0.1, 0.19))
+
+    hard = row(summary, 'r1', 'Hard')
+    assert (hard['pass_rate'], hard['error_rate']) == (0.5, 0.5)
+
+    overall = row(summary, 'r1', 'All')
+    assert overall['questions'] == 12
+    assert overall['pass_rate'] == pytest.approx(11 / 12)
+    assert overall['p50_s'] == pytest.approx(6.5)
+
+def test_regressions_against_the_previous_run():
+    summary = summarize(pd.concat([
+        run('r1', [10.0] * 10),
+        run('r2', [11.0] * 10),                               # +10% latency: within the threshold
+        run('r3', [15.0] * 10, passed=[True] * 9 + [False]),  # +36% latency, pass rate -10 points
+        run('r3', [5.0], level='Hard'),                      # no earlier run at this level
+    ], ignore_index=True))
+
+    regressions = find_regressions(summary, latency_threshold=0.2, rate_threshold=0.05)
+    assert set(regressions['run_id']) == {'r3'}
+    assert set(regressions['baseline']) == {'r2'}
+    assert sorted(zip(regressions['level'], regressions['metric'])) == [
+        ('All', 'p50_s'), ('All', 'p90_s'), ('All', 'pass_rate'),
+        ('Easy', 'p50_s'), ('Easy', 'p90_s'), ('Easy', 'pass_rate'),
+    ]
+    easy_pass = regressions[(regressions['level'] == 'Easy') & (regressions['metric'] == 'pass_rate')].iloc[0]
+    assert (easy_pass['before'], easy_pass['after']) == pytest.approx((1.0, 0.9))
+
+def test_regressions_against_a_fixed_baseline():
+    summary = summarize(pd.concat([
+        run('r1', [10.0] * 4),
+        run('r2', [11.5] * 4, errored=[0.0, 0.0, 0.0, 1.0]),
+        run('r3', [12.5] * 4),
+    ], ignore_index=True))
+
+    regressions = find_regressions(summary, baseline='r1', latency_threshold=0.2, rate_threshold=0.05)
+    by_run = regressions[regressions['level'] == 'All'].groupby('run_id')['metric'].apply(sorted).to_dict()
+    assert by_run == {'r2': ['error_rate'], 'r3': ['p50_s', 'p90_s']}
+    assert set(regressions['baseline']) == {'r1'}
+
+def test_no_regressions_for_a_single_run():
+    regressions = find_regressions(summarize(run('r1', [1.0, 2.0])))
+    assert regressions.empty
+    assert list(regressions.columns) == ['run_id', 'baseline', 'level', 'metric', 'before', 'after']
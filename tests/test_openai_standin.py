@@ -0,0 +1,79 @@
+import base64
+import json
+
+import pytest
+from openai import NotFoundError, OpenAI
+
+from utils.openai_standin import Cassette, Interaction, StandIn, SyntheticAPI, request_key
+
+API_KEY = 'sk-test-secret'
+
+def client_for(standin):
+    return OpenAI(api_key=API_KEY, base_url=standin.base_url, max_retries=0)
+
+def ask(client, question):
+    response = client.chat.completions.create(
+        model='gpt-4o-mini', messages=[{'role': 'user', 'content': question}]
+    )
+    return response.id
+
+@pytest.fixture
+def upstream():
+    with StandIn(mode='synthetic', latency_scale=0, synthetic=SyntheticAPI()) as standin:
+        yield standin
+
+@pytest.fixture
+def cassette(tmp_path, upstream):
+    """A cassette recorded from the synthetic API: two answers to one question, one to another."""
+    path = tmp_path / 'session.jsonl.gz'
+    with StandIn(path, mode='record', upstream=upstream.base_url) as recorder:
+        client = client_for(recorder)
+        recorded = [ask(client, 'total sales?'), ask(client, 'total sales?'), ask(client, 'best sku?')]
+        file_id = client.files.create(file=('sales.csv', b'a,b\n1,2\n'), purpose='assistants').id
+    return path, recorded, file_id
+
+def test_replay_serves_recordings_in_order(cassette):
+    path, recorded, file_id = cassette
+    with StandIn(path, mode='replay', latency_scale=0) as standin:
+        client = client_for(standin)
+        assert [ask(client, 'total sales?'), ask(client, 'total sales?'), ask(client, 'best sku?')] == recorded
+        # Once a request's recordings are used up the last one is served again
+        assert ask(client, 'total sales?') == recorded[1]
+        # A new multipart boundary does not change the match
+        assert client.files.create(file=('sales.csv', b'a,b\n1,2\n'), purpose='assistants').id == file_id
+        assert standin.misses == 0
+
+def test_unseen_body_falls_back_to_the_same_path(cassette):
+    path, recorded, _ = cassette
+    with StandIn(path, mode='replay', latency_scale=0) as standin:
+        assert ask(client_for(standin), 'something new?') in recorded
+        assert standin.misses == 0
+
+def test_unrecorded_path_is_a_miss(cassette):
+    path, _, _ = cassette
+    with StandIn(path, mode='replay', latency_scale=0) as standin:
+        with pytest.raises(NotFoundError):
+            client_for(standin).embeddings.create(model='text-embedding-3-small', input='sales')
+        assert standin.misses == 1
+        assert standin.requests == 1
+
+def test_recording_never_stores_the_api_key(cassette):
+    path, _, _ = cassette
+    interactions = Cassette(path).load().interactions
+    assert len(interactions) == 4
+    assert all(API_KEY not in json.dumps(vars(interaction)) for interaction in interactions)
+
+def test_request_key_ignores_json_key_order_and_multipart_boundary():
+    assert request_key('POST', '/chat/completions', 'application/json', b'{"a": 1, "b": 2}') == \
+        request_key('POST', '/chat/completions', 'application/json', b'{"b":2,"a":1}')
+    body = b'--%s\r\nContent-Disposition: form-data; name="file"\r\n\r\ndata\r\n--%s--'
+    assert request_key('POST', '/files', 'multipart/form-data; boundary=abc', body % (b'abc', b'abc')) == \
+        request_key('POST', '/files', 'multipart/form-data; boundary=xyz', body % (b'xyz', b'xyz'))
+
+def test_binary_bodies_round_trip(tmp_path):
+    cassette = Cassette(tmp_path / 'binary.jsonl.gz')
+    content = bytes(range(256))
+    cassette.append(Interaction('GET', '/files/f/content', 'key', 200, 'application/octet-stream',
+                                base64.b64encode(content).decode(), 0.0, binary=True))
+    replayed = Cassette(cassette.path).load().match('GET', '/files/f/content', 'key')
+    assert replayed.response_bytes() == content
@@ -0,0 +1,80 @@
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+import utils.data_loader as data_loader
+import utils.profiler as profiler
+from utils.openai_standin import StandIn, SyntheticAPI
+from utils.profiler import format_profile, get_file_profile, profile_dataframe
+
+@pytest.fixture
+def sales_csv(tmp_path, monkeypatch):
+    monkeypatch.setattr(data_loader, 'DTYPE_CACHE_DIR', tmp_path / 'dtype_cache')
+    monkeypatch.setattr(profiler, '_profiles', {})
+    path = tmp_path / 'sales.csv'
+    pd.DataFrame({
+        'SELL_ID': [1070, 2051, 2051, 2052],
+        'ITEM_NAME': ['BURGER', 'COKE', 'COKE', None],
+        'PRICE': [15.5, 12.73, 12.75, 13.0],
+    }).to_csv(path, index=False)
+    return str(path)
+
+def test_format_profile(sales_csv):
+    df = pd.read_csv(sales_csv)
+    profile = profile_dataframe(df, sample_rows=2)
+    # Text columns read as object before pandas 3 and as str since
+    assert format_profile(profile).splitlines() == [
+        "Rows: 4, columns: 3",
+        "Columns:",
+        "  - SELL_ID: int64; nulls=0; distinct=3; min=1070 max=2052 mean=1806.0 std=490.6669",
+        f"  - ITEM_NAME: {df['ITEM_NAME'].dtype}; nulls=1; distinct=2; top=COKE (2), BURGER (1)",
+        "  - PRICE: float64; nulls=0; distinct=4; min=12.73 max=15.5 mean=13.495 std=1.3423",
+        "Sample rows:",
+        "  SELL_ID | ITEM_NAME | PRICE",
+        "  1070 | BURGER | 15.5",
+        "  2051 | COKE | 12.73",
+    ]
+
+def test_file_profile_is_computed_once_per_content(sales_csv, tmp_path, monkeypatch):
+    calls = []
+    monkeypatch.setattr(profiler, 'profile_dataframe', lambda df: calls.append(df) or profile_dataframe(df))
+    copy = tmp_path / 'copy.csv'
+    copy.write_bytes(open(sales_csv, 'rb').read())
+
+    profile = get_file_profile(sales_csv)
+    assert profile.startswith("Rows: 4, columns: 3")
+    assert get_file_profile(str(copy)) == profile
+    assert len(calls) == 1
+
+def test_unreadable_file_has_no_profile(tmp_path):
+    assert get_file_profile(str(tmp_path / 'missing.csv')) is None
+
+class SessionState(dict):
+    """The attribute access of st.session_state over a plain dict."""
+
+    __getattr__ = dict.__getitem__
+    __setattr__ = dict.__setitem__
+
+def test_initialization_with_a_profile_starts_no_run(sales_csv, monkeypatch):
+    monkeypatch.setenv('OPENAI_API_KEY', 'standin')
+    python_agent = pytest.importorskip('agents.python_agent')
+    from openai import OpenAI
+
+    api = SyntheticAPI(request_seconds=0)
+    with StandIn(mode='synthetic', latency_scale=0, synthetic=api) as standin:
+        client = OpenAI(api_key='standin', base_url=standin.base_url, max_retries=0)
+        monkeypatch.setattr(python_agent, 'client', client)
+        monkeypatch.setattr(python_agent, 'st', SimpleNamespace(session_state=SessionState()))
+        with open(sales_csv, 'rb') as file:
+            file_id = client.files.create(file=('sales.csv', file), purpose='assistants').id
+        profile = get_file_profile(sales_csv)
+
+        result = python_agent.analyze_data("Initialize data analysis", file_id=file_id, dataset_profile=profile)
+
+        assert result['status'] == 'success'
+        assert result['response']['final_answer'] == "Data loaded. Rows: 4, columns: 3."
+        assert not api._runs
+        messages = client.beta.threads.messages.list(thread_id=result['thread_id']).data
+        assert len(messages) == 1
+        assert profile in messages[0].content[0].text.value
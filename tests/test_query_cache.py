@@ -0,0 +1,75 @@
+import pandas as pd
+import pytest
+
+from utils.database import DatabaseManager, QueryLimitError
+from utils.query_cache import QueryCache, normalize_sql
+
+@pytest.fixture
+def db(tmp_path):
+    db = DatabaseManager(
+        str(tmp_path / 'analysis.db'), cache_spill_dir=str(tmp_path / 'spill'), materialize_rollups=False
+    )
+    yield db
+    db.close()
+
+def test_normalize_sql_keeps_string_literals():
+    assert normalize_sql("SELECT  *\nFROM t WHERE name = 'A  b';") == normalize_sql("select * from T where NAME = 'A  b'")
+    assert "'A  b'" in normalize_sql("SELECT 'A  b'")
+
+def test_key_changes_with_table_versions():
+    assert QueryCache.make_key("SELECT 1", {'t': 1}) != QueryCache.make_key("SELECT 1", {'t': 2})
+    assert QueryCache.make_key("select 1", {'t': 1}) == QueryCache.make_key("SELECT  1", {'t': 1})
+
+def test_invalidate_deletes_spilled_results(tmp_path):
+    cache = QueryCache(spill_dir=str(tmp_path), spill_threshold=0)
+    df = pd.DataFrame({'x': range(10)})
+    cache.put('sales-key', df, ('sales',))
+    cache.put('other-key', df, ('other',))
+    pd.testing.assert_frame_equal(cache.get('sales-key'), df)
+
+    cache.invalidate('sales')
+    assert cache.get('sales-key') is None
+    assert not (tmp_path / 'sales-key.parquet').exists()
+    assert (tmp_path / 'other-key.parquet').exists()
+
+def test_writes_invalidate_cached_results(db):
+    db.create_table_from_df(pd.DataFrame({'x': [1, 2]}), 'items')
+    assert db.execute_query("SELECT SUM(x) AS s FROM items")['s'].iloc[0] == 3
+    assert db.execute_query("SELECT SUM(x) AS s FROM items")['s'].iloc[0] == 3
+    assert db.cache_stats()['hits'] == 1
+
+    db.create_table_from_df(pd.DataFrame({'x': [5]}), 'items', if_exists='append')
+    assert db.execute_query("SELECT SUM(x) AS s FROM items")['s'].iloc[0] == 8
+
+def test_versions_never_go_back_after_drop(db):
+    db.create_table_from_df(pd.DataFrame({'x': [1]}), 'items')
+    db.create_table_from_df(pd.DataFrame({'x': [2]}), 'items')
+    assert db.table_versions()['items'] == 2
+    assert db.execute_query("SELECT x FROM items")['x'].iloc[0] == 2
+
+    db.drop_table('items')
+    assert 'items' not in db.table_versions()
+
+    db.create_table_from_df(pd.DataFrame({'x': [3]}), 'items')
+    assert db.table_versions()['items'] == 4
+    assert db.execute_query("SELECT x FROM items")['x'].iloc[0] == 3
+
+def test_row_limit_applies_to_cached_results(db):
+    db.create_table_from_df(pd.DataFrame({'x': range(1000)}), 'items')
+    assert len(db.execute_query("SELECT * FROM items")) == 1000
+    with pytest.raises(QueryLimitError):
+        db.execute_query("SELECT * FROM items", max_rows=10)
+    with pytest.raises(QueryLimitError):
+        db.execute_query("SELECT * FROM items", max_rows=10)
+    assert len(db.execute_query("SELECT * FROM items", max_rows=1000)) == 1000
+    assert db.cache_stats()['hits'] >= 2
+
+def test_row_limit_applies_to_cached_columnar_results(tmp_path):
+    pytest.importorskip('duckdb')
+    from utils.columnar_database import ColumnarDatabaseManager
+
+    db = ColumnarDatabaseManager(str(tmp_path / 'parquet'))
+    db.create_table_from_df(pd.DataFrame({'x': range(1000)}), 'items')
+    assert len(db.execute_query("SELECT * FROM items")) == 1000
+    with pytest.raises(QueryLimitError):
+        db.execute_query("SELECT * FROM items", max_rows=10)
@@ -0,0 +1,63 @@
+import pandas as pd
+import pytest
+
+from utils.results_store import XLSX_CELL_LIMIT, ResultsStore
+
+@pytest.fixture
+def store(tmp_path):
+    return ResultsStore(tmp_path / 'results.db')
+
+def results_frame():
+    return pd.DataFrame({
+        'Question': ['Total sales?', 'Best region?'],
+        'Complexity Level': ['Easy', 'Hard'],
+        'Expected Answer': ['10', 'North'],
+        'ai_answer': ['10', 'South'],
+        'status': ['success', 'success'],
+        'test_status': [True, False],
+        'duration_seconds': [1.5, 12.0],
+        'debug_output': ['x' * 10000, None],
+    })
+
+def test_write_query_and_blobs_round_trip(store):
+    store.write_run('run1', results_frame(), ['q1', 'q2'], ['Question', 'Complexity Level', 'Expected Answer'])
+
+    passed = store.query(run_id='run1', passed=True)
+    assert passed['question_id'].tolist() == ['q1']
+    assert store.query(min_duration=5)['question_id'].tolist() == ['q2']
+    assert store.query(question='region')['question_id'].tolist() == ['q2']
+    assert store.blobs('run1', 'q1') == {'debug_output': 'x' * 10000}
+    assert store.blobs('run1', 'q2') == {}
+
+    runs = store.runs()
+    assert runs[['questions', 'passed', 'errors', 'blob_bytes']].iloc[0].tolist() == [2, 1, 0, 10000]
+
+def test_rewriting_a_run_replaces_it(store):
+    columns = ['Question', 'Complexity Level', 'Expected Answer']
+    store.write_run('run1', results_frame(), ['q1', 'q2'], columns)
+    store.write_run('run1', results_frame().head(1), ['q1'], columns)
+    assert store.query(run_id='run1')['question_id'].tolist() == ['q1']
+    assert store.blobs('run1', 'q1')
+
+def test_run_frame_keeps_the_question_file_layout(store):
+    store.write_run('run1', results_frame(), ['q1', 'q2'], ['Question', 'Complexity Level', 'Expected Answer'])
+    frame = store.run_frame('run1', include_blobs=True)
+    assert frame.columns[:3].tolist() == ['Question', 'Complexity Level', 'Expected Answer']
+    assert frame['ai_answer'].tolist() == ['10', 'South']
+    assert frame['debug_output'].iloc[0] == 'x' * 10000
+    with pytest.raises(KeyError):
+        store.run_frame('missing')
+
+def test_xlsx_export_truncates_long_text_cells(store, tmp_path, monkeypatch):
+    frame = results_frame()
+    frame['debug_output'] = ['y' * (XLSX_CELL_LIMIT + 10), 'short']
+    store.write_run('run1', frame, ['q1', 'q2'], ['Question', 'Complexity Level', 'Expected Answer'])
+
+    written = {}
+    monkeypatch.setattr(pd.DataFrame, 'to_excel', lambda self, path, **kwargs: written.update(frame=self))
+    store.export('run1', tmp_path / 'run1.xlsx', include_blobs=True)
+    assert written['frame']['debug_output'].str.len().tolist() == [XLSX_CELL_LIMIT, 5]
+
+    # CSV keeps full cells
+    exported = pd.read_csv(store.export('run1', tmp_path / 'run1.csv', include_blobs=True), encoding='utf-8-sig')
+    assert len(exported['debug_output'].iloc[0]) == XLSX_CELL_LIMIT + 10
@@ -0,0 +1,54 @@
+import pandas as pd
+import pytest
+
+from utils.database import DatabaseManager
+from utils.rollups import describe_rollups
+
+@pytest.fixture
+def db(tmp_path):
+    db = DatabaseManager(str(tmp_path / 'analysis.db'), cache_results=False, auto_index=False)
+    yield db
+    db.close()
+
+def sales(days, region, store, amount):
+    return pd.DataFrame({
+        'year': 2024, 'month': 1, 'day': days, 'region': region, 'store': store, 'amount': amount,
+    })
+
+def monthly_totals(db, table):
+    return db.execute_query(
+        f"SELECT region, SUM(amount) AS total, COUNT(*) AS n FROM {table} GROUP BY region ORDER BY region"
+    )
+
+def test_rollups_match_base_table_after_append(db):
+    db.create_table_from_df(sales([1, 2, 2, 3], ['n', 's', 'n', 's'], 7, [1.5, 2, 3, 4]), 'sales')
+    db.create_table_from_df(sales([3, 4], ['n', 's'], 7, [10, 20.25]), 'sales', if_exists='append')
+
+    rollup = db.execute_query(
+        "SELECT region, SUM(sum_amount) AS total, SUM(row_count) AS n FROM sales__monthly_by_region "
+        "GROUP BY region ORDER BY region"
+    )
+    pd.testing.assert_frame_equal(rollup, monthly_totals(db, 'sales'))
+
+def test_append_that_changes_the_spec_rebuilds(db):
+    # One store: 'store' is a measure. Two stores: it becomes a dimension.
+    db.create_table_from_df(sales([1, 2], ['n', 's'], 7, [1.0, 2.0]), 'sales')
+    assert 'sales__daily_by_store' not in {r['rollup_table'] for r in db.get_rollups('sales')}
+
+    db.create_table_from_df(sales([3], ['n'], 8, [5.0]), 'sales', if_exists='append')
+    rollups = {r['rollup_table']: r for r in db.get_rollups('sales')}
+    assert 'sales__daily_by_store' in rollups
+    assert rollups['sales__daily']['measures'] == ['amount']
+    daily = db.execute_query("SELECT SUM(sum_amount) AS total, SUM(row_count) AS n FROM sales__daily")
+    assert daily.iloc[0].tolist() == [8.0, 3]
+
+def test_rollups_stay_out_of_the_schema(db):
+    db.create_table_from_df(sales([1, 2], ['n', 's'], 7, [1.0, 2.0]), 'sales')
+    rollups = db.get_rollups('sales')
+    assert rollups
+    assert '__' not in db.get_schema()
+    assert '__' not in db.describe_schema()
+
+    listing = describe_rollups(rollups)
+    assert 'sales__monthly_by_region: monthly, region' in listing
+    assert 'measures: store, amount' in listing
@@ -0,0 +1,84 @@
+import os
+import threading
+
+import pandas as pd
+
+from run_log import RunLog, is_finished, latest_run_id, merge_run, needs_retry
+from utils.results_store import ResultsStore
+from run_suites import unfinished_run
+
+def success(question_id, attempt=1, passed=True, judged_by='local'):
+    return {'question_id': question_id, 'attempt': attempt, 'status': 'success',
+            'test_status': passed, 'judged_by': judged_by}
+
+def error(question_id, attempt=1):
+    return {'question_id': question_id, 'attempt': attempt, 'status': 'error', 'test_status': False}
+
+def test_log_survives_a_line_cut_off_by_a_crash(tmp_path):
+    log = RunLog('run1', tmp_path)
+    log.append(success('1'))
+    log.append(error('2'))
+    with open(log.path, 'a', encoding='utf-8') as f:
+        f.write('{"question_id": "3", "sta')
+
+    reopened = RunLog('run1', tmp_path)
+    assert [r['question_id'] for r in reopened.records()] == ['1', '2']
+    assert reopened.latest()['2']['status'] == 'error'
+    assert all(r['run_id'] == 'run1' for r in reopened.records())
+
+def test_latest_attempt_wins_and_rejudged_copies_do_not_count(tmp_path):
+    log = RunLog('run1', tmp_path)
+    log.append(error('1', attempt=1))
+    log.append(success('1', attempt=2, passed=False, judged_by='pending'))
+    # The batch judge appends a graded copy of the same attempt
+    log.append(success('1', attempt=2, passed=True))
+    assert log.latest()['1']['test_status'] is True
+    assert log.attempts() == {'1': 2}
+
+def test_retry_policies():
+    assert needs_retry(error('1'), 'errors')
+    assert not needs_retry(error('1'), 'none')
+    assert not needs_retry(success('1', passed=False), 'errors')
+    assert needs_retry(success('1', passed=False), 'failures')
+    assert not needs_retry(success('1', passed=False, judged_by='pending'), 'failures')
+
+def test_resume_skips_finished_questions(tmp_path):
+    log = RunLog('run1', tmp_path)
+    log.append(success('1'))
+    log.append(error('2'))
+    log.append(error('3', attempt=1))
+    log.append(error('3', attempt=2))
+    latest, attempts = log.latest(), log.attempts()
+
+    to_run = [q for q in ['1', '2', '3', '4'] if not is_finished(latest.get(q), attempts.get(q, 0), 'errors', 2)]
+    assert to_run == ['2', '4']
+
+def test_latest_and_unfinished_runs(tmp_path):
+    older, newer = RunLog('suite_a', tmp_path), RunLog('suite_b', tmp_path)
+    older.write_meta({'run_id': 'suite_a', 'suite': 'a'})
+    newer.write_meta({'run_id': 'suite_b', 'suite': 'a', 'finished_at': '2026-01-01T00:00:00'})
+    os.utime(older.meta_path, (1, 1))
+    assert latest_run_id(tmp_path) == 'suite_b'
+    assert unfinished_run('a', tmp_path) == 'suite_a'
+    assert unfinished_run('b', tmp_path) is None
+    assert RunLog('suite_a', tmp_path).read_meta()['suite'] == 'a'
+
+def test_results_are_merged_in_question_order(tmp_path):
+    questions = pd.DataFrame({'No': [3, 1, 2, 5, 4], 'Question': [f"q{i}" for i in range(5)]})
+    log = RunLog('run1', tmp_path)
+    # Workers finish in any order; question 5 never ran
+    finished = ['2', '4', '3', '1']
+    threads = [
+        threading.Thread(target=log.append, args=({**success(question_id), 'ai_answer': f"a{question_id}"},))
+        for question_id in finished
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    store = ResultsStore(tmp_path / 'results.db')
+    merged = merge_run(log, questions, store=store)
+    assert list(merged['ai_answer']) == ['a3', 'a1', 'a2', '', 'a4']
+    assert list(merged['status']) == ['success'] * 3 + ['not run', 'success']
+    assert list(store.run_frame('run1')['Question']) == list(questions['Question'])
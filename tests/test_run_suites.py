@@ -0,0 +1,50 @@
+import json
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from run_log import find_golden_answer_column, load_questions, prepare_questions, question_ids
+from run_suites import MANIFEST, load_manifest, project_root
+
+SHIPPED_SUITES = load_manifest()
+
+def test_manifest_paths_resolve_against_the_project_root(tmp_path):
+    manifest = tmp_path / 'suites.json'
+    manifest.write_text(json.dumps({'mini': {'dataset': 'uploads/mock_data.csv', 'questions': 'uploads/o3.csv'}}))
+    suite = load_manifest(manifest)['mini']
+    assert suite['dataset'] == str(project_root / 'uploads' / 'mock_data.csv')
+    assert suite['questions'] == str(project_root / 'uploads' / 'o3.csv')
+
+def test_manifest_entry_without_questions_is_rejected(tmp_path):
+    manifest = tmp_path / 'suites.json'
+    manifest.write_text(json.dumps({'mini': {'dataset': 'uploads/mock_data.csv'}}))
+    with pytest.raises(ValueError, match="'mini'.*questions"):
+        load_manifest(manifest)
+
+def test_column_map_renames_to_harness_names_and_drops_blank_questions():
+    questions = pd.DataFrame({
+        'No': [1.0, 2.0, None, 3.0],
+        'Question': ['Total sales?', 'Best SKU?', ' ', 'Busiest day?'],
+        'Answer': ['100', '2053_2', None, 'Monday'],
+        'Complexity': ['Easy', 'Hard', None, 'Easy'],
+    })
+    prepared = prepare_questions(questions, {'No': 'Sl.No.', 'Complexity': 'Complexity Level'})
+    assert list(prepared.columns) == ['Sl.No.', 'Question', 'Answer', 'Complexity Level']
+    assert list(prepared.index) == [0, 1, 2]
+    # Numbering read as float because of the blank row still gives integer ids
+    assert question_ids(prepared) == ['1', '2', '3']
+
+@pytest.mark.parametrize('name', sorted(SHIPPED_SUITES))
+def test_shipped_suites_resolve(name):
+    suite = SHIPPED_SUITES[name]
+    assert Path(suite['dataset']).exists(), f"{suite['dataset']} is missing"
+    questions = load_questions(Path(suite['questions']))
+    assert set(suite.get('columns', {})) <= set(questions.columns)
+
+    prepared = prepare_questions(questions, suite.get('columns'))
+    assert {'Question', 'Complexity Level'} <= set(prepared.columns)
+    assert suite.get('golden_column', find_golden_answer_column(prepared)) in prepared.columns
+    ids = question_ids(prepared)
+    assert len(set(ids)) == len(prepared)
+    assert 'Sl.No.' in prepared.columns, f"{MANIFEST.name}: suite '{name}' does not map its numbering to Sl.No."
@@ -0,0 +1,61 @@
+import threading
+
+from token_bucket import TokenBucket
+
+class FakeClock:
+    """Monotonic clock that only moves when someone sleeps."""
+
+    def __init__(self):
+        self.now = 0.0
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        with self._lock:
+            return self.now
+
+    def sleep(self, seconds):
+        with self._lock:
+            self.now += seconds
+
+def test_burst_up_to_capacity_then_paced_at_rate():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2.0, capacity=3, clock=clock, sleep=clock.sleep)
+
+    assert [bucket.acquire() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.acquire() == 0.5
+    assert bucket.acquire() == 0.5
+    assert clock.now == 1.0
+
+def test_idle_time_refills_no_more_than_capacity():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=1.0, capacity=2, clock=clock, sleep=clock.sleep)
+    bucket.acquire()
+    bucket.acquire()
+
+    clock.sleep(60)
+    assert [bucket.acquire() for _ in range(2)] == [0.0, 0.0]
+    assert bucket.acquire() == 1.0
+
+def test_concurrent_workers_never_exceed_the_rate():
+    clock = FakeClock()
+    rate, capacity, workers, per_worker = 10.0, 4, 8, 5
+    bucket = TokenBucket(rate=rate, capacity=capacity, clock=clock, sleep=clock.sleep)
+    granted = []
+    lock = threading.Lock()
+
+    def worker():
+        for _ in range(per_worker):
+            bucket.acquire()
+            with lock:
+                granted.append(clock())
+
+    threads = [threading.Thread(target=worker) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(granted) == workers * per_worker
+    # However the threads interleave, by time t at most capacity + rate * t tokens were handed out
+    for count, granted_at in enumerate(sorted(granted), start=1):
+        assert count <= capacity + rate * granted_at + 1e-9
@@ -0,0 +1,133 @@
+import os
+from types import SimpleNamespace
+
+import httpx
+import pandas as pd
+import pytest
+from openai import NotFoundError
+
+import utils.upload_prep as upload_prep
+from utils.database import DatabaseManager
+from utils.dataset_registry import DatasetRegistry
+
+class FakeClient:
+    """Just enough of the OpenAI client for upload_dataset."""
+
+    def __init__(self, base_url: str):
+        self.base_url = base_url
+        self.uploaded = {}
+        self.created = 0
+        self.files = SimpleNamespace(create=self._create, retrieve=self._retrieve)
+
+    def _create(self, file, purpose):
+        self.created += 1
+        file_id = f"file-{self.created}"
+        self.uploaded[file_id] = file[1].read()
+        return SimpleNamespace(id=file_id)
+
+    def _retrieve(self, file_id):
+        if file_id not in self.uploaded:
+            response = httpx.Response(404, request=httpx.Request('GET', f"{self.base_url}/files/{file_id}"))
+            raise NotFoundError(f"No such file: {file_id}", response=response, body=None)
+        return SimpleNamespace(id=file_id)
+
+@pytest.fixture
+def registry(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    registry = DatasetRegistry(DatabaseManager(str(tmp_path / 'analysis.db'), cache_results=False))
+    monkeypatch.setattr(upload_prep, 'get_dataset_registry', lambda: registry)
+    yield registry
+    registry.db.close()
+
+@pytest.fixture
+def sales_csv(tmp_path):
+    path = tmp_path / 'sales.csv'
+    pd.DataFrame({
+        'SELL_ID': [1070, 2051, 2052] * 20,
+        'ITEM_NAME': ['BURGER', 'COKE', 'LEMONADE'] * 20,
+        'PRICE': [15.5, 12.73, 12.75] * 20,
+    }).to_csv(path, index=False)
+    return str(path)
+
+def test_upload_is_reused_per_api(registry, sales_csv):
+    api = FakeClient("https://api.openai.com/v1/")
+    standin = FakeClient("http://127.0.0.1:8765/v1")
+
+    file_id = upload_prep.upload_dataset(api, sales_csv, upload_format='csv')
+    assert upload_prep.upload_dataset(api, sales_csv, upload_format='csv') == file_id
+    assert len(api.uploaded) == 1
+
+    # An id from the stand-in is never handed to the real API, or the other way round
+    upload_prep.upload_dataset(standin, sales_csv, upload_format='csv')
+    assert len(standin.uploaded) == 1
+    assert upload_prep.upload_dataset(api, sales_csv, upload_format='csv') == file_id
+    assert {row['base_url'] for row in registry.upload_savings()} == {
+        "https://api.openai.com/v1", "http://127.0.0.1:8765/v1"
+    }
+
+def test_missing_file_is_uploaded_again(registry, sales_csv):
+    client = FakeClient("https://api.openai.com/v1")
+    file_id = upload_prep.upload_dataset(client, sales_csv, upload_format='csv')
+    del client.uploaded[file_id]
+
+    new_id = upload_prep.upload_dataset(client, sales_csv, upload_format='csv')
+    assert new_id != file_id
+    assert [row['openai_file_id'] for row in registry.upload_savings()] == [new_id]
+
+def test_default_upload_is_the_raw_csv(registry, sales_csv):
+    prepared = upload_prep.prepare_upload(sales_csv)
+    assert prepared.upload_format == 'csv'
+    assert str(prepared.path) == sales_csv
+
+@pytest.mark.parametrize('upload_format, read_kwargs', [
+    ('gzip', {'compression': 'gzip'}),
+    ('zip', {'compression': 'zip'}),
+])
+def test_compressed_uploads_round_trip(registry, sales_csv, upload_format, read_kwargs):
+    prepared = upload_prep.prepare_upload(sales_csv, upload_format, drop_columns=['ITEM_NAME'])
+    assert prepared.variant == f"{upload_format}-drop:ITEM_NAME"
+    expected = pd.read_csv(sales_csv).drop(columns=['ITEM_NAME'])
+    pd.testing.assert_frame_equal(pd.read_csv(prepared.path, **read_kwargs), expected)
+
+def test_parquet_upload_keeps_read_csv_dtypes(registry, sales_csv):
+    pytest.importorskip('pyarrow')
+    from utils.data_loader import load_csv
+
+    # A compact local load must not leak categoricals or downcast integers into the upload
+    load_csv(sales_csv)
+    prepared = upload_prep.prepare_upload(sales_csv, 'parquet')
+    assert prepared.upload_format == 'parquet'
+    uploaded = pd.read_parquet(prepared.path)
+    expected = pd.read_csv(sales_csv)
+    assert dict(uploaded.dtypes.astype(str)) == dict(expected.dtypes.astype(str))
+    pd.testing.assert_frame_equal(uploaded, expected)
+
+def test_unknown_format_is_rejected(sales_csv):
+    with pytest.raises(ValueError):
+        upload_prep.resolve_upload_format(sales_csv, 'xlsx')
+
+@pytest.mark.parametrize('upload_format', ['gzip', 'parquet'])
+def test_unknown_drop_columns_are_ignored(registry, sales_csv, upload_format):
+    if upload_format == 'parquet':
+        pytest.importorskip('pyarrow')
+    prepared = upload_prep.prepare_upload(sales_csv, upload_format, drop_columns=['ITEM_NAME', 'NOTES'])
+    assert prepared.dropped_columns == ['ITEM_NAME']
+    assert prepared.variant == f"{upload_format}-drop:ITEM_NAME"
+    assert 'NOTES' not in prepared.instructions
+    reader = pd.read_parquet if upload_format == 'parquet' else pd.read_csv
+    assert list(reader(prepared.path).columns) == ['SELL_ID', 'PRICE']
+
+def test_only_unknown_drop_columns_upload_the_raw_csv(registry, sales_csv):
+    prepared = upload_prep.prepare_upload(sales_csv, drop_columns=['NOTES'])
+    assert str(prepared.path) == sales_csv
+    assert prepared.variant == 'csv'
+
+def test_upload_cache_is_pruned_oldest_first(registry, sales_csv):
+    old = upload_prep.prepare_upload(sales_csv, 'gzip').path
+    new = upload_prep.prepare_upload(sales_csv, 'zip').path
+    os.utime(old, (1, 1))
+
+    assert upload_prep.prune_upload_cache(max_bytes=new.stat().st_size) == [old]
+    assert new.exists() and not old.exists()
+    # The file just prepared survives even when it alone is over budget
+    assert upload_prep.prune_upload_cache(max_bytes=0, keep=new) == []
@@ -0,0 +1,37 @@
+import threading
+import time
+from typing import Callable
+
+class TokenBucket:
+    """Token-bucket rate limiter shared by all workers.
+
+    Allows bursts of up to ``capacity`` requests and ``rate`` requests per
+    second on average, instead of sleeping a fixed time after every question.
+    ``clock`` and ``sleep`` default to the real ones.
+    """
+
+    def __init__(self, rate: float, capacity: float, clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """Block until ``tokens`` are available and return the seconds waited."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                # Refills are floats; a rounding error short of a token is not worth a sleep
+                if self._tokens >= tokens - 1e-9:
+                    self._tokens -= tokens
+                    return waited
+                wait = (tokens - self._tokens) / self.rate
+            self._sleep(wait)
+            waited += wait
@@ -13,8 +13,12 @@ if str(project_root) not in sys.path:
 
 from agents import run_analysis
 from utils.setup import setup_project, debug
-from config import MODEL_NAME, DEBUG_MODE
+from config import MODEL_NAME, DEBUG_MODE, UPLOAD_FORMAT
 from utils.vector_store import initialize_vector_store
+from utils.data_loader import write_sidecar
+from utils.dataset_registry import get_dataset_registry
+from utils.frame_cache import get_frame_cache
+from utils.upload_prep import UPLOAD_FORMATS
 
 # Initialize
 setup_project()
@@ -28,6 +32,12 @@ def save_uploaded_file(uploaded_file) -> str:
         file_path = Path("uploads") / uploaded_file.name
         with open(file_path, "wb") as f:
             f.write(uploaded_file.getvalue())
+
+        # Convert once so later loads memory-map the data instead of re-parsing it
+        try:
+            write_sidecar(str(file_path))
+        except Exception as e:
+            debug(f"Could not write Arrow sidecar: {e}")
         return str(file_path)
     except Exception as e:
         st.error(f"Error saving file: {e}")
@@ -117,6 +127,20 @@ def main():
             debug_enabled = st.sidebar.checkbox("Enable Debug Mode", value=st.session_state.debug_mode)
             st.session_state.debug_mode = debug_enabled
             
+            # Upload preprocessing applied before the file is sent to the code interpreter
+            st.session_state.upload_format = st.sidebar.selectbox(
+                "Upload Format",
+                UPLOAD_FORMATS,
+                index=UPLOAD_FORMATS.index(st.session_state.get('upload_format', UPLOAD_FORMAT)),
+                help="Compressed and Parquet uploads are smaller and faster for the assistant to load."
+            )
+            excluded = st.sidebar.text_input(
+                "Columns to Exclude",
+                value=", ".join(st.session_state.get('drop_columns', [])),
+                help="Comma-separated columns that are irrelevant to the analysis and should not be uploaded."
+            )
+            st.session_state.drop_columns = [col.strip() for col in excluded.split(",") if col.strip()]
+
             # New Analysis button
             if st.sidebar.button("New Analysis", key="new_analysis"):
                 # Clear session state
@@ -169,7 +193,9 @@ def main():
                                     file_path=file_path, 
                                     debug_mode=st.session_state.debug_mode,
                                     initialize=True,
-                                    user_prompt=st.session_state.user_prompt
+                                    user_prompt=st.session_state.user_prompt,
+                                    upload_format=st.session_state.upload_format,
+                                    drop_columns=st.session_state.drop_columns
                                 )
                                 
                                 if result.get("status") == "success":
@@ -267,7 +293,9 @@ def main():
                             initialize=False,
                             thread_id=st.session_state.thread_id,
                             file_id=st.session_state.file_id,
-                            user_prompt=st.session_state.user_prompt
+                            user_prompt=st.session_state.user_prompt,
+                            upload_format=st.session_state.upload_format,
+                            drop_columns=st.session_state.drop_columns
                         )
                         
                         if result and result.get("status") == "success":
@@ -370,6 +398,27 @@ def main():
                         with st.expander("Full Analysis Log", expanded=True):
                             st.text_area("Debug Log", value=result['debug_output'], height=400, label_visibility="collapsed")
             
+            # Show DataFrames shared across sessions in this process
+            cache_stats = get_frame_cache().stats()
+            st.markdown("### DataFrame Cache")
+            col1, col2, col3 = st.columns(3)
+            col1.metric("Resident", f"{cache_stats['bytes'] / 1e6:.1f} / {cache_stats['max_bytes'] / 1e6:.0f} MB")
+            col2.metric("Hit Rate", f"{cache_stats['hit_rate']:.0%}")
+            col3.metric("Evictions", cache_stats['evictions'])
+            residency = get_frame_cache().residency()
+            if residency:
+                st.dataframe(pd.DataFrame(residency), hide_index=True)
+
+            # Show what preprocessing saved on the current file's upload
+            if st.session_state.get('current_file_path'):
+                registry = get_dataset_registry()
+                savings = registry.upload_savings(registry.content_hash(st.session_state.current_file_path))
+                if savings:
+                    st.markdown("### Upload")
+                    st.dataframe(pd.DataFrame(savings)[
+                        ['variant', 'original_bytes', 'upload_bytes', 'saved_ratio', 'prepare_seconds', 'upload_seconds']
+                    ], hide_index=True)
+
             if (not hasattr(st.session_state, 'init_result') or not st.session_state.init_result) and \
                (not hasattr(st.session_state, 'current_result') or not st.session_state.current_result):
                 st.info("No debug output available yet. Run an analysis to see debug information.")
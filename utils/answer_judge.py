@@ -0,0 +1,364 @@
+import functools
+import json
+import math
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+import pandas as pd
+from utils.logger import get_logger
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+logger = get_logger(__name__)
+
+# Numbers with optional sign, thousands separators, decimals and a trailing percent sign
+NUMBER_RE = r"(?P<number>(?<![\w.])-?(?:\d{1,3}(?:,\d{3})+|\d+)(?:\.\d+)?(?![\w])(?:\s?%)?)"
+# Identifiers such as SKUs (1075_2), codes with letters and digits (Q3, SKU1070) and capitalized names
+ENTITY_RE = re.compile(r"\b(?:(?P<id>\d+_\d+)|(?P<code>[A-Za-z]+\d+\w*|\d+[A-Za-z]\w*)|(?P<name>[A-Z][a-z]{2,}))\b")
+YES_NO_RE = re.compile(r"^\W*(yes|no)\b", re.IGNORECASE)
+# Capitalized words that start sentences rather than naming anything
+_STOPWORDS = {
+    'The', 'There', 'This', 'That', 'These', 'Those', 'Approximately', 'About', 'Total', 'Average',
+    'For', 'In', 'Of', 'On', 'And', 'Answer', 'Based', 'Yes', 'No', 'It', 'Its', 'All', 'Each',
+}
+
+PASS, FAIL, AMBIGUOUS = 'pass', 'fail', 'ambiguous'
+
+JUDGE_MODEL = "gpt-4o-mini"
+JUDGE_INSTRUCTIONS = """You grade answers to data analysis questions.
+For each item, decide whether the actual answer is semantically equivalent to the expected answer:
+the same values, names and conclusions, allowing different wording, formatting and reasonable rounding.
+Return one verdict per item with its id, equivalent true/false and a reason of at most 15 words."""
+# Per-item overhead in the batch prompt and its verdict (ids, JSON punctuation, the reason)
+_ITEM_OVERHEAD_TOKENS = 40
+
+# Judge item: (question, expected answer, actual answer)
+JudgeItem = Tuple[str, str, str]
+
+@dataclass
+class Verdict:
+    """Outcome of judging one answer locally."""
+    verdict: str
+    reason: str
+
+    @property
+    def decided(self) -> bool:
+        return self.verdict != AMBIGUOUS
+
+def _parse_numbers(texts: pd.Series) -> List[List[tuple]]:
+    """Extract (value, is_percent, decimals) for every number in each text, in one vectorized pass."""
+    matches = texts.fillna('').astype(str).str.extractall(NUMBER_RE)['number']
+    parsed: List[List[tuple]] = [[] for _ in range(len(texts))]
+    if matches.empty:
+        return parsed
+    raw = matches.str.replace(',', '', regex=False).str.rstrip('% ')
+    values = pd.to_numeric(raw, errors='coerce')
+    is_percent = matches.str.endswith('%')
+    decimals = raw.str.extract(r"\.(\d+)$")[0].str.len().fillna(0).astype(int)
+    positions = {label: i for i, label in enumerate(texts.index)}
+    for (label, _), value, percent, places in zip(matches.index, values, is_percent, decimals):
+        if pd.notna(value):
+            parsed[positions[label]].append((float(value), bool(percent), int(places)))
+    return parsed
+
+def _entities(text: str, skip_sentence_starts: bool = False) -> Dict[str, str]:
+    """Names and identifiers in a text, lowercased, mapped to their kind (id, code or name).
+
+    With ``skip_sentence_starts`` capitalized words opening a sentence are
+    not taken as names.
+    """
+    text = text or ''
+    found = {}
+    for match in ENTITY_RE.finditer(text):
+        if match.group() in _STOPWORDS:
+            continue
+        if skip_sentence_starts and match.lastgroup == 'name' and re.search(r"(?:^|[.!?:]\s+)$", text[:match.start()]):
+            continue
+        found.setdefault(match.group().lower(), match.lastgroup)
+    return found
+
+def _forms(expected: tuple, actual: tuple) -> List[tuple]:
+    """The expected number as (value, decimals) in its own unit and, if they differ, the actual answer's."""
+    value, percent, places = expected
+    _, actual_percent, _ = actual
+    # Express the expected number in the actual answer's unit too, e.g. 0.2056 for 20.56%
+    forms = [(value, places)]
+    if actual_percent and not percent:
+        forms.append((value * 100, max(places - 2, 0)))
+    elif percent and not actual_percent:
+        forms.append((value / 100, places + 2))
+    return forms
+
+def numbers_match(expected: tuple, actual: tuple, rel_tol: float, abs_tol: float) -> bool:
+    """Compare two parsed numbers, allowing rounding and percent/fraction forms.
+
+    Integers (counts, totals, ids) must match exactly. Decimals match within
+    half a unit of their last decimal place, so a more precise answer
+    agrees, or within ``max(abs_tol, rel_tol * |expected|)``; an answer that
+    rounds them to fewer (but some) decimals matches too.
+    """
+    actual_value, _, actual_places = actual
+    for form, form_places in _forms(expected, actual):
+        if form_places == 0:
+            if actual_value == form:
+                return True
+            continue
+        # The answer is more precise than the golden one, e.g. 12.8712 for 12.87
+        if abs(actual_value - form) <= max(abs_tol, rel_tol * abs(form), 0.5 * 10 ** -form_places + 1e-12):
+            return True
+        # The answer rounds the golden one to fewer decimals, e.g. 25.7 for 25.704
+        if 0 < actual_places < form_places and math.isclose(round(form, actual_places), actual_value, abs_tol=1e-12):
+            return True
+    return False
+
+def rounds_to_integer(expected: tuple, actual: tuple) -> bool:
+    """Whether one number is the other rounded to a whole number, e.g. 44 for 44.3 or 12.87 for 13."""
+    actual_value, _, actual_places = actual
+    return any(
+        (form_places == 0) != (actual_places == 0) and abs(actual_value - form) <= 0.5
+        for form, form_places in _forms(expected, actual)
+    )
+
+def judge_pair(
+    question: str,
+    expected: str,
+    actual: str,
+    expected_numbers: List[tuple],
+    actual_numbers: List[tuple],
+    question_numbers: List[tuple],
+    rel_tol: float,
+    abs_tol: float
+) -> Verdict:
+    """Decide one answer from pre-parsed numbers, or mark it ambiguous for the LLM judge."""
+    if not actual or not str(actual).strip() or str(actual) == 'nan':
+        return Verdict(FAIL, "empty answer")
+
+    expected_yes_no = YES_NO_RE.match(expected)
+    if expected_yes_no and not expected_numbers:
+        actual_yes_no = YES_NO_RE.match(actual)
+        if actual_yes_no:
+            same = actual_yes_no.group(1).lower() == expected_yes_no.group(1).lower()
+            return Verdict(PASS if same else FAIL, f"answered {actual_yes_no.group(1).lower()}")
+        return Verdict(AMBIGUOUS, "yes/no answer not stated directly")
+
+    if expected_numbers:
+        # Numbers repeated from the question (years, thresholds) are not the answer
+        answer_numbers = [
+            a for a in actual_numbers
+            if not any(numbers_match(q, a, 0.0, 0.0) for q in question_numbers)
+        ]
+        matched = [any(numbers_match(e, a, rel_tol, abs_tol) for a in answer_numbers) for e in expected_numbers]
+        if all(matched):
+            return Verdict(PASS, f"all {len(expected_numbers)} expected numbers found")
+        if len(expected_numbers) > 1:
+            return Verdict(AMBIGUOUS, f"{sum(matched)}/{len(expected_numbers)} expected numbers found")
+        if any(rounds_to_integer(expected_numbers[0], a) for a in answer_numbers):
+            return Verdict(AMBIGUOUS, "answer and expected number differ only by rounding to a whole number")
+        if answer_numbers:
+            return Verdict(FAIL, f"expected {expected_numbers[0][0]:g}, found {answer_numbers[0][0]:g}")
+        return Verdict(AMBIGUOUS, "no number in the answer besides ones from the question")
+
+    expected_entities = _entities(expected)
+    if expected_entities:
+        actual_entities = _entities(actual)
+        missing = set(expected_entities) - set(actual_entities) - set(str(actual).lower().split())
+        if missing:
+            return Verdict(AMBIGUOUS, f"missing {', '.join(sorted(missing))}")
+        # Other names of the same kind may be the real answer, e.g. a different SKU ranked first
+        kinds = set(expected_entities.values())
+        extra = {
+            token for token, kind in _entities(actual, skip_sentence_starts=True).items()
+            if kind in kinds and token not in expected_entities and token not in _entities(question)
+        }
+        if extra:
+            return Verdict(AMBIGUOUS, f"also names {', '.join(sorted(extra))}")
+        return Verdict(PASS, f"all {len(expected_entities)} expected names found")
+    return Verdict(AMBIGUOUS, "no numbers or names to compare")
+
+def judge_answers(
+    questions: Sequence[str],
+    expected: Sequence[str],
+    actual: Sequence[str],
+    rel_tol: float = 0.0,
+    abs_tol: float = 1e-9
+) -> List[Verdict]:
+    """Judge many answers locally.
+
+    Numbers (including percentages and thousands separators) are parsed from
+    all questions and answers at once, and numbers copied from the question
+    are ignored. An answer passes when every expected number appears (see
+    numbers_match) and fails when it states a different number; one that
+    only rounds the expected number to a whole number is left to the LLM.
+    Names and identifiers in non-numeric golden answers must all appear,
+    with no other names of the same kind. Anything else is AMBIGUOUS and
+    goes to the LLM judge.
+    """
+    questions = pd.Series(list(questions), dtype=object)
+    expected = pd.Series(list(expected), dtype=object)
+    actual = pd.Series(list(actual), dtype=object)
+    question_numbers = _parse_numbers(questions)
+    expected_numbers = _parse_numbers(expected)
+    actual_numbers = _parse_numbers(actual)
+    return [
+        judge_pair(
+            str(q), str(e), '' if a is None or (isinstance(a, float) and pd.isna(a)) else str(a),
+            en, an, qn, rel_tol, abs_tol
+        )
+        for q, e, a, en, an, qn in zip(questions, expected, actual, expected_numbers, actual_numbers, question_numbers)
+    ]
+
+def judge_answer(
+    question: str,
+    expected: str,
+    actual: Optional[str],
+    rel_tol: float = 0.0,
+    abs_tol: float = 1e-9
+) -> Verdict:
+    """Judge a single answer locally; see judge_answers."""
+    return judge_answers([question], [expected], [actual], rel_tol, abs_tol)[0]
+
+@functools.lru_cache(maxsize=1)
+def _encoding():
+    """The tokenizer of the judge model, or None without tiktoken or its (downloaded) encoding file."""
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.get_encoding("o200k_base")
+    except Exception as e:
+        logger.warning(f"Could not load the tiktoken encoding, estimating tokens from length: {str(e)}")
+        return None
+
+def estimate_tokens(text: str) -> int:
+    """Token count of a text, exact with tiktoken and roughly 4 characters per token without it."""
+    encoding = _encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+    return len(text) // 4 + 1
+
+def plan_batches(items: Sequence[JudgeItem], max_items: int = 20, max_tokens: int = 6000) -> List[List[int]]:
+    """Split item indices into batches of at most ``max_items`` items and about ``max_tokens`` prompt tokens.
+
+    An item larger than the budget on its own still gets a batch of one.
+    """
+    batches, current, current_tokens = [], [], 0
+    for index, item in enumerate(items):
+        tokens = estimate_tokens(''.join(item)) + _ITEM_OVERHEAD_TOKENS
+        if current and (len(current) >= max_items or current_tokens + tokens > max_tokens):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(index)
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+def _verdict_schema() -> dict:
+    return {
+        'type': 'json_schema',
+        'json_schema': {
+            'name': 'answer_verdicts',
+            'strict': True,
+            'schema': {
+                'type': 'object',
+                'properties': {
+                    'verdicts': {
+                        'type': 'array',
+                        'items': {
+                            'type': 'object',
+                            'properties': {
+                                'id': {'type': 'integer'},
+                                'equivalent': {'type': 'boolean'},
+                                'reason': {'type': 'string'},
+                            },
+                            'required': ['id', 'equivalent', 'reason'],
+                            'additionalProperties': False,
+                        },
+                    },
+                },
+                'required': ['verdicts'],
+                'additionalProperties': False,
+            },
+        },
+    }
+
+def _request_verdicts(client, items: Sequence[JudgeItem], model: str) -> dict:
+    """Ask for verdicts on a batch of items and return the well-formed ones by item position."""
+    payload = [
+        {'id': i, 'question': question, 'expected': expected, 'actual': actual}
+        for i, (question, expected, actual) in enumerate(items)
+    ]
+    response = client.chat.completions.create(
+        model=model,
+        messages=[
+            {"role": "system", "content": JUDGE_INSTRUCTIONS},
+            {"role": "user", "content": json.dumps(payload, ensure_ascii=False)},
+        ],
+        temperature=0,
+        response_format=_verdict_schema()
+    )
+    try:
+        verdicts = json.loads(response.choices[0].message.content)['verdicts']
+    except (json.JSONDecodeError, KeyError, TypeError) as e:
+        logger.warning(f"Malformed judge response for {len(items)} items: {e}")
+        return {}
+
+    parsed = {}
+    for entry in verdicts if isinstance(verdicts, list) else []:
+        if not isinstance(entry, dict):
+            continue
+        item_id, equivalent = entry.get('id'), entry.get('equivalent')
+        # Drop verdicts for unknown or repeated ids, and non-boolean verdicts
+        if not isinstance(item_id, int) or not 0 <= item_id < len(items) or item_id in parsed:
+            continue
+        if not isinstance(equivalent, bool):
+            continue
+        parsed[item_id] = Verdict(PASS if equivalent else FAIL, str(entry.get('reason', '')).strip())
+    return parsed
+
+def judge_with_llm(
+    client,
+    items: Sequence[JudgeItem],
+    max_items: int = 20,
+    max_tokens: int = 6000,
+    model: str = JUDGE_MODEL
+) -> List[Verdict]:
+    """Grade many answers with the LLM, several per request.
+
+    Items are packed into batches by plan_batches and each batch is one
+    structured-output request returning a verdict per item. Items whose
+    verdict is missing or malformed are retried one per request; if that
+    fails too, or the request errors, the item fails as compare_answers did.
+    """
+    items = [(str(q), str(e), str(a)) for q, e, a in items]
+    results: List[Optional[Verdict]] = [None] * len(items)
+    retry = []
+    requests = 0
+    for batch in plan_batches(items, max_items, max_tokens):
+        requests += 1
+        try:
+            verdicts = _request_verdicts(client, [items[i] for i in batch], model)
+        except Exception as e:
+            logger.error(f"Judge request for {len(batch)} items failed: {str(e)}")
+            verdicts = {}
+        for position, index in enumerate(batch):
+            if position in verdicts:
+                results[index] = verdicts[position]
+            elif len(batch) > 1:
+                retry.append(index)
+            else:
+                results[index] = Verdict(FAIL, "judge returned no verdict")
+
+    for index in retry:
+        requests += 1
+        try:
+            verdict = _request_verdicts(client, [items[index]], model).get(0)
+        except Exception as e:
+            logger.error(f"Judge request for item {index} failed: {str(e)}")
+            verdict = None
+        results[index] = verdict or Verdict(FAIL, "judge returned no verdict")
+
+    logger.debug(f"Judged {len(items)} answers with {requests} LLM requests ({len(retry)} retried singly)")
+    return results
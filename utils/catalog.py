@@ -0,0 +1,114 @@
+import json
+import math
+import sqlite3
+import time
+from typing import Any, Dict, List
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+def _quote(name: str) -> str:
+    return '"' + str(name).replace('"', '""') + '"'
+
+def _estimate_distinct(frequencies: List[tuple], sample_size: int, total_rows: int) -> int:
+    """GEE estimate of distinct values from a sample's frequency-of-frequencies.
+
+    ``frequencies`` holds (times_seen, number_of_values) pairs. Values seen
+    once are scaled by sqrt(N/n); values seen more often are counted as-is.
+    """
+    if sample_size == 0:
+        return 0
+    seen_once = sum(values for times, values in frequencies if times == 1)
+    seen_more = sum(values for times, values in frequencies if times > 1)
+    if sample_size >= total_rows:
+        return seen_once + seen_more
+    estimate = math.sqrt(total_rows / sample_size) * seen_once + seen_more
+    return int(round(min(estimate, total_rows)))
+
+def build_table_catalog(
+    conn: sqlite3.Connection,
+    table_name: str,
+    sample_rows: int = 100000,
+    top_k: int = 5
+) -> Dict[str, Any]:
+    """Compute per-column statistics for one table.
+
+    Row, null, min and max counts are exact and come from a single aggregate
+    pass. Distinct counts and top values come from an evenly strided sample
+    of at most ``sample_rows`` rows.
+    """
+    start = time.perf_counter()
+    table = _quote(table_name)
+    columns = conn.execute(f"PRAGMA table_info({table})").fetchall()
+
+    aggregates = ["COUNT(*)"]
+    for col in columns:
+        name = _quote(col[1])
+        aggregates += [f"COUNT({name})", f"MIN({name})", f"MAX({name})"]
+    values = conn.execute(f"SELECT {', '.join(aggregates)} FROM {table}").fetchone()
+    row_count = values[0]
+
+    step = max(1, math.ceil(row_count / sample_rows)) if row_count else 1
+    sample = f"(SELECT * FROM {table} WHERE rowid % {step} = 0)" if step > 1 else table
+    sample_size = conn.execute(f"SELECT COUNT(*) FROM {sample}").fetchone()[0]
+
+    column_stats = {}
+    for i, col in enumerate(columns):
+        name = _quote(col[1])
+        non_null, col_min, col_max = values[1 + 3 * i: 4 + 3 * i]
+        frequencies = conn.execute(
+            f"SELECT cnt, COUNT(*) FROM (SELECT COUNT(*) AS cnt FROM {sample} "
+            f"WHERE {name} IS NOT NULL GROUP BY {name}) GROUP BY cnt"
+        ).fetchall()
+        sample_non_null = sum(times * count for times, count in frequencies)
+        top_values = conn.execute(
+            f"SELECT {name}, COUNT(*) AS cnt FROM {sample} WHERE {name} IS NOT NULL "
+            f"GROUP BY {name} ORDER BY cnt DESC LIMIT {int(top_k)}"
+        ).fetchall()
+        column_stats[col[1]] = {
+            'type': col[2],
+            'row_count': row_count,
+            'null_count': row_count - non_null,
+            'min': col_min,
+            'max': col_max,
+            'approx_distinct': _estimate_distinct(frequencies, sample_non_null, non_null),
+            # Scale sample counts back up to the whole table
+            'top_values': [
+                [value, int(round(count * row_count / sample_size)) if sample_size else count]
+                for value, count in top_values
+            ],
+        }
+
+    catalog = {
+        'table': table_name,
+        'row_count': row_count,
+        'sample_rows': sample_size,
+        'columns': column_stats,
+        'computed_at': time.time(),
+    }
+    logger.debug(f"Built catalog for '{table_name}' ({row_count} rows) in {time.perf_counter() - start:.2f}s")
+    return catalog
+
+def format_catalog(catalogs: Dict[str, Dict[str, Any]], max_top_values: int = 3) -> str:
+    """Render catalogs as compact schema context for prompts."""
+    parts = []
+    for table_name, catalog in catalogs.items():
+        parts.append(f"Table: {table_name} ({catalog['row_count']} rows)")
+        for name, stats in catalog['columns'].items():
+            line = f"  - {name} ({stats['type']}): nulls={stats['null_count']}, ~distinct={stats['approx_distinct']}"
+            if stats['min'] is not None:
+                line += f", range=[{stats['min']}, {stats['max']}]"
+            top = stats['top_values'][:max_top_values]
+            if top:
+                line += ", top=" + ", ".join(f"{value} ({count})" for value, count in top)
+            parts.append(line)
+        parts.append("")
+    return "\n".join(parts)
+
+def dumps_catalog(catalog: Dict[str, Any]) -> str:
+    """Serialize a catalog for storage."""
+    return json.dumps(catalog, default=str)
+
+def loads_catalog(text: str) -> Dict[str, Any]:
+    """Deserialize a stored catalog."""
+    return json.loads(text)
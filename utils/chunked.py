@@ -0,0 +1,191 @@
+import os
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Union
+import numpy as np
+import pandas as pd
+from pandas.api import types as ptypes
+from config import OUT_OF_CORE_THRESHOLD_MB
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+NUMERIC_AGGREGATIONS = ('count', 'sum', 'mean', 'min', 'max', 'var', 'std')
+# Non-numeric columns can only be counted and compared
+OTHER_AGGREGATIONS = ('count', 'min', 'max')
+_NO_GROUP = '__all__'
+
+Predicate = Union[str, Callable[[pd.DataFrame], pd.Series]]
+
+def is_out_of_core(file_path: str, threshold_mb: Optional[float] = None) -> bool:
+    """Check whether a file is too large to load into memory in one piece."""
+    threshold_mb = OUT_OF_CORE_THRESHOLD_MB if threshold_mb is None else threshold_mb
+    return os.path.getsize(file_path) > threshold_mb * 1024 * 1024
+
+def partial_aggregate(chunk: pd.DataFrame, keys: List[str], columns: List[str]) -> Dict[str, pd.DataFrame]:
+    """Reduce one chunk to mergeable per-group statistics.
+
+    Each statistic is a frame indexed by group with one column per value
+    column: non-null count, sum, min, max, mean and the sum of squared
+    deviations from the mean (m2), which together give exact
+    count/sum/mean/min/max/var after merging.
+    """
+    grouped = chunk.groupby(keys, observed=True, sort=False)[columns]
+    numeric = [col for col in columns if ptypes.is_numeric_dtype(chunk[col])]
+    n = grouped.count()
+    partial = {'n': n, 'min': grouped.min(), 'max': grouped.max()}
+    if numeric:
+        numeric_grouped = chunk.groupby(keys, observed=True, sort=False)[numeric]
+        partial['sum'] = numeric_grouped.sum()
+        partial['mean'] = numeric_grouped.mean()
+        partial['m2'] = (numeric_grouped.var(ddof=0) * n[numeric]).fillna(0.0)
+    return partial
+
+def merge_partials(a: Dict[str, pd.DataFrame], b: Dict[str, pd.DataFrame]) -> Dict[str, pd.DataFrame]:
+    """Combine two partial aggregates with the parallel variance formula (Chan et al.)."""
+    index = a['n'].index.union(b['n'].index)
+    left = {stat: frame.reindex(index) for stat, frame in a.items()}
+    right = {stat: frame.reindex(index) for stat, frame in b.items()}
+
+    na, nb = left['n'].fillna(0), right['n'].fillna(0)
+    n = na + nb
+    merged = {
+        'n': n,
+        'min': left['min'].combine(right['min'], _combine_extreme(np.fmin, 'min')),
+        'max': left['max'].combine(right['max'], _combine_extreme(np.fmax, 'max')),
+    }
+    if 'sum' in left:
+        numeric = left['sum'].columns
+        na, nb, n = na[numeric], nb[numeric], n[numeric]
+        mean_a, mean_b = left['mean'].fillna(0.0), right['mean'].fillna(0.0)
+        delta = mean_b - mean_a
+        safe_n = n.where(n > 0)
+        merged['sum'] = left['sum'].fillna(0.0) + right['sum'].fillna(0.0)
+        merged['mean'] = mean_a + delta * nb / safe_n
+        merged['m2'] = left['m2'].fillna(0.0) + right['m2'].fillna(0.0) + delta ** 2 * na * nb / safe_n
+    return merged
+
+def _combine_extreme(numeric_op, name: str) -> Callable[[pd.Series, pd.Series], pd.Series]:
+    """Column combiner for min/max that ignores missing values and also handles text."""
+    def combine(left: pd.Series, right: pd.Series) -> pd.Series:
+        if ptypes.is_numeric_dtype(left) and ptypes.is_numeric_dtype(right):
+            return pd.Series(numeric_op(left.to_numpy(), right.to_numpy()), index=left.index)
+        both = pd.concat([left, right], axis=1)
+        return getattr(both, name)(axis=1)
+    return combine
+
+def finalize(partial: Dict[str, pd.DataFrame], spec: Dict[str, List[str]]) -> pd.DataFrame:
+    """Turn merged statistics into a result shaped like ``DataFrame.groupby().agg(spec)``."""
+    n = partial['n']
+    results = {}
+    for col, aggregations in spec.items():
+        for agg in aggregations:
+            if agg == 'count':
+                value = n[col].astype('int64')
+            elif agg in ('sum', 'mean', 'min', 'max'):
+                value = partial[agg][col]
+            elif agg == 'var':
+                value = partial['m2'][col] / (n[col] - 1).where(n[col] > 1)
+            else:
+                value = np.sqrt(partial['m2'][col] / (n[col] - 1).where(n[col] > 1))
+            results[(col, agg)] = value
+    result = pd.DataFrame(results)
+    result.columns = pd.MultiIndex.from_tuples(result.columns)
+    return result
+
+class ChunkedFrame:
+    """Filter/group-by/aggregate pipeline over a CSV streamed in chunks.
+
+    Only one chunk is in memory at a time, so files larger than RAM can be
+    aggregated. Each chunk is filtered, reduced to mergeable per-group
+    statistics and merged into a running total, so count, sum, mean, min,
+    max, var and std are exact rather than approximated. Chunks have the
+    dtypes pd.read_csv infers. Used to profile and prune files above the
+    out-of-core threshold without loading them.
+    """
+
+    def __init__(
+        self,
+        source: str,
+        chunksize: int = 500000,
+        filters: Sequence[Predicate] = (),
+        keys: Sequence[str] = (),
+        columns: Optional[List[str]] = None
+    ):
+        self.source = source
+        self.chunksize = chunksize
+        self.columns = list(columns) if columns is not None else None
+        self.filters = list(filters)
+        self.keys = list(keys)
+        self.logger = logger
+
+    def _with(self, **changes) -> 'ChunkedFrame':
+        params = {
+            'source': self.source, 'chunksize': self.chunksize,
+            'filters': self.filters, 'keys': self.keys, 'columns': self.columns,
+        }
+        params.update(changes)
+        return ChunkedFrame(**params)
+
+    def filter(self, predicate: Predicate) -> 'ChunkedFrame':
+        """Keep rows matching a ``DataFrame.query`` expression or a boolean mask function."""
+        return self._with(filters=self.filters + [predicate])
+
+    def groupby(self, keys: Union[str, Sequence[str]]) -> 'ChunkedFrame':
+        """Group the aggregation by one or more columns."""
+        return self._with(keys=[keys] if isinstance(keys, str) else list(keys))
+
+    def iter_chunks(self, columns: Optional[List[str]] = None) -> Iterator[pd.DataFrame]:
+        """Yield filtered chunks of the source."""
+        # Only narrow to the needed columns when no filter may reference others
+        usecols = columns if columns is not None and not self.filters else self.columns
+        for chunk in pd.read_csv(self.source, chunksize=self.chunksize, usecols=usecols):
+            for predicate in self.filters:
+                chunk = chunk.query(predicate) if isinstance(predicate, str) else chunk[predicate(chunk)]
+            yield chunk
+
+    def head(self, n: int = 5) -> pd.DataFrame:
+        """Return the first rows that pass the filters."""
+        rows = []
+        for chunk in self.iter_chunks():
+            rows.append(chunk.head(n - sum(len(r) for r in rows)))
+            if sum(len(r) for r in rows) >= n:
+                break
+        return pd.concat(rows) if rows else pd.DataFrame()
+
+    def agg(self, spec: Dict[str, Union[str, List[str]]]) -> pd.DataFrame:
+        """Aggregate columns, e.g. ``{'PRICE': ['mean', 'max'], 'QUANTITY': 'sum'}``."""
+        spec = {col: [aggs] if isinstance(aggs, str) else list(aggs) for col, aggs in spec.items()}
+        for col, aggregations in spec.items():
+            unknown = set(aggregations) - set(NUMERIC_AGGREGATIONS)
+            if unknown:
+                raise ValueError(f"Unsupported aggregations for '{col}': {sorted(unknown)}")
+
+        start = time.perf_counter()
+        columns = list(spec)
+        keys = self.keys or [_NO_GROUP]
+        total, chunks, rows = None, 0, 0
+        for chunk in self.iter_chunks(columns=self.keys + columns):
+            chunks += 1
+            rows += len(chunk)
+            if not self.keys:
+                chunk = chunk.assign(**{_NO_GROUP: 0})
+            for col, aggregations in spec.items():
+                if not ptypes.is_numeric_dtype(chunk[col]) and set(aggregations) - set(OTHER_AGGREGATIONS):
+                    raise ValueError(f"Column '{col}' is not numeric; only {OTHER_AGGREGATIONS} are supported")
+            if chunk.empty:
+                continue
+            partial = partial_aggregate(chunk, keys, columns)
+            total = partial if total is None else merge_partials(total, partial)
+
+        if total is None:
+            return pd.DataFrame(columns=pd.MultiIndex.from_tuples(
+                [(col, agg) for col, aggs in spec.items() for agg in aggs]
+            ))
+        result = finalize(total, spec).sort_index()
+        if not self.keys:
+            result = result.reset_index(drop=True)
+        self.logger.debug(
+            f"Aggregated {rows} rows in {chunks} chunks into {len(result)} groups "
+            f"in {time.perf_counter() - start:.3f}s"
+        )
+        return result
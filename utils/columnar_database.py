@@ -0,0 +1,340 @@
+import json
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import pandas as pd
+from utils.catalog import format_catalog
+from utils.database import QueryLimitError, quote_identifier
+from utils.index_advisor import sql_identifiers
+from utils.logger import get_logger
+from utils.query_cache import QueryCache, get_query_cache
+
+try:
+    import duckdb
+    import pyarrow
+except ImportError:
+    duckdb = None
+
+logger = get_logger(__name__)
+
+VERSIONS_FILE = "_versions.json"
+
+def _sqlite_type(duckdb_type: str) -> str:
+    """Map a DuckDB column type to the SQLite type name used in get_schema."""
+    upper = duckdb_type.upper()
+    if re.match(r"^(U?(TINY|SMALL|BIG|HUGE)?INT(EGER)?\d*|BOOLEAN)$", upper):
+        return 'INTEGER'
+    if re.match(r"^(DOUBLE|FLOAT|REAL|DECIMAL.*)$", upper):
+        return 'REAL'
+    if upper in ('VARCHAR', 'TEXT', 'STRING'):
+        return 'TEXT'
+    return upper
+
+class ColumnarDatabaseManager:
+    """Benchmark backend that stores tables as Parquet and queries them with DuckDB.
+
+    Each table is one Parquet file under ``data_dir`` exposed as a DuckDB view,
+    so queries are vectorized and run on all cores. Only the query side of
+    DatabaseManager is implemented (ingest_csv, create_table_from_df,
+    execute_query, iter_query, the catalog and ``get_schema``); there are no
+    pooled reader/writer connections, rollups, index tuning or drop_table,
+    so the dataset registry and the SQL fast path cannot run on it. It is
+    used by tests/benchmark_backends.py to compare query speed with SQLite.
+    Queries are written in the SQLite dialect used elsewhere, which DuckDB
+    accepts for the filters and aggregations we issue.
+    """
+
+    def __init__(
+        self,
+        data_dir: Optional[str] = None,
+        threads: Optional[int] = None,
+        cache_results: bool = True,
+        cache_bytes: int = 256 * 1024 * 1024,
+        cache_spill_dir: Optional[str] = None
+    ):
+        if duckdb is None:
+            raise ImportError("The columnar backend requires duckdb and pyarrow: pip install duckdb pyarrow")
+        self.data_dir = Path(data_dir or "data/parquet")
+        self.data_dir.mkdir(parents=True, exist_ok=True)
+        self.logger = logger
+        self.threads = threads or os.cpu_count() or 1
+        self._conn = duckdb.connect(database=':memory:')
+        self._conn.execute(f"SET threads TO {int(self.threads)}")
+        self._local = threading.local()
+        self._write_lock = threading.RLock()
+        self._versions: Dict[str, int] = {}
+        self._versions_mtime: Optional[float] = None
+        self._catalogs: Dict[str, Tuple[int, Dict[str, Any]]] = {}
+        self._schema_cache: Optional[Tuple[Tuple[Tuple[str, int], ...], str]] = None
+        self.result_cache: Optional[QueryCache] = (
+            get_query_cache(str(self.data_dir), max_bytes=cache_bytes, spill_dir=cache_spill_dir)
+            if cache_results else None
+        )
+        self.table_versions()
+
+    def _cursor(self):
+        """Return this thread's DuckDB cursor."""
+        cursor = getattr(self._local, 'cursor', None)
+        if cursor is None:
+            cursor = self._conn.cursor()
+            self._local.cursor = cursor
+        return cursor
+
+    def _table_path(self, table_name: str) -> Path:
+        safe = re.sub(r"[^\w.-]", "_", table_name)
+        return self.data_dir / f"{safe}.parquet"
+
+    def _sync_views(self) -> None:
+        """(Re)create a view for every known table's Parquet file."""
+        for table_name in self._versions:
+            path = self._table_path(table_name)
+            if path.exists():
+                self._cursor().execute(
+                    f"CREATE OR REPLACE VIEW {quote_identifier(table_name)} AS "
+                    f"SELECT * FROM read_parquet('{path.as_posix()}')"
+                )
+
+    def table_versions(self) -> Dict[str, int]:
+        """Return the data version of every table, picking up writes from other processes."""
+        path = self.data_dir / VERSIONS_FILE
+        mtime = path.stat().st_mtime if path.exists() else None
+        if mtime != self._versions_mtime:
+            self._versions = json.loads(path.read_text()) if mtime is not None else {}
+            self._versions_mtime = mtime
+            self._sync_views()
+        return dict(self._versions)
+
+    def _bump_version(self, table_name: str) -> None:
+        versions = self.table_versions()
+        versions[table_name] = versions.get(table_name, 0) + 1
+        path = self.data_dir / VERSIONS_FILE
+        tmp_path = path.with_suffix('.tmp')
+        tmp_path.write_text(json.dumps(versions))
+        os.replace(tmp_path, path)
+        self.table_versions()
+        if self.result_cache is not None:
+            self.result_cache.invalidate(table_name)
+
+    def _write_parquet(self, select_sql: str, table_name: str) -> None:
+        """Write a SELECT to the table's Parquet file atomically and bump its version."""
+        path = self._table_path(table_name)
+        tmp_path = path.with_suffix('.parquet.tmp')
+        with self._write_lock:
+            self._cursor().execute(
+                f"COPY ({select_sql}) TO '{tmp_path.as_posix()}' (FORMAT PARQUET, COMPRESSION ZSTD)"
+            )
+            os.replace(tmp_path, path)
+            self._bump_version(table_name)
+
+    def create_table_from_df(self, df: pd.DataFrame, table_name: str) -> None:
+        """Create a table from a pandas DataFrame."""
+        try:
+            with self._write_lock:
+                cursor = self._cursor()
+                cursor.register('_incoming_df', df)
+                try:
+                    self._write_parquet("SELECT * FROM _incoming_df", table_name)
+                finally:
+                    cursor.unregister('_incoming_df')
+            self.logger.debug(f"Created table '{table_name}' with {len(df)} rows")
+            self.refresh_catalog(table_name)
+        except Exception as e:
+            self.logger.error(f"Error creating table: {e}")
+            raise
+
+    def ingest_csv(self, path: str, table_name: str, sample_rows: int = 10000, **kwargs) -> int:
+        """Stream a CSV into a Parquet-backed table and return the row count.
+
+        Extra keyword arguments (``chunksize``, ``encoding``) are accepted for
+        compatibility with DatabaseManager.ingest_csv; DuckDB streams on its own.
+        """
+        start = time.perf_counter()
+        try:
+            csv_path = Path(path).as_posix().replace("'", "''")
+            self._write_parquet(
+                f"SELECT * FROM read_csv_auto('{csv_path}', sample_size={int(sample_rows)})",
+                table_name
+            )
+            rows = self._cursor().execute(
+                f"SELECT COUNT(*) FROM {quote_identifier(table_name)}"
+            ).fetchone()[0]
+            self.logger.debug(
+                f"Ingested {rows} rows from '{path}' into '{table_name}' "
+                f"in {time.perf_counter() - start:.2f}s"
+            )
+            self.refresh_catalog(table_name)
+            return rows
+        except Exception as e:
+            self.logger.error(f"Error ingesting CSV: {e}")
+            raise
+
+    def cache_stats(self) -> Dict[str, float]:
+        """Return result cache hit/miss statistics."""
+        return self.result_cache.stats() if self.result_cache is not None else {}
+
+    def iter_query(
+        self,
+        query: str,
+        chunksize: int = 10000,
+        output: str = 'pandas',
+        max_rows: Optional[int] = None,
+        timeout: Optional[float] = None
+    ) -> Iterator:
+        """Stream query results as DataFrames or Arrow record batches; see DatabaseManager.iter_query."""
+        if output not in ('pandas', 'arrow'):
+            raise ValueError(f"Unknown output format: {output}")
+        self.table_versions()
+        cursor = self._conn.cursor()
+        timer = threading.Timer(timeout, cursor.interrupt) if timeout is not None else None
+        try:
+            if timer is not None:
+                timer.start()
+            batches = cursor.execute(query).fetch_record_batch(chunksize)
+            rows_seen = 0
+            yielded = False
+            for batch in batches:
+                rows_seen += batch.num_rows
+                if max_rows is not None and rows_seen > max_rows:
+                    raise QueryLimitError(f"Query returned more than {max_rows} rows")
+                yield batch.to_pandas() if output == 'pandas' else batch
+                yielded = True
+            if not yielded:
+                empty = pyarrow.RecordBatch.from_pylist([], schema=batches.schema)
+                yield empty.to_pandas() if output == 'pandas' else empty
+        except duckdb.InterruptException as e:
+            raise TimeoutError(f"Query exceeded {timeout}s timeout") from e
+        finally:
+            if timer is not None:
+                timer.cancel()
+            cursor.close()
+
+    def execute_query(
+        self,
+        query: str,
+        max_rows: Optional[int] = None,
+        timeout: Optional[float] = None
+    ) -> pd.DataFrame:
+        """Execute a SQL query and return results as DataFrame.
+
+        ``max_rows`` and ``timeout`` guard against runaway queries; see iter_query.
+        """
+        try:
+            cache_key = None
+            if self.result_cache is not None and query.lstrip().lower().startswith(("select", "with")):
+                mentioned = {name.lower() for name in sql_identifiers(query)}
+                versions = {
+                    table: version for table, version in self.table_versions().items()
+                    if table.lower() in mentioned
+                }
+                cache_key = self.result_cache.make_key(query, versions)
+                cached = self.result_cache.get(cache_key)
+                if cached is not None:
+                    self.logger.debug(f"Cache hit for query: {query}")
+                    # A cached result was complete, so it must pass the same row limit
+                    if max_rows is not None and len(cached) > max_rows:
+                        raise QueryLimitError(f"Query returned more than {max_rows} rows")
+                    return cached
+            else:
+                self.table_versions()
+
+            if max_rows is None and timeout is None:
+                result = self._cursor().execute(query).df()
+            else:
+                chunks = list(self.iter_query(query, max_rows=max_rows, timeout=timeout))
+                result = pd.concat(chunks, ignore_index=True) if len(chunks) > 1 else chunks[0]
+            self.logger.debug(f"Executed query: {query}")
+            if cache_key is not None:
+                self.result_cache.put(cache_key, result, tuple(versions))
+            return result
+        except Exception as e:
+            self.logger.error(f"Error executing query: {e}")
+            raise
+
+    def refresh_catalog(self, table_name: str) -> Dict[str, Any]:
+        """Recompute column statistics for a table using DuckDB's SUMMARIZE."""
+        try:
+            version = self.table_versions().get(table_name, 0)
+            cursor = self._cursor()
+            table = quote_identifier(table_name)
+            summary = cursor.execute(f"SUMMARIZE SELECT * FROM {table}").df()
+            columns = {}
+            for _, row in summary.iterrows():
+                name = quote_identifier(row['column_name'])
+                top_values = cursor.execute(
+                    f"SELECT {name}, COUNT(*) AS cnt FROM {table} WHERE {name} IS NOT NULL "
+                    f"GROUP BY {name} ORDER BY cnt DESC LIMIT 5"
+                ).fetchall()
+                row_count = int(row['count'])
+                null_count = int(round(row_count * float(row['null_percentage']) / 100))
+                columns[row['column_name']] = {
+                    'type': _sqlite_type(row['column_type']),
+                    'row_count': row_count,
+                    'null_count': null_count,
+                    'min': None if pd.isna(row['min']) else row['min'],
+                    'max': None if pd.isna(row['max']) else row['max'],
+                    'approx_distinct': int(row['approx_unique']),
+                    'top_values': [[value, int(count)] for value, count in top_values],
+                }
+            row_count = next(iter(columns.values()))['row_count'] if columns else 0
+            catalog = {
+                'table': table_name,
+                'row_count': row_count,
+                'sample_rows': row_count,
+                'columns': columns,
+                'computed_at': time.time(),
+                'version': version,
+            }
+            self._catalogs[table_name] = (version, catalog)
+            return catalog
+        except Exception as e:
+            self.logger.error(f"Error building catalog: {e}")
+            raise
+
+    def get_catalog(self, table_name: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        """Return column statistics per table, recomputing only when a table's version changed."""
+        versions = self.table_versions()
+        if table_name is not None:
+            versions = {table_name: versions[table_name]} if table_name in versions else {}
+        catalogs = {}
+        for table, version in versions.items():
+            cached = self._catalogs.get(table)
+            if cached is None or cached[0] != version:
+                cached = (version, self.refresh_catalog(table))
+            catalogs[table] = cached[1]
+        return catalogs
+
+    def describe_schema(self, tables: Optional[List[str]] = None, max_top_values: int = 3) -> str:
+        """Get the schema with per-column statistics, formatted for prompts."""
+        catalogs = self.get_catalog()
+        if tables is not None:
+            catalogs = {name: catalogs[name] for name in tables if name in catalogs}
+        return format_catalog(catalogs, max_top_values=max_top_values)
+
+    def get_schema(self) -> str:
+        """Get the database schema as a string."""
+        versions_key = tuple(sorted(self.table_versions().items()))
+        if self._schema_cache is not None and self._schema_cache[0] == versions_key:
+            return self._schema_cache[1]
+        try:
+            cursor = self._cursor()
+            schema_parts = []
+            for table_name, _ in versions_key:
+                columns = cursor.execute(f"DESCRIBE {quote_identifier(table_name)}").fetchall()
+                schema_parts.append(f"Table: {table_name}")
+                for col in columns:
+                    schema_parts.append(f"  - {col[0]} ({_sqlite_type(col[1])})")
+                schema_parts.append("")
+
+            schema = "\n".join(schema_parts)
+            self._schema_cache = (versions_key, schema)
+            return schema
+        except Exception as e:
+            self.logger.error(f"Error getting schema: {e}")
+            raise
+
+    def close(self) -> None:
+        """Close the DuckDB connection."""
+        self._conn.close()
@@ -0,0 +1,216 @@
+import hashlib
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+import numpy as np
+import pandas as pd
+from pandas.api import types as ptypes
+from utils.logger import get_logger
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+    CSV_ENGINE = 'pyarrow'
+except ImportError:
+    pyarrow = None
+    CSV_ENGINE = 'c'
+
+logger = get_logger(__name__)
+
+DTYPE_CACHE_DIR = Path("data/dtype_cache")
+SIDECAR_SUFFIX = ".arrow"
+# Schema metadata key holding the hash of the CSV a sidecar was built from
+SIDECAR_HASH_KEY = b"baai.source_sha256"
+
+SIDECAR_PLAN_KEY = b"baai.dtype_plan_version"
+# Bumped whenever infer_dtype_plan changes, so cached plans and sidecars built by older rules are ignored
+DTYPE_PLAN_VERSION = 2
+
+_dtype_plans: Dict[str, Dict[str, str]] = {}
+_hashes: Dict[tuple, str] = {}
+_lock = threading.Lock()
+
+def hash_file(file_path: str, block_size: int = 1024 * 1024) -> str:
+    """Return the SHA-256 of a file's contents."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def file_content_hash(file_path: str) -> str:
+    """Content hash of a file, memoized while its size and mtime are unchanged."""
+    path = Path(file_path)
+    stat = path.stat()
+    key = (str(path.resolve()), stat.st_size, stat.st_mtime)
+    with _lock:
+        if key not in _hashes:
+            _hashes[key] = hash_file(file_path)
+        return _hashes[key]
+
+def infer_dtype_plan(
+    df: pd.DataFrame,
+    max_categories: int = 1000,
+    max_category_ratio: float = 0.5
+) -> Dict[str, str]:
+    """Choose compact dtypes for a freshly parsed DataFrame.
+
+    Only low-cardinality text columns become categoricals. Integer columns
+    stay numeric, even when named like keys (``SELL_ID``), so comparisons,
+    sums and sorts behave as with pd.read_csv; they are downcast to the
+    smallest type that holds their range. Floats stay float64 so aggregates
+    keep full precision.
+    """
+    plan = {}
+    rows = max(len(df), 1)
+    for col in df.columns:
+        series = df[col]
+        unique = series.nunique(dropna=True)
+        low_cardinality = unique <= max_categories and unique / rows <= max_category_ratio
+        if ptypes.is_bool_dtype(series):
+            plan[col] = 'bool'
+        elif ptypes.is_integer_dtype(series):
+            lo, hi = series.min(), series.max()
+            for candidate in ('int8', 'int16', 'int32', 'int64'):
+                info = np.iinfo(candidate)
+                if info.min <= lo and hi <= info.max:
+                    plan[col] = candidate
+                    break
+        elif ptypes.is_float_dtype(series):
+            plan[col] = 'float64'
+        elif low_cardinality:
+            plan[col] = 'category'
+        else:
+            plan[col] = 'str'
+    return plan
+
+def read_csv_dtype(series: pd.Series) -> str:
+    """Name of the dtype pd.read_csv gives a column that load_csv compacted."""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return str(series.cat.categories.dtype)
+    if ptypes.is_integer_dtype(series):
+        return 'int64'
+    return str(series.dtype)
+
+def _plan_path(content_hash: str) -> Path:
+    return DTYPE_CACHE_DIR / f"{content_hash}.v{DTYPE_PLAN_VERSION}.json"
+
+def get_dtype_plan(file_path: str) -> Optional[Dict[str, str]]:
+    """Return the cached dtype plan for a file's content, if one exists."""
+    content_hash = file_content_hash(file_path)
+    with _lock:
+        plan = _dtype_plans.get(content_hash)
+    if plan is None and _plan_path(content_hash).exists():
+        plan = json.loads(_plan_path(content_hash).read_text())
+        with _lock:
+            _dtype_plans[content_hash] = plan
+    return plan
+
+def _save_dtype_plan(file_path: str, plan: Dict[str, str]) -> None:
+    content_hash = file_content_hash(file_path)
+    with _lock:
+        _dtype_plans[content_hash] = plan
+    try:
+        DTYPE_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        _plan_path(content_hash).write_text(json.dumps(plan))
+    except OSError as e:
+        logger.debug(f"Could not persist dtype plan: {e}")
+
+def sidecar_path(file_path: str) -> Path:
+    """Path of the Arrow IPC sidecar kept next to a CSV."""
+    return Path(str(file_path) + SIDECAR_SUFFIX)
+
+def write_sidecar(file_path: str) -> Optional[Path]:
+    """Convert a CSV once to an uncompressed Arrow IPC file next to it.
+
+    Uncompressed IPC can be memory-mapped, so every process loading the
+    dataset shares the same page-cache pages instead of re-parsing text.
+    Returns None when pyarrow is not installed.
+    """
+    if pyarrow is None:
+        return None
+    start = time.perf_counter()
+    df = load_csv(file_path, use_sidecar=False)
+    table = pyarrow.Table.from_pandas(df, preserve_index=False)
+    table = table.replace_schema_metadata({
+        **(table.schema.metadata or {}),
+        SIDECAR_HASH_KEY: file_content_hash(file_path).encode(),
+        SIDECAR_PLAN_KEY: str(DTYPE_PLAN_VERSION).encode(),
+    })
+    path = sidecar_path(file_path)
+    tmp_path = path.with_suffix(path.suffix + '.tmp')
+    with pyarrow.OSFile(str(tmp_path), 'wb') as sink:
+        with pyarrow.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    tmp_path.replace(path)
+    logger.debug(f"Wrote Arrow sidecar {path} in {time.perf_counter() - start:.3f}s")
+    return path
+
+def _read_sidecar(file_path: str, columns: Optional[List[str]]) -> Optional[pd.DataFrame]:
+    """Memory-map a CSV's sidecar if it exists and matches the CSV's content."""
+    path = sidecar_path(file_path)
+    if pyarrow is None or not path.exists():
+        return None
+    try:
+        table = pyarrow.ipc.open_file(pyarrow.memory_map(str(path), 'r')).read_all()
+        metadata = table.schema.metadata or {}
+        if (
+            metadata.get(SIDECAR_HASH_KEY) != file_content_hash(file_path).encode()
+            or metadata.get(SIDECAR_PLAN_KEY) != str(DTYPE_PLAN_VERSION).encode()
+        ):
+            logger.debug(f"Ignoring stale sidecar {path}")
+            return None
+        if columns is not None:
+            table = table.select(columns)
+        # split_blocks avoids consolidating columns, so null-free numeric columns stay zero-copy
+        return table.to_pandas(split_blocks=True)
+    except Exception as e:
+        logger.debug(f"Could not read sidecar {path}: {e}")
+        return None
+
+def load_csv(
+    file_path: str,
+    columns: Optional[List[str]] = None,
+    optimize: bool = True,
+    use_sidecar: bool = True
+) -> pd.DataFrame:
+    """Load a CSV with the pyarrow engine and compact, cached dtypes.
+
+    If an up-to-date Arrow sidecar exists (see write_sidecar) it is
+    memory-mapped instead of parsing the CSV. Otherwise the first load of
+    some content parses with default dtypes and derives a dtype plan
+    (categoricals, downcast integers). The plan is cached by content hash,
+    so later loads parse straight into the compact dtypes. ``columns``
+    limits parsing to the given columns.
+    """
+    start = time.perf_counter()
+    if use_sidecar and optimize:
+        df = _read_sidecar(file_path, columns)
+        if df is not None:
+            logger.debug(f"Loaded {file_path} from sidecar in {time.perf_counter() - start:.3f}s")
+            return df
+
+    plan = get_dtype_plan(file_path) if optimize else None
+    read_kwargs = {'engine': CSV_ENGINE}
+    if columns is not None:
+        read_kwargs['usecols'] = columns
+
+    if plan is not None:
+        dtypes = {col: dtype for col, dtype in plan.items() if columns is None or col in columns}
+        df = pd.read_csv(file_path, dtype=dtypes, **read_kwargs)
+    else:
+        df = pd.read_csv(file_path, **read_kwargs)
+        if optimize:
+            plan = infer_dtype_plan(df)
+            # Plans are only cached from full loads so they cover every column
+            if columns is None:
+                _save_dtype_plan(file_path, plan)
+            df = df.astype(plan)
+
+    logger.debug(
+        f"Loaded {file_path}: {df.shape[0]} rows x {df.shape[1]} columns, "
+        f"{df.memory_usage(deep=True).sum() / 1e6:.1f}MB in {time.perf_counter() - start:.3f}s"
+    )
+    return df
@@ -1,71 +1,707 @@
+import re
 import sqlite3
+import threading
+import time
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Optional
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 import pandas as pd
+from pandas.api import types as ptypes
+from utils.catalog import build_table_catalog, dumps_catalog, format_catalog, loads_catalog
+from utils.index_advisor import IndexAdvisor, sql_identifiers
 from utils.logger import get_logger
+from utils.query_cache import QueryCache, get_query_cache
+from utils.rollups import ROLLUPS_TABLE, build_rollups, detect_rollup_spec, ensure_rollups_table, list_rollups
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
 
 logger = get_logger(__name__)
 
+# Bookkeeping table: one row per user table, bumped on every write to it
+VERSIONS_TABLE = "_baai_table_versions"
+# Column statistics per table, stored with the version they were computed for
+CATALOG_TABLE = "_baai_catalog"
+INTERNAL_TABLE_PREFIXES = ("sqlite_", "_baai_")
+
+# Pragmas applied to every pooled connection. WAL lets readers proceed while
+# the single writer commits; NORMAL sync is durable enough under WAL.
+DEFAULT_PRAGMAS = {
+    'synchronous': 'NORMAL',
+    'cache_size': -64000,        # ~64MB page cache per connection
+    'mmap_size': 268435456,      # 256MB memory-mapped I/O
+    'temp_store': 'MEMORY',
+    'busy_timeout': 5000,
+}
+
+# REPLACE alone is also a string function, so only the statement forms are forbidden
+FORBIDDEN_SQL_RE = re.compile(
+    r"\b(insert|update|delete|drop|alter|create|replace\s+into|or\s+replace|attach|detach|pragma|vacuum|"
+    r"reindex|analyze|begin|commit|rollback)\b",
+    re.IGNORECASE
+)
+# String literals and comments, matched left to right so neither can hide the other
+SQL_LITERAL_OR_COMMENT_RE = re.compile(r"'(?:[^']|'')*'|--[^\n]*|/\*.*?\*/", re.DOTALL)
+
+class QueryLimitError(RuntimeError):
+    """Raised when a query returns more rows than the caller allowed."""
+
+def rows_to_chunk(rows: List[tuple], columns: List[str], output: str):
+    """Build a DataFrame or Arrow record batch from fetched rows."""
+    df = pd.DataFrame.from_records(rows, columns=columns)
+    if output == 'arrow':
+        return pyarrow.RecordBatch.from_pandas(df, preserve_index=False)
+    return df
+
+def sql_values(series: pd.Series) -> list:
+    """Column values as Python scalars SQLite can bind, with missing values as None."""
+    if ptypes.is_datetime64_any_dtype(series) or ptypes.is_timedelta64_dtype(series):
+        return series.astype(str).where(series.notna(), None).tolist()
+    return series.astype(object).where(series.notna(), None).tolist()
+
+def quote_identifier(name: str) -> str:
+    """Quote a table or column name for use in SQL."""
+    return '"' + str(name).replace('"', '""') + '"'
+
+def is_read_only_sql(sql: str) -> bool:
+    """Check that SQL is exactly one SELECT/WITH statement with no write keywords.
+
+    Keywords and semicolons inside string literals or comments are ignored.
+    """
+    code = SQL_LITERAL_OR_COMMENT_RE.sub(
+        lambda match: "''" if match.group().startswith("'") else " ", sql
+    ).strip().rstrip(';').strip()
+    if not code or ';' in code:
+        return False
+    if not code.lower().startswith(('select', 'with')):
+        return False
+    # An unterminated literal or comment is left in place and makes the statement incomplete
+    return not FORBIDDEN_SQL_RE.search(code) and sqlite3.complete_statement(code + ';')
+
+def infer_sqlite_type(series: pd.Series) -> str:
+    """Map a pandas column to the SQLite type used for it on ingest."""
+    if ptypes.is_bool_dtype(series) or ptypes.is_integer_dtype(series):
+        return 'INTEGER'
+    if ptypes.is_float_dtype(series):
+        # Integral floats are just ints with missing values
+        non_null = series.dropna()
+        if len(non_null) and (non_null % 1 == 0).all():
+            return 'INTEGER'
+        return 'REAL'
+    return 'TEXT'
+
+class ConnectionPool:
+    """Thread-local read connections plus a single shared writer for one SQLite file.
+
+    Streamlit runs every rerun on a new thread, so read connections of
+    threads that have exited are closed whenever a new one is opened.
+    """
+
+    def __init__(self, db_path: str, pragmas: Optional[Dict[str, object]] = None):
+        self.db_path = db_path
+        self.pragmas = {**DEFAULT_PRAGMAS, **(pragmas or {})}
+        self._local = threading.local()
+        # (owning thread, connection) for every open read connection
+        self._readers: List[Tuple[threading.Thread, sqlite3.Connection]] = []
+        self._readers_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._writer: Optional[sqlite3.Connection] = None
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            'read': {'acquired': 0, 'wait_total': 0.0, 'wait_max': 0.0},
+            'write': {'acquired': 0, 'wait_total': 0.0, 'wait_max': 0.0},
+        }
+        self.logger = logger
+
+    def connect(self, query_only: bool = False) -> sqlite3.Connection:
+        """Open an unpooled connection with the configured pragmas; the caller closes it."""
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name}={value};")
+        conn.execute("PRAGMA journal_mode=WAL;")
+        if query_only:
+            conn.execute("PRAGMA query_only=ON;")
+        return conn
+
+    def _record(self, kind: str, waited: float) -> None:
+        with self._stats_lock:
+            stats = self._stats[kind]
+            stats['acquired'] += 1
+            stats['wait_total'] += waited
+            stats['wait_max'] = max(stats['wait_max'], waited)
+
+    @contextmanager
+    def reader(self) -> Iterator[sqlite3.Connection]:
+        """Yield this thread's read-only connection, opening it on first use."""
+        start = time.perf_counter()
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self.connect(query_only=True)
+            self._local.conn = conn
+            with self._readers_lock:
+                dead = [entry for entry in self._readers if not entry[0].is_alive()]
+                self._readers = [entry for entry in self._readers if entry[0].is_alive()]
+                self._readers.append((threading.current_thread(), conn))
+            for _, stale in dead:
+                self._close_quietly(stale)
+            self.logger.debug(
+                f"Opened read connection to {self.db_path} for {threading.current_thread().name}, "
+                f"closed {len(dead)} of exited threads"
+            )
+        self._record('read', time.perf_counter() - start)
+        yield conn
+
+    @contextmanager
+    def writer(self) -> Iterator[sqlite3.Connection]:
+        """Yield the shared writer inside a transaction (DDL included); commits on success, rolls back on error."""
+        start = time.perf_counter()
+        self._write_lock.acquire()
+        try:
+            if self._writer is None:
+                self._writer = self.connect()
+            self._record('write', time.perf_counter() - start)
+            try:
+                # sqlite3 only opens a transaction implicitly before DML, so
+                # begin one here to keep DROP/CREATE inside it as well
+                if not self._writer.in_transaction:
+                    self._writer.execute("BEGIN")
+                yield self._writer
+                self._writer.commit()
+            except Exception:
+                self._writer.rollback()
+                raise
+        finally:
+            self._write_lock.release()
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Return acquisition counts and wait latencies (seconds) per connection kind."""
+        with self._stats_lock:
+            result = {}
+            for kind, stats in self._stats.items():
+                acquired = stats['acquired']
+                result[kind] = {
+                    'acquired': acquired,
+                    'wait_avg': stats['wait_total'] / acquired if acquired else 0.0,
+                    'wait_max': stats['wait_max'],
+                }
+            with self._readers_lock:
+                result['read']['open'] = len(self._readers)
+            result['write']['open'] = 1 if self._writer is not None else 0
+            return result
+
+    def _close_quietly(self, conn: sqlite3.Connection) -> None:
+        try:
+            conn.close()
+        except Exception as e:
+            self.logger.debug(f"Error closing read connection: {e}")
+
+    def close(self) -> None:
+        """Close every connection the pool has handed out."""
+        with self._readers_lock:
+            for _, conn in self._readers:
+                self._close_quietly(conn)
+            self._readers = []
+        self._local = threading.local()
+        with self._write_lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+
 class DatabaseManager:
-    def __init__(self, db_path: Optional[str] = None):
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        pragmas: Optional[Dict[str, object]] = None,
+        auto_index: bool = True,
+        index_budget: int = 8,
+        cache_results: bool = True,
+        cache_bytes: int = 256 * 1024 * 1024,
+        cache_spill_dir: Optional[str] = None,
+        materialize_rollups: bool = True
+    ):
         self.db_path = db_path or "data/analysis.db"
         Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
         self.logger = logger
+        self.pool = ConnectionPool(self.db_path, pragmas)
+        self.index_advisor = IndexAdvisor(budget=index_budget) if auto_index else None
+        self._tuning: Optional[threading.Thread] = None
+        self._tuning_lock = threading.Lock()
+        self.result_cache: Optional[QueryCache] = (
+            get_query_cache(self.db_path, max_bytes=cache_bytes, spill_dir=cache_spill_dir)
+            if cache_results else None
+        )
+        self.materialize_rollups = materialize_rollups
+        self._catalogs: Dict[str, Tuple[int, Dict[str, Any]]] = {}
+        self._schema_cache: Optional[Tuple[Tuple[Tuple[str, int], ...], str]] = None
+        with self.writer() as conn:
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {VERSIONS_TABLE} "
+                "(table_name TEXT PRIMARY KEY, version INTEGER NOT NULL)"
+            )
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {CATALOG_TABLE} "
+                "(table_name TEXT PRIMARY KEY, version INTEGER NOT NULL, catalog TEXT NOT NULL)"
+            )
+            ensure_rollups_table(conn)
 
     def create_connection(self) -> sqlite3.Connection:
-        """Create a database connection."""
+        """Create a standalone database connection with the pool's pragmas."""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self.pool.connect()
             self.logger.debug(f"Connected to database: {self.db_path}")
             return conn
         except Exception as e:
             self.logger.error(f"Error connecting to database: {e}")
             raise
 
-    def create_table_from_df(self, df: pd.DataFrame, table_name: str) -> None:
-        """Create a table from a pandas DataFrame."""
+    def reader(self):
+        """Context manager yielding a pooled read-only connection."""
+        return self.pool.reader()
+
+    def writer(self):
+        """Context manager yielding the pooled writer inside a transaction."""
+        return self.pool.writer()
+
+    def _bump_version(self, conn: sqlite3.Connection, table_name: str) -> None:
+        """Bump a table's data version inside the caller's write transaction."""
+        conn.execute(
+            f"INSERT INTO {VERSIONS_TABLE} (table_name, version) VALUES (?, 1) "
+            "ON CONFLICT(table_name) DO UPDATE SET version = version + 1",
+            (table_name,)
+        )
+        if self.result_cache is not None:
+            self.result_cache.invalidate(table_name)
+
+    def table_versions(self) -> Dict[str, int]:
+        """Return the data version of every existing user table (0 if never written through this class).
+
+        Dropped tables keep their row, so a table recreated under the same
+        name continues from its old version instead of reusing cache keys.
+        """
+        with self.reader() as conn:
+            rows = conn.execute(
+                f"SELECT m.name, COALESCE(v.version, 0) FROM sqlite_master m "
+                f"LEFT JOIN {VERSIONS_TABLE} v ON v.table_name = m.name WHERE m.type = 'table'"
+            ).fetchall()
+        return {name: version for name, version in rows if not name.startswith(INTERNAL_TABLE_PREFIXES)}
+
+    def cache_stats(self) -> Dict[str, float]:
+        """Return result cache hit/miss statistics."""
+        return self.result_cache.stats() if self.result_cache is not None else {}
+
+    def pool_stats(self) -> Dict[str, Dict[str, float]]:
+        """Return connection pool acquisition metrics."""
+        return self.pool.stats()
+
+    def close(self) -> None:
+        """Wait for background index tuning, then close all pooled connections."""
+        with self._tuning_lock:
+            tuning = self._tuning
+        if tuning is not None:
+            tuning.join()
+        self.pool.close()
+
+    def create_table_from_df(self, df: pd.DataFrame, table_name: str, if_exists: str = 'replace') -> None:
+        """Create a table from a pandas DataFrame, or append to it with ``if_exists='append'``.
+
+        The rows are inserted inside the writer's transaction (not with
+        DataFrame.to_sql, which commits on its own), so a failed write leaves
+        the previous table and its version untouched. ``if_exists='fail'``
+        raises if the table exists.
+        """
+        if if_exists not in ('fail', 'replace', 'append'):
+            raise ValueError(f"Unknown if_exists value: {if_exists}")
         try:
-            conn = self.create_connection()
-            df.to_sql(table_name, conn, if_exists='replace', index=False)
+            table = quote_identifier(table_name)
+            schema = {col: infer_sqlite_type(df[col]) for col in df.columns}
+            column_list = ", ".join(quote_identifier(col) for col in schema)
+            with self.writer() as conn:
+                exists = conn.execute(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table_name,)
+                ).fetchone() is not None
+                if exists and if_exists == 'fail':
+                    raise ValueError(f"Table '{table_name}' already exists")
+                if exists and if_exists == 'replace':
+                    conn.execute(f"DROP TABLE {table}")
+                column_defs = ", ".join(f"{quote_identifier(col)} {sql_type}" for col, sql_type in schema.items())
+                conn.execute(f"CREATE TABLE IF NOT EXISTS {table} ({column_defs})")
+                conn.executemany(
+                    f"INSERT INTO {table} ({column_list}) VALUES ({', '.join('?' for _ in schema)})",
+                    zip(*[sql_values(df[col]) for col in schema])
+                )
+                self._bump_version(conn, table_name)
             self.logger.debug(f"Created table '{table_name}' with {len(df)} rows")
+            self.refresh_catalog(table_name)
+            self.refresh_rollups(table_name, incremental=(if_exists == 'append'))
         except Exception as e:
             self.logger.error(f"Error creating table: {e}")
             raise
+
+    def ingest_csv(
+        self,
+        path: str,
+        table_name: str,
+        chunksize: int = 50000,
+        sample_rows: int = 10000,
+        encoding: str = 'utf-8-sig',
+        if_exists: str = 'replace'
+    ) -> int:
+        """Stream a CSV into a table chunk by chunk and return the row count.
+
+        The schema is inferred once from the first ``sample_rows`` rows and
+        kept for every chunk; all chunks are inserted with executemany inside
+        a single transaction, so the previous table survives a failed load.
+        With ``if_exists='append'`` rows are added to the existing table and
+        its rollups are refreshed incrementally; ``if_exists='fail'`` raises
+        if the table exists. Advisor indexes are tuned afterwards, since
+        replacing the table drops them.
+        """
+        if if_exists not in ('fail', 'replace', 'append'):
+            raise ValueError(f"Unknown if_exists value: {if_exists}")
+        start = time.perf_counter()
+        try:
+            sample = pd.read_csv(path, nrows=sample_rows, encoding=encoding)
+            schema = {col: infer_sqlite_type(sample[col]) for col in sample.columns}
+            text_columns = {col: str for col, sql_type in schema.items() if sql_type == 'TEXT'}
+
+            table = quote_identifier(table_name)
+            column_defs = ", ".join(f"{quote_identifier(col)} {sql_type}" for col, sql_type in schema.items())
+            column_list = ", ".join(quote_identifier(col) for col in schema)
+            placeholders = ", ".join("?" for _ in schema)
+            insert_sql = f"INSERT INTO {table} ({column_list}) VALUES ({placeholders})"
+            append = if_exists == 'append'
+
+            rows = 0
+            with self.writer() as conn:
+                exists = conn.execute(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table_name,)
+                ).fetchone() is not None
+                if exists and if_exists == 'fail':
+                    raise ValueError(f"Table '{table_name}' already exists")
+                if exists and if_exists == 'replace':
+                    conn.execute(f"DROP TABLE {table}")
+                conn.execute(f"CREATE TABLE IF NOT EXISTS {table} ({column_defs})")
+                reader = pd.read_csv(path, chunksize=chunksize, dtype=text_columns, encoding=encoding)
+                for chunk in reader:
+                    # tolist() yields native Python scalars; SQLite binds NaN as NULL
+                    columns = [chunk[col].tolist() for col in schema]
+                    conn.executemany(insert_sql, zip(*columns))
+                    rows += len(chunk)
+                self._bump_version(conn, table_name)
+
+            self.logger.debug(
+                f"Ingested {rows} rows from '{path}' into '{table_name}' "
+                f"in {time.perf_counter() - start:.2f}s"
+            )
+            self.refresh_catalog(table_name)
+            self.refresh_rollups(table_name, incremental=append)
+            self.tune_indexes()
+            return rows
+        except Exception as e:
+            self.logger.error(f"Error ingesting CSV: {e}")
+            raise
+
+    def iter_query(
+        self,
+        query: str,
+        chunksize: int = 10000,
+        output: str = 'pandas',
+        max_rows: Optional[int] = None,
+        timeout: Optional[float] = None
+    ) -> Iterator:
+        """Stream query results in chunks of ``chunksize`` rows.
+
+        Yields DataFrames (``output='pandas'``) or pyarrow RecordBatches
+        (``output='arrow'``) so memory stays bounded by one chunk. Raises
+        QueryLimitError once more than ``max_rows`` rows are produced and
+        TimeoutError once SQLite has spent ``timeout`` seconds on the query;
+        time spent by the consumer between chunks does not count.
+        """
+        if output not in ('pandas', 'arrow'):
+            raise ValueError(f"Unknown output format: {output}")
+        if output == 'arrow' and pyarrow is None:
+            raise ImportError("Arrow output requires pyarrow: pip install pyarrow")
+
+        # A private connection keeps the progress handler off the pooled reader
+        conn = self.pool.connect(query_only=True)
+        state = {'elapsed': 0.0, 'started': None}
+
+        def over_deadline() -> int:
+            if state['started'] is None:
+                return 0
+            return int(state['elapsed'] + time.perf_counter() - state['started'] > timeout)
+
+        def timed(call):
+            state['started'] = time.perf_counter()
+            try:
+                return call()
+            finally:
+                state['elapsed'] += time.perf_counter() - state['started']
+                state['started'] = None
+
+        if timeout is not None:
+            conn.set_progress_handler(over_deadline, 10000)
+        try:
+            cursor = timed(lambda: conn.execute(query))
+            columns = [d[0] for d in cursor.description] if cursor.description else []
+            rows_seen = 0
+            yielded = False
+            while True:
+                # Fetch one row past the limit so overflow is detected without reading more
+                size = chunksize if max_rows is None else min(chunksize, max_rows - rows_seen + 1)
+                rows = timed(lambda: cursor.fetchmany(size))
+                if not rows:
+                    break
+                rows_seen += len(rows)
+                if max_rows is not None and rows_seen > max_rows:
+                    raise QueryLimitError(f"Query returned more than {max_rows} rows")
+                yield rows_to_chunk(rows, columns, output)
+                yielded = True
+            if not yielded:
+                yield rows_to_chunk([], columns, output)
+            self.logger.debug(f"Streamed {rows_seen} rows in {state['elapsed']:.2f}s for query: {query}")
+        except sqlite3.OperationalError as e:
+            if timeout is not None and 'interrupted' in str(e):
+                raise TimeoutError(f"Query exceeded {timeout}s timeout") from e
+            self.logger.error(f"Error streaming query: {e}")
+            raise
         finally:
             conn.close()
 
-    def execute_query(self, query: str) -> pd.DataFrame:
-        """Execute a SQL query and return results as DataFrame."""
+    def execute_query(
+        self,
+        query: str,
+        max_rows: Optional[int] = None,
+        timeout: Optional[float] = None
+    ) -> pd.DataFrame:
+        """Execute a SQL query and return results as DataFrame.
+
+        ``max_rows`` and ``timeout`` guard against runaway queries; see iter_query.
+        The query is recorded for the index advisor, which tunes on a
+        background thread so no query waits for index builds.
+        """
         try:
-            conn = self.create_connection()
-            result = pd.read_sql_query(query, conn)
+            cache_key = None
+            if self.result_cache is not None and query.lstrip().lower().startswith(("select", "with")):
+                mentioned = {name.lower() for name in sql_identifiers(query)}
+                versions = {
+                    table: version for table, version in self.table_versions().items()
+                    if table.lower() in mentioned
+                }
+                cache_key = self.result_cache.make_key(query, versions)
+                cached = self.result_cache.get(cache_key)
+                if cached is not None:
+                    self.logger.debug(f"Cache hit for query: {query}")
+                    # A cached result was complete, so it must pass the same row limit
+                    if max_rows is not None and len(cached) > max_rows:
+                        raise QueryLimitError(f"Query returned more than {max_rows} rows")
+                    return cached
+
+            with self.reader() as conn:
+                start = time.perf_counter()
+                if max_rows is None and timeout is None:
+                    result = pd.read_sql_query(query, conn)
+                else:
+                    chunks = list(self.iter_query(query, max_rows=max_rows, timeout=timeout))
+                    result = pd.concat(chunks, ignore_index=True) if len(chunks) > 1 else chunks[0]
+                duration = time.perf_counter() - start
+                should_tune = self.index_advisor is not None and self.index_advisor.observe(conn, query, duration)
             self.logger.debug(f"Executed query: {query}")
+            if should_tune:
+                self._tune_in_background()
+            if cache_key is not None:
+                self.result_cache.put(cache_key, result, tuple(versions))
             return result
         except Exception as e:
             self.logger.error(f"Error executing query: {e}")
             raise
-        finally:
-            conn.close()
+
+    def _tune_in_background(self) -> None:
+        """Start tune_indexes on a daemon thread unless a run is already in progress."""
+        with self._tuning_lock:
+            if self._tuning is not None and self._tuning.is_alive():
+                return
+            self._tuning = threading.Thread(target=self._tune_quietly, name="index-tuning", daemon=True)
+            self._tuning.start()
+
+    def _tune_quietly(self) -> None:
+        try:
+            self.tune_indexes()
+        except Exception:
+            # tune_indexes has already logged it; the next run retries
+            pass
+
+    def tune_indexes(self) -> Dict[str, Dict[str, object]]:
+        """Apply the index advisor's recommendations and return its benefit report.
+
+        This is the maintenance step: ingest_csv runs it, execute_query starts
+        it in the background, and callers may run it explicitly.
+        """
+        if self.index_advisor is None:
+            return {}
+        def write(sql: str) -> None:
+            with self.writer() as conn:
+                conn.execute(sql)
+
+        try:
+            with self.reader() as reader:
+                return self.index_advisor.tune(reader, write)
+        except Exception as e:
+            self.logger.error(f"Error tuning indexes: {e}")
+            raise
+
+    def index_report(self) -> Dict[str, Dict[str, object]]:
+        """Return the benefit report for automatically created indexes."""
+        return self.index_advisor.report() if self.index_advisor is not None else {}
+
+    def refresh_catalog(self, table_name: str) -> Dict[str, Any]:
+        """Recompute and store column statistics for a table at its current version."""
+        try:
+            version = self.table_versions().get(table_name, 0)
+            with self.reader() as conn:
+                catalog = build_table_catalog(conn, table_name)
+            catalog['version'] = version
+            with self.writer() as conn:
+                conn.execute(
+                    f"INSERT OR REPLACE INTO {CATALOG_TABLE} (table_name, version, catalog) VALUES (?, ?, ?)",
+                    (table_name, version, dumps_catalog(catalog))
+                )
+            self._catalogs[table_name] = (version, catalog)
+            return catalog
+        except Exception as e:
+            self.logger.error(f"Error building catalog: {e}")
+            raise
+
+    def refresh_rollups(self, table_name: str, incremental: bool = False) -> List[str]:
+        """Materialize daily/monthly/yearly rollups per key dimension for a base table.
+
+        Does nothing for tables without a detectable date or for rollup tables
+        themselves. Returns the names of the rollup tables kept up to date.
+        """
+        if not self.materialize_rollups:
+            return []
+        try:
+            with self.reader() as conn:
+                if any(r['rollup_table'] == table_name for r in list_rollups(conn)):
+                    return []
+            spec = detect_rollup_spec(self.get_catalog(table_name)[table_name])
+            if spec is None or not spec['grains']:
+                return []
+            with self.writer() as conn:
+                names = build_rollups(conn, table_name, spec, incremental=incremental)
+                for name in names:
+                    self._bump_version(conn, name)
+            return names
+        except Exception as e:
+            self.logger.error(f"Error materializing rollups: {e}")
+            raise
+
+    def drop_table(self, table_name: str) -> None:
+        """Drop a table together with its rollups, bumping their versions as a tombstone."""
+        try:
+            with self.reader() as conn:
+                rollups = [r['rollup_table'] for r in list_rollups(conn, table_name)]
+            with self.writer() as conn:
+                for name in [table_name] + rollups:
+                    conn.execute(f"DROP TABLE IF EXISTS {quote_identifier(name)}")
+                    conn.execute(f"DELETE FROM {CATALOG_TABLE} WHERE table_name = ?", (name,))
+                    conn.execute(f"DELETE FROM {ROLLUPS_TABLE} WHERE rollup_table = ?", (name,))
+                    self._catalogs.pop(name, None)
+                    # Also invalidates cached results for the table
+                    self._bump_version(conn, name)
+            self.logger.debug(f"Dropped table '{table_name}' and {len(rollups)} rollups")
+        except Exception as e:
+            self.logger.error(f"Error dropping table: {e}")
+            raise
+
+    def get_rollups(self, table_name: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Return metadata for materialized rollups, optionally for one base table."""
+        with self.reader() as conn:
+            return list_rollups(conn, table_name)
+
+    def get_catalog(self, table_name: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        """Return column statistics per table, recomputing only when a table's version changed."""
+        versions = self.table_versions()
+        if table_name is not None:
+            versions = {table_name: versions[table_name]} if table_name in versions else {}
+
+        catalogs = {}
+        for table, version in versions.items():
+            cached = self._catalogs.get(table)
+            if cached is None or cached[0] != version:
+                with self.reader() as conn:
+                    row = conn.execute(
+                        f"SELECT version, catalog FROM {CATALOG_TABLE} WHERE table_name = ?", (table,)
+                    ).fetchone()
+                if row is not None and row[0] == version:
+                    cached = (version, loads_catalog(row[1]))
+                    self._catalogs[table] = cached
+                else:
+                    cached = (version, self.refresh_catalog(table))
+            catalogs[table] = cached[1]
+        return catalogs
+
+    def _rollup_tables(self) -> set:
+        with self.reader() as conn:
+            return {r['rollup_table'] for r in list_rollups(conn)}
+
+    def describe_schema(self, tables: Optional[List[str]] = None, max_top_values: int = 3) -> str:
+        """Get the schema with per-column statistics, formatted for prompts.
+
+        Rollup tables are left out unless named in ``tables``.
+        """
+        if tables is None:
+            rollups = self._rollup_tables()
+            tables = [name for name in self.table_versions() if name not in rollups]
+        catalogs = {}
+        for name in tables:
+            catalogs.update(self.get_catalog(name))
+        return format_catalog(catalogs, max_top_values=max_top_values)
 
     def get_schema(self) -> str:
-        """Get the database schema as a string."""
+        """Get the database schema as a string, leaving out rollup tables."""
+        versions_key = tuple(sorted(self.table_versions().items()))
+        if self._schema_cache is not None and self._schema_cache[0] == versions_key:
+            return self._schema_cache[1]
         try:
-            conn = self.create_connection()
-            cursor = conn.cursor()
-            
-            schema_parts = []
-            for table in cursor.execute("SELECT name FROM sqlite_master WHERE type='table';"):
-                table_name = table[0]
-                columns = cursor.execute(f"PRAGMA table_info({table_name});").fetchall()
-                
-                schema_parts.append(f"Table: {table_name}")
-                for col in columns:
-                    schema_parts.append(f"  - {col[1]} ({col[2]})")
-                schema_parts.append("")
-            
-            return "\n".join(schema_parts)
+            rollups = self._rollup_tables()
+            with self.reader() as conn:
+                cursor = conn.cursor()
+                tables = cursor.execute("SELECT name FROM sqlite_master WHERE type='table';").fetchall()
+
+                schema_parts = []
+                for table in tables:
+                    table_name = table[0]
+                    if table_name.startswith(INTERNAL_TABLE_PREFIXES) or table_name in rollups:
+                        continue
+                    columns = cursor.execute(f"PRAGMA table_info({quote_identifier(table_name)});").fetchall()
+
+                    schema_parts.append(f"Table: {table_name}")
+                    for col in columns:
+                        schema_parts.append(f"  - {col[1]} ({col[2]})")
+                    schema_parts.append("")
+
+            schema = "\n".join(schema_parts)
+            self._schema_cache = (versions_key, schema)
+            return schema
         except Exception as e:
             self.logger.error(f"Error getting schema: {e}")
             raise
-        finally:
-            conn.close() 
\ No newline at end of file
+
+def create_database_manager(backend: str, **kwargs):
+    """Create a database manager for a backend ('sqlite' or 'duckdb'), for benchmarks.
+
+    The app, the dataset registry and the SQL fast path always use the
+    SQLite DatabaseManager: ColumnarDatabaseManager only implements the
+    query side (ingest, queries, catalog and schema), not the connections,
+    rollups and index tuning they rely on.
+    """
+    backend = backend.lower()
+    if backend == 'duckdb':
+        from utils.columnar_database import ColumnarDatabaseManager
+        return ColumnarDatabaseManager(**kwargs)
+    if backend == 'sqlite':
+        return DatabaseManager(**kwargs)
+    raise ValueError(f"Unknown database backend: {backend}")
@@ -0,0 +1,275 @@
+import re
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+from utils.data_loader import file_content_hash
+from utils.database import DatabaseManager
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+DATASETS_TABLE = "_baai_datasets"
+UPLOADS_TABLE = "_baai_uploads"
+
+@dataclass
+class DatasetVersion:
+    """One ingested version of a dataset, identified by its content hash."""
+    content_hash: str
+    dataset_id: str
+    version: int
+    table_name: str
+    file_path: str
+    size: int
+    openai_file_id: Optional[str] = None
+
+    @property
+    def dataset_key(self) -> str:
+        """Key shared by the DB layer, caches and the OpenAI file registry."""
+        return f"{self.dataset_id}@{self.version}"
+
+def dataset_id_for(file_path: str) -> str:
+    """Stable dataset id from a file name, ignoring its directory and path separator style."""
+    name = re.split(r"[\\/]", str(file_path))[-1]
+    stem = name.rsplit('.', 1)[0] if '.' in name else name
+    return re.sub(r"\W+", "_", stem).strip("_").lower() or "dataset"
+
+class DatasetRegistry:
+    """Content-addressed registry of uploaded datasets and the tables holding them.
+
+    Each upload is hashed. Identical content always maps to the same
+    DatasetVersion and table, whatever the file is called or where it lives,
+    so nothing is ingested or uploaded twice. New content for an existing
+    dataset id gets the next version number. Each new ingest also garbage
+    collects versions that are superseded and idle.
+    """
+
+    def __init__(self, db: DatabaseManager):
+        self.db = db
+        self.logger = logger
+        self._lock = threading.Lock()
+        # One lock per content hash, so ingests of different datasets run side by side
+        self._table_locks: Dict[str, threading.Lock] = {}
+        with self.db.writer() as conn:
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {DATASETS_TABLE} ("
+                "content_hash TEXT PRIMARY KEY, dataset_id TEXT NOT NULL, version INTEGER NOT NULL, "
+                "table_name TEXT NOT NULL, file_path TEXT NOT NULL, size INTEGER NOT NULL, "
+                "openai_file_id TEXT, ingested INTEGER NOT NULL DEFAULT 0, "
+                "created_at REAL NOT NULL, last_used_at REAL NOT NULL)"
+            )
+            # File ids recorded before uploads were keyed by API may belong to a local stand-in
+            columns = [row[1] for row in conn.execute(f"PRAGMA table_info({UPLOADS_TABLE})")]
+            if columns and 'base_url' not in columns:
+                self.logger.debug(f"Dropping {UPLOADS_TABLE} rows that do not record their API base URL")
+                conn.execute(f"DROP TABLE {UPLOADS_TABLE}")
+            # One row per uploaded variant (format and dropped columns) of a dataset's content and API
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {UPLOADS_TABLE} ("
+                "content_hash TEXT NOT NULL, variant TEXT NOT NULL, base_url TEXT NOT NULL, "
+                "openai_file_id TEXT NOT NULL, original_bytes INTEGER NOT NULL, upload_bytes INTEGER NOT NULL, "
+                "prepare_seconds REAL NOT NULL, upload_seconds REAL NOT NULL, created_at REAL NOT NULL, "
+                "PRIMARY KEY (content_hash, variant, base_url))"
+            )
+
+    def _row_to_version(self, row) -> DatasetVersion:
+        return DatasetVersion(*row)
+
+    def _get(self, content_hash: str) -> Optional[DatasetVersion]:
+        with self.db.reader() as conn:
+            row = conn.execute(
+                f"SELECT content_hash, dataset_id, version, table_name, file_path, size, openai_file_id "
+                f"FROM {DATASETS_TABLE} WHERE content_hash = ?", (content_hash,)
+            ).fetchone()
+        return self._row_to_version(row) if row else None
+
+    def content_hash(self, file_path: str) -> str:
+        """Hash a file, reusing the hash while its size and mtime are unchanged."""
+        return file_content_hash(file_path)
+
+    def _table_lock(self, content_hash: str) -> threading.Lock:
+        with self._lock:
+            return self._table_locks.setdefault(content_hash, threading.Lock())
+
+    def register(self, file_path: str) -> DatasetVersion:
+        """Return the DatasetVersion for a file's content, creating it if the content is new."""
+        content_hash = self.content_hash(file_path)
+        with self._lock:
+            existing = self._get(content_hash)
+            now = time.time()
+            if existing is not None:
+                with self.db.writer() as conn:
+                    conn.execute(
+                        f"UPDATE {DATASETS_TABLE} SET last_used_at = ? WHERE content_hash = ?",
+                        (now, content_hash)
+                    )
+                return existing
+
+            dataset_id = dataset_id_for(file_path)
+            with self.db.writer() as conn:
+                version = conn.execute(
+                    f"SELECT COALESCE(MAX(version), 0) + 1 FROM {DATASETS_TABLE} WHERE dataset_id = ?",
+                    (dataset_id,)
+                ).fetchone()[0]
+                table_name = f"{dataset_id}_v{version}"
+                conn.execute(
+                    f"INSERT INTO {DATASETS_TABLE} (content_hash, dataset_id, version, table_name, file_path, "
+                    "size, created_at, last_used_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (content_hash, dataset_id, version, table_name, str(file_path),
+                     Path(file_path).stat().st_size, now, now)
+                )
+            self.logger.debug(f"Registered dataset {dataset_id} v{version} ({content_hash[:12]}) from {file_path}")
+            return self._get(content_hash)
+
+    def ensure_table(self, file_path: str) -> DatasetVersion:
+        """Register a file and ingest it unless a table with the same content already exists."""
+        version = self.register(file_path)
+        with self._table_lock(version.content_hash):
+            with self.db.reader() as conn:
+                ingested = conn.execute(
+                    f"SELECT ingested FROM {DATASETS_TABLE} WHERE content_hash = ?", (version.content_hash,)
+                ).fetchone()[0]
+            if ingested and version.table_name in self.db.table_versions():
+                return version
+            self.db.ingest_csv(file_path, version.table_name)
+            with self.db.writer() as conn:
+                conn.execute(
+                    f"UPDATE {DATASETS_TABLE} SET ingested = 1 WHERE content_hash = ?", (version.content_hash,)
+                )
+        try:
+            self.garbage_collect()
+        except Exception as e:
+            # The new table is in place; old versions are retried on the next ingest
+            self.logger.error(f"Error garbage collecting datasets: {e}")
+        return version
+
+    def set_openai_file_id(self, content_hash: str, file_id: str) -> None:
+        """Remember the OpenAI file uploaded for this content."""
+        with self.db.writer() as conn:
+            conn.execute(
+                f"UPDATE {DATASETS_TABLE} SET openai_file_id = ? WHERE content_hash = ?", (file_id, content_hash)
+            )
+
+    def find_upload(self, content_hash: str, variant: str, base_url: str) -> Optional[str]:
+        """Return the file already uploaded to the API at ``base_url`` for this content and variant, if any."""
+        with self.db.reader() as conn:
+            row = conn.execute(
+                f"SELECT openai_file_id FROM {UPLOADS_TABLE} WHERE content_hash = ? AND variant = ? AND base_url = ?",
+                (content_hash, variant, base_url)
+            ).fetchone()
+        return row[0] if row else None
+
+    def record_upload(
+        self,
+        content_hash: str,
+        variant: str,
+        base_url: str,
+        file_id: str,
+        original_bytes: int,
+        upload_bytes: int,
+        prepare_seconds: float,
+        upload_seconds: float
+    ) -> None:
+        """Record an uploaded variant and the bytes it saved over the raw file."""
+        with self.db.writer() as conn:
+            conn.execute(
+                f"INSERT OR REPLACE INTO {UPLOADS_TABLE} (content_hash, variant, base_url, openai_file_id, "
+                "original_bytes, upload_bytes, prepare_seconds, upload_seconds, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (content_hash, variant, base_url, file_id, original_bytes, upload_bytes,
+                 prepare_seconds, upload_seconds, time.time())
+            )
+
+    def forget_upload(self, content_hash: str, variant: str, base_url: str) -> None:
+        """Drop a recorded upload whose file no longer exists at the API."""
+        with self.db.writer() as conn:
+            conn.execute(
+                f"DELETE FROM {UPLOADS_TABLE} WHERE content_hash = ? AND variant = ? AND base_url = ?",
+                (content_hash, variant, base_url)
+            )
+
+    def upload_savings(self, content_hash: Optional[str] = None) -> List[Dict[str, object]]:
+        """List recorded uploads with bytes saved, newest first."""
+        query = (
+            f"SELECT u.content_hash, d.dataset_id, d.version, u.variant, u.base_url, u.openai_file_id, u.original_bytes, "
+            f"u.upload_bytes, u.prepare_seconds, u.upload_seconds, u.created_at FROM {UPLOADS_TABLE} u "
+            f"LEFT JOIN {DATASETS_TABLE} d ON d.content_hash = u.content_hash"
+        )
+        params: tuple = ()
+        if content_hash is not None:
+            query += " WHERE u.content_hash = ?"
+            params = (content_hash,)
+        with self.db.reader() as conn:
+            rows = conn.execute(query + " ORDER BY u.created_at DESC", params).fetchall()
+        keys = ('content_hash', 'dataset_id', 'version', 'variant', 'base_url', 'openai_file_id', 'original_bytes',
+                'upload_bytes', 'prepare_seconds', 'upload_seconds', 'created_at')
+        savings = []
+        for row in rows:
+            entry = dict(zip(keys, row))
+            entry['bytes_saved'] = entry['original_bytes'] - entry['upload_bytes']
+            entry['saved_ratio'] = entry['bytes_saved'] / entry['original_bytes'] if entry['original_bytes'] else 0.0
+            savings.append(entry)
+        return savings
+
+    def versions(self, dataset_id: Optional[str] = None) -> List[DatasetVersion]:
+        """List registered versions, newest first."""
+        query = (
+            f"SELECT content_hash, dataset_id, version, table_name, file_path, size, openai_file_id "
+            f"FROM {DATASETS_TABLE}"
+        )
+        params: tuple = ()
+        if dataset_id is not None:
+            query += " WHERE dataset_id = ?"
+            params = (dataset_id,)
+        with self.db.reader() as conn:
+            rows = conn.execute(query + " ORDER BY dataset_id, version DESC", params).fetchall()
+        return [self._row_to_version(row) for row in rows]
+
+    def garbage_collect(self, keep_versions: int = 1, max_idle_seconds: float = 7 * 24 * 3600) -> List[str]:
+        """Drop tables of superseded versions that have not been used recently.
+
+        The newest ``keep_versions`` versions of every dataset are always kept.
+        Returns the dropped table names.
+        """
+        cutoff = time.time() - max_idle_seconds
+        with self.db.reader() as conn:
+            rows = conn.execute(
+                f"SELECT content_hash, table_name, version, dataset_id, last_used_at FROM {DATASETS_TABLE} "
+                "ORDER BY dataset_id, version DESC"
+            ).fetchall()
+
+        dropped = []
+        kept_per_dataset: Dict[str, int] = {}
+        for content_hash, table_name, _, dataset_id, last_used_at in rows:
+            kept = kept_per_dataset.get(dataset_id, 0)
+            if kept < keep_versions or last_used_at >= cutoff:
+                kept_per_dataset[dataset_id] = kept + 1
+                continue
+            with self._table_lock(content_hash):
+                self.db.drop_table(table_name)
+                with self.db.writer() as conn:
+                    conn.execute(f"DELETE FROM {DATASETS_TABLE} WHERE content_hash = ?", (content_hash,))
+                    conn.execute(f"DELETE FROM {UPLOADS_TABLE} WHERE content_hash = ?", (content_hash,))
+            dropped.append(table_name)
+
+        if dropped:
+            self.logger.debug(f"Garbage collected dataset tables: {dropped}")
+        return dropped
+
+# Process-wide registry
+_registry: Optional[DatasetRegistry] = None
+_registry_lock = threading.Lock()
+
+def get_dataset_registry(db: Optional[DatabaseManager] = None) -> DatasetRegistry:
+    """Get the shared dataset registry, creating it on first use.
+
+    The registry always lives in SQLite (data/analysis.db by default); its
+    bookkeeping tables and the fast path's rollups need DatabaseManager's
+    pooled connections.
+    """
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = DatasetRegistry(db or DatabaseManager())
+        return _registry
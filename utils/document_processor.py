@@ -5,6 +5,7 @@ from dotenv import load_dotenv
 
 from agents.master_agent import MasterAgent
 from config import UPLOADS_DIR
+from utils.data_loader import write_sidecar
 
 # Initialize environment and API key
 load_dotenv()
@@ -38,7 +39,11 @@ def save_uploaded_file(file_content: bytes, filename: str) -> str:
         # Write file to disk
         with open(file_path, 'wb') as f:
             f.write(file_content)
-        
+
+        # Convert CSVs once so later loads memory-map the data instead of re-parsing it
+        if file_path.suffix.lower() == '.csv':
+            write_sidecar(str(file_path))
+
         return str(file_path)
     except Exception as e:
         raise ValueError(f"File upload failed: {str(e)}") 
\ No newline at end of file
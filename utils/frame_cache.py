@@ -0,0 +1,199 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from config import FRAME_CACHE_MB
+from utils.chunked import ChunkedFrame, is_out_of_core
+from utils.data_loader import file_content_hash, load_csv
+from utils.dataset_registry import dataset_id_for
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Rows of a file above the out-of-core threshold that are kept in memory
+OUT_OF_CORE_SAMPLE_ROWS = 1000
+
+# Copy-on-write is always on from pandas 3.0
+_PANDAS_3 = int(pd.__version__.split('.')[0]) >= 3
+
+def _copy_on_write() -> bool:
+    return _PANDAS_3 or pd.get_option('mode.copy_on_write') is True
+
+def _freeze(df: pd.DataFrame) -> None:
+    """Make the numpy arrays behind a frame read-only.
+
+    Without copy-on-write, in-place edits through a shallow copy would reach
+    the cached frame; on read-only arrays they raise ValueError instead.
+    Switching copy-on-write on is not an option because it would change
+    pandas behaviour for the whole process.
+    """
+    for block in df._mgr.blocks:
+        values = block.values
+        # Extension arrays (datetimes, categoricals, nullable ints) keep their numpy data in these
+        for array in [values] + [getattr(values, name, None) for name in ('_ndarray', '_codes', '_data', '_mask')]:
+            if isinstance(array, np.ndarray):
+                array.flags.writeable = False
+
+@dataclass
+class _Entry:
+    df: pd.DataFrame
+    dataset: str
+    size: int
+    loaded_at: float
+    last_used_at: float
+    hits: int = 0
+
+class FrameCache:
+    """Process-wide LRU cache of loaded DataFrames, shared across sessions.
+
+    Frames are keyed by the content hash of the file, which identifies the
+    dataset version, plus the requested columns. Callers get a shallow copy,
+    so sessions share one copy of the data; copy-on-write, or read-only
+    arrays on pandas 2 without it, keeps them from changing the cached frame.
+    Least recently used frames are evicted once ``max_bytes`` is exceeded;
+    frames larger than the budget are not cached.
+    """
+
+    def __init__(self, max_bytes: int = 1024 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.logger = logger
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[str, Optional[Tuple[str, ...]]], _Entry]" = OrderedDict()
+        self._loading: Dict[tuple, threading.Lock] = {}
+        self._bytes = 0
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+    def _lookup(self, content_hash: str, columns: Optional[Tuple[str, ...]]) -> Optional[pd.DataFrame]:
+        """Return a view of a cached frame, serving column subsets from a cached full frame."""
+        with self._lock:
+            for key in ((content_hash, columns), (content_hash, None)):
+                entry = self._entries.get(key)
+                if entry is None or (key[1] is None and columns is not None
+                                     and not set(columns) <= set(entry.df.columns)):
+                    continue
+                self._entries.move_to_end(key)
+                entry.hits += 1
+                entry.last_used_at = time.time()
+                self._stats['hits'] += 1
+                df = entry.df if key[1] == columns else entry.df[list(columns)]
+                return df.copy(deep=False)
+        return None
+
+    def get(self, file_path: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """Return the DataFrame for a CSV, loading it once per content and column set."""
+        content_hash = file_content_hash(file_path)
+        column_key = tuple(columns) if columns is not None else None
+        df = self._lookup(content_hash, column_key)
+        if df is not None:
+            return df
+
+        # Sessions asking for the same frame at once wait for a single load
+        key = (content_hash, column_key)
+        with self._lock:
+            load_lock = self._loading.setdefault(key, threading.Lock())
+        with load_lock:
+            df = self._lookup(content_hash, column_key)
+            if df is not None:
+                return df
+            try:
+                df = load_csv(file_path, columns=columns)
+            finally:
+                with self._lock:
+                    self._loading.pop(key, None)
+            with self._lock:
+                self._stats['misses'] += 1
+            self.put(content_hash, column_key, df, f"{dataset_id_for(file_path)}@{content_hash[:12]}")
+            return df.copy(deep=False)
+
+    def put(
+        self,
+        content_hash: str,
+        columns: Optional[Tuple[str, ...]],
+        df: pd.DataFrame,
+        dataset: str
+    ) -> None:
+        """Cache a frame, evicting least recently used frames to stay within budget."""
+        size = int(df.memory_usage(index=True, deep=True).sum())
+        if size > self.max_bytes:
+            self.logger.debug(f"Not caching {dataset}: {size / 1e6:.1f}MB exceeds the frame cache budget")
+            return
+        if not _copy_on_write():
+            _freeze(df)
+        now = time.time()
+        with self._lock:
+            key = (content_hash, columns)
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key).size
+            self._entries[key] = _Entry(df, dataset, size, now, now)
+            self._bytes += size
+            while self._bytes > self.max_bytes and self._entries:
+                evicted_key, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.size
+                self._stats['evictions'] += 1
+                self.logger.debug(f"Evicted {evicted.dataset} {evicted_key[1] or 'all columns'} from frame cache")
+
+    def clear(self) -> None:
+        """Drop every cached frame."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, float]:
+        """Return hit/miss counters and current memory use."""
+        with self._lock:
+            lookups = self._stats['hits'] + self._stats['misses']
+            return {
+                **self._stats,
+                'hit_rate': self._stats['hits'] / lookups if lookups else 0.0,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+            }
+
+    def residency(self) -> List[Dict[str, object]]:
+        """Describe the cached frames, most recently used first."""
+        with self._lock:
+            return [
+                {
+                    'dataset': entry.dataset,
+                    'columns': ', '.join(key[1]) if key[1] else 'all',
+                    'rows': len(entry.df),
+                    'mb': round(entry.size / 1e6, 2),
+                    'hits': entry.hits,
+                    'loaded_at': time.strftime('%H:%M:%S', time.localtime(entry.loaded_at)),
+                    'last_used_at': time.strftime('%H:%M:%S', time.localtime(entry.last_used_at)),
+                }
+                for key, entry in reversed(self._entries.items())
+            ]
+
+# Process-wide cache so every Streamlit session shares loaded frames
+_frame_cache: Optional[FrameCache] = None
+_frame_cache_lock = threading.Lock()
+
+def get_frame_cache() -> FrameCache:
+    """Get the shared DataFrame cache, creating it on first use."""
+    global _frame_cache
+    with _frame_cache_lock:
+        if _frame_cache is None:
+            _frame_cache = FrameCache(max_bytes=FRAME_CACHE_MB * 1024 * 1024)
+        return _frame_cache
+
+def load_dataset(
+    file_path: str,
+    columns: Optional[List[str]] = None
+) -> Tuple[pd.DataFrame, Optional[ChunkedFrame]]:
+    """Return a frame for local processing and, for large files, a stream over the whole file.
+
+    Files up to OUT_OF_CORE_THRESHOLD_MB come whole from the shared frame
+    cache, with no stream. Larger files are never loaded in one piece: the
+    frame holds their first OUT_OF_CORE_SAMPLE_ROWS rows, and the
+    ChunkedFrame aggregates every row exactly, one chunk at a time.
+    """
+    if not is_out_of_core(file_path):
+        return get_frame_cache().get(file_path, columns=columns), None
+    dataset = ChunkedFrame(file_path, columns=columns)
+    logger.debug(f"Streaming {file_path}: above the out-of-core threshold")
+    return dataset.head(OUT_OF_CORE_SAMPLE_ROWS), dataset
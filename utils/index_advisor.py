@@ -0,0 +1,202 @@
+import re
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Only indexes with this prefix are ever dropped by the advisor
+INDEX_PREFIX = "auto_idx_"
+
+_SCAN_RE = re.compile(r"^SCAN (?:TABLE )?(\S+)", re.IGNORECASE)
+_CLAUSE_RE = re.compile(
+    r"\b(WHERE|GROUP\s+BY|ORDER\s+BY|HAVING|LIMIT|UNION|JOIN)\b",
+    re.IGNORECASE
+)
+_IDENT_RE = re.compile(r'"((?:[^"]|"")+)"|`([^`]+)`|\[([^\]]+)\]|\b([A-Za-z_][A-Za-z0-9_]*)\b')
+
+def _quote(name: str) -> str:
+    return '"' + str(name).replace('"', '""') + '"'
+
+def _split_clauses(query: str) -> Dict[str, str]:
+    """Return the text of the WHERE and GROUP BY clauses of a query."""
+    clauses: Dict[str, str] = {}
+    parts = _CLAUSE_RE.split(query)
+    # parts = [head, keyword, body, keyword, body, ...]
+    for keyword, body in zip(parts[1::2], parts[2::2]):
+        key = " ".join(keyword.upper().split())
+        if key in ("WHERE", "GROUP BY"):
+            clauses[key] = clauses.get(key, "") + " " + body
+    return clauses
+
+def sql_identifiers(text: str) -> List[str]:
+    """Return identifiers mentioned in a SQL fragment, in order."""
+    names = []
+    for match in _IDENT_RE.finditer(text):
+        name = next(group for group in match.groups() if group is not None)
+        names.append(name.replace('""', '"'))
+    return names
+
+class IndexAdvisor:
+    """Workload-driven secondary index advisor for a SQLite database.
+
+    Every executed query is checked with EXPLAIN QUERY PLAN. Queries that full
+    scan a table contribute their WHERE columns (or GROUP BY columns when there
+    is no predicate) as an index candidate, weighted by observed runtime.
+    ``tune`` keeps the best candidates indexed within ``budget`` and drops
+    advisor indexes that fall out of the top set. Indexes are only dropped on
+    tables whose workload this advisor has observed, so a fresh process with
+    no workload yet leaves existing indexes alone.
+    """
+
+    def __init__(self, budget: int = 8, tune_every: int = 20, sample_queries: int = 3):
+        self.budget = budget
+        self.tune_every = tune_every
+        self.sample_queries = sample_queries
+        self.logger = logger
+        self._lock = threading.Lock()
+        self._observed = 0
+        # (table, columns) -> {'count', 'total_seconds', 'queries'}
+        self._candidates: Dict[Tuple[str, Tuple[str, ...]], Dict[str, Any]] = defaultdict(
+            lambda: {'count': 0, 'total_seconds': 0.0, 'queries': []}
+        )
+        # index name -> benefit report
+        self._benefits: Dict[str, Dict[str, Any]] = {}
+
+    @staticmethod
+    def index_name(table: str, columns: Tuple[str, ...]) -> str:
+        """Deterministic name for an advisor index."""
+        raw = "_".join((table,) + columns)
+        return INDEX_PREFIX + re.sub(r"\W", "_", raw)
+
+    def scanned_tables(self, conn: sqlite3.Connection, query: str) -> List[str]:
+        """Return tables that the query plan reads with a full scan."""
+        tables = []
+        for row in conn.execute(f"EXPLAIN QUERY PLAN {query}").fetchall():
+            match = _SCAN_RE.match(row[-1])
+            if match and "USING" not in row[-1].upper():
+                tables.append(match.group(1).strip('"'))
+        return tables
+
+    def observe(self, conn: sqlite3.Connection, query: str, duration: float) -> bool:
+        """Record a query; return True when it is time to call ``tune``."""
+        try:
+            tables = self.scanned_tables(conn, query)
+        except sqlite3.Error as e:
+            self.logger.debug(f"Index advisor could not explain query: {e}")
+            return False
+
+        clauses = _split_clauses(query)
+        for table in tables:
+            table_columns = [
+                row[1] for row in conn.execute(f'PRAGMA table_info({_quote(table)})').fetchall()
+            ]
+            lookup = {col.lower(): col for col in table_columns}
+
+            def columns_in(text: str) -> Tuple[str, ...]:
+                seen = []
+                for name in sql_identifiers(text):
+                    col = lookup.get(name.lower())
+                    if col and col not in seen:
+                        seen.append(col)
+                return tuple(seen[:3])
+
+            columns = columns_in(clauses.get("WHERE", "")) or columns_in(clauses.get("GROUP BY", ""))
+            if not columns:
+                continue
+
+            with self._lock:
+                candidate = self._candidates[(table, columns)]
+                candidate['count'] += 1
+                candidate['total_seconds'] += duration
+                if len(candidate['queries']) < self.sample_queries and query not in candidate['queries']:
+                    candidate['queries'].append(query)
+
+        with self._lock:
+            self._observed += 1
+            return self.tune_every > 0 and self._observed % self.tune_every == 0
+
+    def _time_queries(self, conn: sqlite3.Connection, queries: List[str]) -> float:
+        start = time.perf_counter()
+        for query in queries:
+            try:
+                conn.execute(query).fetchall()
+            except sqlite3.Error:
+                pass
+        return time.perf_counter() - start
+
+    def tune(self, reader: sqlite3.Connection, write: Callable[[str], None]) -> Dict[str, Dict[str, Any]]:
+        """Create the best-scoring indexes within budget and drop stale ones.
+
+        ``write`` runs one DDL statement in its own write transaction, so the
+        writer is only held while an index is created or dropped; the sample
+        queries are timed on ``reader`` in between.
+        """
+        existing_tables = {
+            row[0] for row in reader.execute("SELECT name FROM sqlite_master WHERE type='table'").fetchall()
+        }
+        existing_indexes = {
+            row[0]: row[1] for row in reader.execute(
+                "SELECT name, tbl_name FROM sqlite_master WHERE type='index' AND name LIKE ?",
+                (INDEX_PREFIX + "%",)
+            ).fetchall()
+        }
+
+        with self._lock:
+            observed_tables = {table for table, _ in self._candidates}
+            ranked = sorted(
+                (
+                    (key, dict(stats, queries=list(stats['queries'])))
+                    for key, stats in self._candidates.items()
+                    if key[0] in existing_tables
+                ),
+                key=lambda item: item[1]['total_seconds'],
+                reverse=True
+            )[:self.budget]
+
+        wanted = {self.index_name(table, columns): (table, columns, stats) for (table, columns), stats in ranked}
+
+        for name, table in existing_indexes.items():
+            if name in wanted or table not in observed_tables:
+                continue
+            write(f'DROP INDEX IF EXISTS {_quote(name)}')
+            with self._lock:
+                self._benefits.pop(name, None)
+            self.logger.debug(f"Dropped index '{name}'")
+
+        for name, (table, columns, stats) in wanted.items():
+            if name in existing_indexes:
+                continue
+            before = self._time_queries(reader, stats['queries'])
+            column_sql = ", ".join(_quote(col) for col in columns)
+            write(f'CREATE INDEX IF NOT EXISTS {_quote(name)} ON {_quote(table)} ({column_sql})')
+            after = self._time_queries(reader, stats['queries'])
+            report = {
+                'table': table,
+                'columns': list(columns),
+                'observed_queries': stats['count'],
+                'observed_seconds': stats['total_seconds'],
+                'sample_seconds_before': before,
+                'sample_seconds_after': after,
+                'speedup': before / after if after > 0 else None,
+            }
+            with self._lock:
+                self._benefits[name] = report
+            self.logger.debug(f"Created index '{name}' on {table}({', '.join(columns)}): {before:.4f}s -> {after:.4f}s")
+
+        return self.report()
+
+    def report(self) -> Dict[str, Dict[str, Any]]:
+        """Return the benefit report for each advisor-created index."""
+        with self._lock:
+            return {name: dict(report) for name, report in self._benefits.items()}
+
+    def reset(self, table: Optional[str] = None) -> None:
+        """Forget observed workload, for one table or all of them."""
+        with self._lock:
+            for key in list(self._candidates):
+                if table is None or key[0] == table:
+                    del self._candidates[key]
@@ -0,0 +1,443 @@
+import argparse
+import base64
+import gzip
+import hashlib
+import itertools
+import json
+import re
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict, deque
+from dataclasses import asdict, dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_UPSTREAM = "https://api.openai.com/v1"
+CASSETTE_DIR = Path("data/cassettes")
+MODES = ('record', 'replay', 'synthetic')
+EMBEDDING_DIMENSIONS = 1536
+
+# Request headers passed through to the API when recording; the key is never written to a cassette
+_FORWARD_HEADERS = ('authorization', 'content-type', 'openai-beta', 'openai-organization', 'openai-project')
+
+@dataclass
+class Interaction:
+    """One recorded request and the response the API gave to it."""
+    method: str
+    path: str
+    request_key: str
+    status: int
+    content_type: str
+    body: str
+    latency: float
+    # Bodies that are not UTF-8 text (downloaded file content) are stored base64-encoded
+    binary: bool = False
+
+    def response_bytes(self) -> bytes:
+        return base64.b64decode(self.body) if self.binary else self.body.encode('utf-8')
+
+def request_key(method: str, path: str, content_type: str, body: bytes) -> str:
+    """Key identifying a request independent of transport details.
+
+    JSON bodies are compared with sorted keys, and the random boundary of
+    multipart uploads is removed so the same file uploads to the same key.
+    """
+    if 'application/json' in content_type and body:
+        try:
+            body = json.dumps(json.loads(body), sort_keys=True).encode()
+        except json.JSONDecodeError:
+            pass
+    elif 'multipart/form-data' in content_type and 'boundary=' in content_type:
+        boundary = content_type.split('boundary=', 1)[1].strip('"').encode()
+        body = body.replace(boundary, b'')
+    return f"{method} {path} {hashlib.sha256(body).hexdigest()[:16]}"
+
+class Cassette:
+    """Recorded interactions of one or more sessions, stored as gzipped JSON lines.
+
+    Replay matches each request to the next unused recording with the same
+    method, path and body, so concurrent clients get their own responses
+    in recorded order. When those run out (a client polling a run more
+    often than during recording) the last one is served again, and a
+    request with an unseen body falls back to recordings of the same path.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._by_key: Dict[str, deque] = defaultdict(deque)
+        self._by_path: Dict[Tuple[str, str], deque] = defaultdict(deque)
+        self._last: Dict[str, Interaction] = {}
+        self.interactions: List[Interaction] = []
+
+    def load(self) -> 'Cassette':
+        with gzip.open(self.path, 'rt', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    self._index(Interaction(**json.loads(line)))
+        logger.debug(f"Loaded {len(self.interactions)} interactions from {self.path}")
+        return self
+
+    def _index(self, interaction: Interaction) -> None:
+        self.interactions.append(interaction)
+        self._by_key[interaction.request_key].append(interaction)
+        self._by_path[(interaction.method, interaction.path)].append(interaction)
+
+    def append(self, interaction: Interaction) -> None:
+        """Record an interaction and write it out immediately."""
+        with self._lock:
+            self._index(interaction)
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            # Appending gzip members keeps earlier lines readable if recording is interrupted
+            with gzip.open(self.path, 'at', encoding='utf-8') as f:
+                f.write(json.dumps(asdict(interaction)) + '\n')
+
+    def match(self, method: str, path: str, key: str) -> Optional[Interaction]:
+        """Take the next recording for a request, or None when nothing was recorded for its path."""
+        route = f"{method} {path}"
+        with self._lock:
+            if self._by_key.get(key):
+                interaction = self._by_key[key].popleft()
+                self._by_path[(method, path)].remove(interaction)
+            elif key in self._last:
+                return self._last[key]
+            elif self._by_path.get((method, path)):
+                interaction = self._by_path[(method, path)].popleft()
+                self._by_key[interaction.request_key].remove(interaction)
+            else:
+                return self._last.get(route)
+            self._last[key] = self._last[route] = interaction
+            return interaction
+
+class SyntheticAPI:
+    """Stateful fake of the endpoints the app uses, for load tests without recordings.
+
+    Files, assistants, threads and messages are kept in memory. A run
+    stays in progress for ``run_seconds`` and then completes with a JSON
+    analysis answer posted to its thread; chat completions take
+    ``chat_seconds``. Unknown ids are accepted, so clients holding ids from
+    earlier sessions (e.g. reused uploads) keep working.
+    """
+
+    def __init__(self, run_seconds: float = 3.0, chat_seconds: float = 0.5, request_seconds: float = 0.02):
+        self.run_seconds = run_seconds
+        self.chat_seconds = chat_seconds
+        self.request_seconds = request_seconds
+        # Set by StandIn from its latency_scale
+        self.latency_scale = 1.0
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._messages: Dict[str, List[dict]] = defaultdict(list)
+        self._runs: Dict[str, dict] = {}
+
+    def _id(self, prefix: str) -> str:
+        return f"{prefix}{next(self._ids):08d}"
+
+    def _message(self, thread_id: str, role: str, text: str) -> dict:
+        message = {
+            'id': self._id('msg_'), 'object': 'thread.message', 'created_at': int(time.time()),
+            'thread_id': thread_id, 'role': role, 'attachments': [], 'metadata': {},
+            'content': [{'type': 'text', 'text': {'value': text, 'annotations': []}}],
+        }
+        self._messages[thread_id].append(message)
+        return message
+
+    def _run_status(self, run: dict) -> dict:
+        """Complete a run once its time is up, posting the answer to the thread."""
+        if run['status'] in ('queued', 'in_progress') and time.time() >= run['_done_at']:
+            run['status'] = 'completed'
+            answer = {
+                'code': "import pandas as pd\ndf = pd.read_csv(path)",
+                'steps': ["Load the data", "Compute the answer"],
+                'results': ["Synthetic result"],
+                'final_answer': f"Synthetic answer to: {run['_question']}",
+            }
+            self._message(run['thread_id'], 'assistant', json.dumps(answer))
+        elif run['status'] == 'queued':
+            run['status'] = 'in_progress'
+        return {key: value for key, value in run.items() if not key.startswith('_')}
+
+    def handle(self, method: str, path: str, body: bytes) -> Tuple[int, dict]:
+        """Answer one request with (status, JSON body)."""
+        route, _, query = path.partition('?')
+        params = {key: values[0] for key, values in parse_qs(query).items()}
+        payload = json.loads(body) if body and body.lstrip().startswith(b'{') else {}
+        now = int(time.time())
+        with self._lock:
+            if route == '/files' and method == 'POST':
+                name = re.search(rb'filename="([^"]+)"', body)
+                return 200, {
+                    'id': self._id('file-'), 'object': 'file', 'bytes': len(body), 'created_at': now,
+                    'filename': name.group(1).decode() if name else 'upload.csv', 'purpose': 'assistants',
+                    'status': 'processed',
+                }
+            match = re.fullmatch(r'/files/([^/]+)', route)
+            if match:
+                return 200, {
+                    'id': match.group(1), 'object': 'file', 'bytes': 0, 'created_at': now,
+                    'filename': 'upload.csv', 'purpose': 'assistants', 'status': 'processed',
+                }
+            if route == '/assistants' and method == 'POST':
+                return 200, {
+                    'id': self._id('asst_'), 'object': 'assistant', 'created_at': now,
+                    'model': payload.get('model', ''), 'name': payload.get('name'), 'description': None,
+                    'instructions': payload.get('instructions'), 'tools': payload.get('tools', []), 'metadata': {},
+                }
+            if route == '/threads' and method == 'POST':
+                return 200, {'id': self._id('thread_'), 'object': 'thread', 'created_at': now, 'metadata': {}}
+
+            match = re.fullmatch(r'/threads/([^/]+)/messages', route)
+            if match and method == 'POST':
+                content = payload.get('content', '')
+                text = content if isinstance(content, str) else ' '.join(
+                    block.get('text', '') for block in content if isinstance(block, dict)
+                )
+                return 200, self._message(match.group(1), payload.get('role', 'user'), text)
+            if match:
+                messages = self._messages[match.group(1)]
+                messages = list(reversed(messages)) if params.get('order', 'desc') == 'desc' else list(messages)
+                if 'limit' in params:
+                    messages = messages[:int(params['limit'])]
+                return 200, {'object': 'list', 'data': messages, 'has_more': False}
+
+            match = re.fullmatch(r'/threads/([^/]+)/runs', route)
+            if match and method == 'POST':
+                thread_id = match.group(1)
+                user_messages = [m for m in self._messages[thread_id] if m['role'] == 'user']
+                question = user_messages[-1]['content'][0]['text']['value'] if user_messages else ''
+                run = {
+                    'id': self._id('run_'), 'object': 'thread.run', 'created_at': now, 'thread_id': thread_id,
+                    'assistant_id': payload.get('assistant_id', ''), 'status': 'queued', 'model': '',
+                    'instructions': payload.get('instructions', ''), 'tools': [], 'parallel_tool_calls': True,
+                    '_done_at': time.time() + self.run_seconds * self.latency_scale, '_question': question,
+                }
+                self._runs[run['id']] = run
+                return 200, self._run_status(run)
+            if match:
+                runs = [self._run_status(r) for r in self._runs.values() if r['thread_id'] == match.group(1)]
+                return 200, {'object': 'list', 'data': runs, 'has_more': False}
+            match = re.fullmatch(r'/threads/([^/]+)/runs/([^/]+)(/cancel)?', route)
+            if match:
+                run = self._runs.get(match.group(2))
+                if run is None:
+                    return 404, {'error': {'message': f"No run {match.group(2)}", 'type': 'invalid_request_error'}}
+                if match.group(3):
+                    run['status'] = 'cancelled'
+                return 200, self._run_status(run)
+
+            if route == '/chat/completions':
+                json_mode = (payload.get('response_format') or {}).get('type') in ('json_object', 'json_schema')
+                return 200, {
+                    'id': self._id('chatcmpl-'), 'object': 'chat.completion', 'created': now,
+                    'model': payload.get('model', ''),
+                    'choices': [{
+                        'index': 0, 'finish_reason': 'stop',
+                        # An empty JSON object makes the SQL fast path fall back to the code interpreter
+                        'message': {'role': 'assistant', 'content': '{}' if json_mode else 'Synthetic summary.'},
+                    }],
+                    'usage': {'prompt_tokens': 0, 'completion_tokens': 0, 'total_tokens': 0},
+                }
+            if route == '/embeddings':
+                inputs = payload.get('input', [])
+                inputs = [inputs] if isinstance(inputs, str) or (inputs and isinstance(inputs[0], int)) else inputs
+                return 200, {
+                    'object': 'list', 'model': payload.get('model', ''),
+                    'data': [
+                        {'object': 'embedding', 'index': i, 'embedding': [0.0] * EMBEDDING_DIMENSIONS}
+                        for i in range(len(inputs))
+                    ],
+                    'usage': {'prompt_tokens': 0, 'total_tokens': 0},
+                }
+        return 404, {'error': {'message': f"Unsupported {method} {route}", 'type': 'invalid_request_error'}}
+
+    def delay(self, path: str) -> float:
+        """Simulated server time for a request."""
+        seconds = self.chat_seconds if path.startswith('/chat/completions') else self.request_seconds
+        return seconds * self.latency_scale
+
+class StandIn:
+    """Local HTTP stand-in for the OpenAI endpoints the app uses.
+
+    In ``record`` mode every request is forwarded to ``upstream`` and the
+    response is saved to the cassette with its latency. In ``replay`` mode
+    requests are answered from the cassette after the recorded latency
+    multiplied by ``latency_scale`` (0 answers immediately). In
+    ``synthetic`` mode no cassette is needed: SyntheticAPI simulates the
+    endpoints, with its latencies scaled the same way. Point clients at it
+    with ``OPENAI_BASE_URL=<base_url>``.
+    """
+
+    def __init__(
+        self,
+        cassette: Optional[Path] = None,
+        mode: str = 'replay',
+        upstream: str = DEFAULT_UPSTREAM,
+        latency_scale: float = 1.0,
+        host: str = '127.0.0.1',
+        port: int = 0,
+        synthetic: Optional[SyntheticAPI] = None
+    ):
+        if mode not in MODES:
+            raise ValueError(f"Unknown mode '{mode}', expected one of {MODES}")
+        if mode != 'synthetic' and cassette is None:
+            raise ValueError(f"Mode '{mode}' needs a cassette")
+        self.mode = mode
+        self.upstream = upstream.rstrip('/')
+        self.latency_scale = latency_scale
+        self.cassette = Cassette(cassette) if cassette is not None else None
+        self.synthetic = (synthetic or SyntheticAPI()) if mode == 'synthetic' else None
+        if self.synthetic is not None:
+            self.synthetic.latency_scale = latency_scale
+        if mode == 'replay':
+            self.cassette.load()
+        self.requests = 0
+        self.misses = 0
+        self._stats_lock = threading.Lock()
+        self.logger = logger
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> 'StandIn':
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        self.logger.info(f"OpenAI stand-in ({self.mode}) listening on {self.base_url}")
+        return self
+
+    def serve_forever(self) -> None:
+        """Serve in the calling thread until interrupted."""
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> 'StandIn':
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def _forward(self, method: str, path: str, headers: dict, body: bytes) -> Tuple[int, str, bytes]:
+        request = urllib.request.Request(self.upstream + path, data=body or None, method=method)
+        for name, value in headers.items():
+            if name.lower() in _FORWARD_HEADERS:
+                request.add_header(name, value)
+        try:
+            with urllib.request.urlopen(request, timeout=600) as response:
+                return response.status, response.headers.get('Content-Type', ''), response.read()
+        except urllib.error.HTTPError as e:
+            return e.code, e.headers.get('Content-Type', ''), e.read()
+
+    def handle(self, method: str, raw_path: str, headers: dict, body: bytes) -> Tuple[int, str, bytes]:
+        """Answer one request by recording, replaying or simulating it."""
+        with self._stats_lock:
+            self.requests += 1
+        # Paths are relative to the API version prefix, like the clients' base_url
+        path = urlsplit(raw_path).path
+        path = path[len('/v1'):] if path.startswith('/v1/') else path
+        if urlsplit(raw_path).query:
+            path += '?' + urlsplit(raw_path).query
+        if self.mode == 'synthetic':
+            time.sleep(self.synthetic.delay(path))
+            status, payload = self.synthetic.handle(method, path, body)
+            return status, 'application/json', json.dumps(payload).encode()
+
+        key = request_key(method, path, headers.get('Content-Type', ''), body)
+        if self.mode == 'record':
+            start = time.perf_counter()
+            status, content_type, response_body = self._forward(method, path, headers, body)
+            latency = time.perf_counter() - start
+            try:
+                stored, binary = response_body.decode('utf-8'), False
+            except UnicodeDecodeError:
+                stored, binary = base64.b64encode(response_body).decode('ascii'), True
+            self.cassette.append(Interaction(method, path, key, status, content_type, stored, latency, binary))
+            return status, content_type, response_body
+
+        interaction = self.cassette.match(method, path, key)
+        if interaction is None:
+            with self._stats_lock:
+                self.misses += 1
+            self.logger.warning(f"No recording for {method} {path}")
+            message = {'error': {'message': f"No recording for {method} {path}", 'type': 'standin_miss'}}
+            return 404, 'application/json', json.dumps(message).encode()
+        if self.latency_scale > 0:
+            time.sleep(interaction.latency * self.latency_scale)
+        return interaction.status, interaction.content_type, interaction.response_bytes()
+
+    def _handler(self):
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # Headers and body go out as separate writes; without this each response waits on a delayed ACK
+            disable_nagle_algorithm = True
+
+            def _serve(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+                try:
+                    status, content_type, response_body = standin.handle(
+                        self.command, self.path, dict(self.headers.items()), body
+                    )
+                except Exception as e:
+                    standin.logger.error(f"Stand-in failed on {self.command} {self.path}: {str(e)}")
+                    status, content_type = 502, 'application/json'
+                    response_body = json.dumps({'error': {'message': str(e), 'type': 'standin_error'}}).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', content_type or 'application/json')
+                self.send_header('Content-Length', str(len(response_body)))
+                self.end_headers()
+                self.wfile.write(response_body)
+
+            do_GET = do_POST = do_DELETE = _serve
+
+            def log_message(self, format, *args):
+                standin.logger.debug(f"{self.address_string()} {format % args}")
+
+        return Handler
+
+def main():
+    parser = argparse.ArgumentParser(description="Record or replay OpenAI API sessions on a local HTTP server.")
+    parser.add_argument('mode', choices=MODES)
+    parser.add_argument('--cassette', help=f"Cassette file, e.g. {CASSETTE_DIR}/suite.jsonl.gz (not used by synthetic)")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--upstream', default=DEFAULT_UPSTREAM, help="API to record from")
+    parser.add_argument('--latency-scale', type=float, default=1.0,
+                        help="Multiplier for recorded or simulated latencies (0 for none)")
+    parser.add_argument('--run-seconds', type=float, default=3.0, help="Synthetic time for an assistant run")
+    parser.add_argument('--chat-seconds', type=float, default=0.5, help="Synthetic time for a chat completion")
+    args = parser.parse_args()
+    if args.mode != 'synthetic' and not args.cassette:
+        parser.error(f"{args.mode} needs --cassette")
+
+    standin = StandIn(
+        Path(args.cassette) if args.cassette else None, args.mode, args.upstream, args.latency_scale,
+        args.host, args.port, SyntheticAPI(args.run_seconds, args.chat_seconds)
+    )
+    print(f"Set OPENAI_BASE_URL={standin.base_url} to use the stand-in. Press Ctrl+C to stop.")
+    try:
+        standin.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f"Served {standin.requests} requests ({standin.misses} without a recording)")
+
+if __name__ == "__main__":
+    main()
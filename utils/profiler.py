@@ -0,0 +1,162 @@
+import threading
+import time
+from typing import Any, Dict, Optional
+import pandas as pd
+from pandas.api import types as ptypes
+from utils.chunked import ChunkedFrame, is_out_of_core, merge_partials, partial_aggregate
+from utils.data_loader import file_content_hash, read_csv_dtype
+from utils.frame_cache import get_frame_cache
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+_profiles: Dict[str, str] = {}
+_lock = threading.Lock()
+
+def _scalar(value: Any) -> Any:
+    """Convert numpy/pandas scalars to plain Python values for the profile."""
+    if pd.isna(value):
+        return None
+    if hasattr(value, 'item'):
+        value = value.item()
+    if isinstance(value, float):
+        return round(value, 4)
+    return value if isinstance(value, (int, bool)) else str(value)
+
+def profile_dataframe(df: pd.DataFrame, sample_rows: int = 5, top_k: int = 5) -> Dict[str, Any]:
+    """Compute schema, per-column statistics and sample rows with vectorized pandas."""
+    null_counts = df.isna().sum()
+    distinct = df.nunique(dropna=True)
+    numeric = df.select_dtypes(include='number')
+    means, stds = numeric.mean(), numeric.std()
+
+    columns = {}
+    for col in df.columns:
+        series = df[col]
+        info = {
+            # Report the dtype pd.read_csv gives, as profile_chunked does, not the compact one
+            'dtype': read_csv_dtype(series),
+            'null_count': int(null_counts[col]),
+            'distinct': int(distinct[col]),
+        }
+        if col in numeric.columns:
+            # Per-column min/max keep integer bounds that a frame-wide reduction would upcast
+            info.update({
+                'min': _scalar(series.min()), 'max': _scalar(series.max()),
+                'mean': _scalar(means[col]), 'std': _scalar(stds[col]),
+            })
+        elif not ptypes.is_bool_dtype(series):
+            top = series.value_counts(dropna=True).head(top_k)
+            info['top_values'] = [[_scalar(value), int(count)] for value, count in top.items()]
+        columns[str(col)] = info
+
+    return {
+        'rows': len(df),
+        'columns': columns,
+        'sample': [
+            {str(col): _scalar(value) for col, value in row.items()}
+            for row in df.head(sample_rows).to_dict('records')
+        ],
+    }
+
+def profile_chunked(
+    dataset: ChunkedFrame,
+    sample_rows: int = 5,
+    top_k: int = 5,
+    max_tracked_values: int = 10000
+) -> Dict[str, Any]:
+    """Compute the same profile as profile_dataframe in one streaming pass.
+
+    Statistics are merged exactly across chunks. Value counts are merged
+    too, but a column stops being tracked once it has more than
+    ``max_tracked_values`` distinct values; its distinct count is then
+    reported as a lower bound and its top values are omitted.
+    """
+    rows, total, sample = 0, None, None
+    value_counts: Dict[str, Optional[pd.Series]] = {}
+    dtypes: Dict[str, str] = {}
+    for chunk in dataset.iter_chunks():
+        if sample is None:
+            sample = chunk.head(sample_rows)
+        rows += len(chunk)
+        for col in chunk.columns:
+            dtypes.setdefault(col, str(chunk[col].dtype))
+            counts = value_counts.get(col, pd.Series(dtype='int64'))
+            if counts is None:
+                continue
+            counts = counts.add(chunk[col].value_counts(dropna=True), fill_value=0)
+            value_counts[col] = counts if len(counts) <= max_tracked_values else None
+        partial = partial_aggregate(chunk.assign(_all=0), ['_all'], list(chunk.columns))
+        total = partial if total is None else merge_partials(total, partial)
+
+    columns = {}
+    for col, dtype in dtypes.items():
+        count = int(total['n'][col].iloc[0])
+        counts = value_counts.get(col)
+        info = {
+            'dtype': dtype,
+            'null_count': rows - count,
+            'distinct': len(counts) if counts is not None else max_tracked_values,
+        }
+        if 'sum' in total and col in total['sum'].columns:
+            variance = total['m2'][col].iloc[0] / (count - 1) if count > 1 else float('nan')
+            info.update({
+                'min': _scalar(total['min'][col].iloc[0]), 'max': _scalar(total['max'][col].iloc[0]),
+                'mean': _scalar(total['mean'][col].iloc[0]), 'std': _scalar(variance ** 0.5),
+            })
+        elif counts is not None:
+            top = counts.sort_values(ascending=False).head(top_k)
+            info['top_values'] = [[_scalar(value), int(n)] for value, n in top.items()]
+        columns[str(col)] = info
+
+    sample = sample if sample is not None else pd.DataFrame()
+    return {
+        'rows': rows,
+        'columns': columns,
+        'sample': [
+            {str(col): _scalar(value) for col, value in row.items()}
+            for row in sample.to_dict('records')
+        ],
+    }
+
+def format_profile(profile: Dict[str, Any]) -> str:
+    """Render a profile as compact text for the assistant's context."""
+    lines = [f"Rows: {profile['rows']}, columns: {len(profile['columns'])}", "Columns:"]
+    for name, info in profile['columns'].items():
+        details = [info['dtype'], f"nulls={info['null_count']}", f"distinct={info['distinct']}"]
+        if 'mean' in info:
+            details.append(f"min={info['min']} max={info['max']} mean={info['mean']} std={info['std']}")
+        if info.get('top_values'):
+            details.append("top=" + ", ".join(f"{value} ({count})" for value, count in info['top_values']))
+        lines.append(f"  - {name}: " + "; ".join(details))
+    if profile['sample']:
+        header = list(profile['sample'][0])
+        lines.append("Sample rows:")
+        lines.append("  " + " | ".join(header))
+        for row in profile['sample']:
+            lines.append("  " + " | ".join(str(row[col]) for col in header))
+    return "\n".join(lines)
+
+def get_file_profile(file_path: str) -> Optional[str]:
+    """Return the formatted profile of a CSV, computed once per file content.
+
+    Returns None if the file cannot be loaded, so callers fall back to letting
+    the assistant inspect the file itself.
+    """
+    try:
+        content_hash = file_content_hash(file_path)
+        with _lock:
+            if content_hash in _profiles:
+                return _profiles[content_hash]
+        start = time.perf_counter()
+        if is_out_of_core(file_path):
+            profile = format_profile(profile_chunked(ChunkedFrame(file_path)))
+        else:
+            profile = format_profile(profile_dataframe(get_frame_cache().get(file_path)))
+        with _lock:
+            _profiles[content_hash] = profile
+        logger.debug(f"Profiled {file_path} in {time.perf_counter() - start:.3f}s")
+        return profile
+    except Exception as e:
+        logger.error(f"Error profiling {file_path}: {e}")
+        return None
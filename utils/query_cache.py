@@ -0,0 +1,171 @@
+import hashlib
+import json
+import re
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+import pandas as pd
+from utils.logger import get_logger
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+logger = get_logger(__name__)
+
+# Parquet schema metadata key listing the tables a spilled result read
+SPILL_TABLES_KEY = b"baai.tables"
+
+_STRING_RE = re.compile(r"('(?:[^']|'')*')")
+
+def normalize_sql(query: str) -> str:
+    """Normalize SQL text for cache keys: collapse whitespace and case outside string literals."""
+    parts = _STRING_RE.split(query.strip().rstrip(';').strip())
+    normalized = []
+    for i, part in enumerate(parts):
+        # Odd indexes are string literals and must keep their exact text
+        normalized.append(part if i % 2 else " ".join(part.split()).lower())
+    return "".join(normalized)
+
+class QueryCache:
+    """LRU cache of query results keyed by normalized SQL and table data versions.
+
+    Results are held in memory up to ``max_bytes``. Results larger than
+    ``spill_threshold`` bytes are written to Parquet under ``spill_dir``
+    instead (when pyarrow is installed), which also lets other processes
+    reuse them. Spilled files record the tables they read so that
+    ``invalidate`` can delete them.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = 256 * 1024 * 1024,
+        spill_dir: Optional[str] = None,
+        spill_threshold: int = 32 * 1024 * 1024
+    ):
+        self.max_bytes = max_bytes
+        self.spill_dir = Path(spill_dir) if spill_dir else None
+        self.spill_threshold = spill_threshold
+        if self.spill_dir is not None:
+            self.spill_dir.mkdir(parents=True, exist_ok=True)
+        self.logger = logger
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[pd.DataFrame, int, Tuple[str, ...]]]" = OrderedDict()
+        self._bytes = 0
+        self._stats = {'hits': 0, 'disk_hits': 0, 'misses': 0, 'evictions': 0, 'spills': 0}
+
+    @staticmethod
+    def make_key(query: str, versions: Dict[str, int]) -> str:
+        """Build a cache key from the query text and the versions of the tables it reads."""
+        version_part = ",".join(f"{table}={version}" for table, version in sorted(versions.items()))
+        raw = f"{normalize_sql(query)}|{version_part}"
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def _spill_path(self, key: str) -> Optional[Path]:
+        if self.spill_dir is None or pyarrow is None:
+            return None
+        return self.spill_dir / f"{key}.parquet"
+
+    def get(self, key: str) -> Optional[pd.DataFrame]:
+        """Return a copy of the cached result, or None on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._stats['hits'] += 1
+                return entry[0].copy()
+
+        spill_path = self._spill_path(key)
+        if spill_path is not None and spill_path.exists():
+            try:
+                result = pd.read_parquet(spill_path)
+                with self._lock:
+                    self._stats['disk_hits'] += 1
+                return result
+            except Exception as e:
+                self.logger.debug(f"Could not read spilled result {spill_path}: {e}")
+
+        with self._lock:
+            self._stats['misses'] += 1
+        return None
+
+    def put(self, key: str, result: pd.DataFrame, tables: Tuple[str, ...] = ()) -> None:
+        """Store a result, spilling or skipping it when it is too large for memory."""
+        size = int(result.memory_usage(index=True, deep=True).sum())
+
+        if size > self.spill_threshold or size > self.max_bytes:
+            spill_path = self._spill_path(key)
+            if spill_path is not None:
+                try:
+                    table = pyarrow.Table.from_pandas(result, preserve_index=False)
+                    table = table.replace_schema_metadata({
+                        **(table.schema.metadata or {}),
+                        SPILL_TABLES_KEY: json.dumps(list(tables)).encode(),
+                    })
+                    pyarrow.parquet.write_table(table, spill_path)
+                    with self._lock:
+                        self._stats['spills'] += 1
+                except Exception as e:
+                    self.logger.debug(f"Could not spill result to {spill_path}: {e}")
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (result.copy(), size, tables)
+            self._bytes += size
+            while self._bytes > self.max_bytes and self._entries:
+                _, (_, evicted_size, _) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self._stats['evictions'] += 1
+
+    def invalidate(self, table: str) -> None:
+        """Drop in-memory results and delete spilled files that read ``table``."""
+        with self._lock:
+            for key in [k for k, entry in self._entries.items() if table in entry[2]]:
+                self._bytes -= self._entries.pop(key)[1]
+
+        if self.spill_dir is None or pyarrow is None:
+            return
+        for spill_path in self.spill_dir.glob("*.parquet"):
+            try:
+                metadata = pyarrow.parquet.read_schema(spill_path).metadata or {}
+                if table in json.loads(metadata.get(SPILL_TABLES_KEY, b"[]")):
+                    spill_path.unlink()
+                    self.logger.debug(f"Deleted spilled result {spill_path.name} for '{table}'")
+            except Exception as e:
+                # Another process may have deleted it already
+                self.logger.debug(f"Could not check spilled result {spill_path}: {e}")
+
+    def clear(self) -> None:
+        """Drop every in-memory result."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, float]:
+        """Return hit/miss counters and current memory use."""
+        with self._lock:
+            lookups = self._stats['hits'] + self._stats['disk_hits'] + self._stats['misses']
+            return {
+                **self._stats,
+                'hit_rate': (self._stats['hits'] + self._stats['disk_hits']) / lookups if lookups else 0.0,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+            }
+
+# Process-wide caches, one per database file, so every session shares results
+_caches: Dict[str, QueryCache] = {}
+_caches_lock = threading.Lock()
+
+def get_query_cache(db_path: str, **kwargs) -> QueryCache:
+    """Get the shared result cache for a database file, creating it on first use."""
+    key = str(Path(db_path).resolve())
+    with _caches_lock:
+        if key not in _caches:
+            _caches[key] = QueryCache(**kwargs)
+        return _caches[key]
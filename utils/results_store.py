@@ -0,0 +1,239 @@
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Optional, Sequence
+import pandas as pd
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+RESULTS_DB = Path("output/results.db")
+# Large per-question text kept out of the results table, compressed
+BLOB_COLUMNS = ('debug_output', 'raw_response', 'conversation_history')
+# Result columns stored as real columns so they can be filtered
+RESULT_FIELDS = {
+    'ai_answer': 'TEXT', 'status': 'TEXT', 'error': 'TEXT', 'test_status': 'INTEGER',
+    'judged_by': 'TEXT', 'judge_reason': 'TEXT', 'thread_id': 'TEXT', 'file_id': 'TEXT',
+    'timestamp': 'TEXT', 'duration_seconds': 'REAL', 'stage_analysis_seconds': 'REAL',
+    'stage_judge_seconds': 'REAL', 'code': 'TEXT', 'steps': 'TEXT', 'results': 'TEXT',
+}
+COMPRESS_LEVEL = 6
+# Excel rejects cells longer than this
+XLSX_CELL_LIMIT = 32767
+
+def _clean(value):
+    """Convert pandas/numpy scalars into values sqlite3 and json accept."""
+    if value is None or (isinstance(value, float) and pd.isna(value)) or value is pd.NA:
+        return None
+    return value.item() if hasattr(value, 'item') else value
+
+class ResultsStore:
+    """SQLite store of eval results, one row per (run, question).
+
+    Answers, statuses and timings are indexed columns; the question file's
+    own columns are kept as JSON so exports reproduce its layout. The debug
+    output, raw response and conversation history of each answer are
+    zlib-compressed into a separate blob table and only read on request,
+    so listing and filtering runs never touches them.
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path or RESULTS_DB)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.logger = logger
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS runs ("
+                "run_id TEXT PRIMARY KEY, question_columns TEXT NOT NULL, meta TEXT NOT NULL, "
+                "updated_at REAL NOT NULL)"
+            )
+            result_columns = ", ".join(f"{name} {kind}" for name, kind in RESULT_FIELDS.items())
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "run_id TEXT NOT NULL, question_id TEXT NOT NULL, position INTEGER NOT NULL, "
+                "question TEXT, complexity_level TEXT, question_fields TEXT NOT NULL, "
+                f"{result_columns}, PRIMARY KEY (run_id, question_id))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS results_status ON results (status, test_status)")
+            conn.execute("CREATE INDEX IF NOT EXISTS results_duration ON results (duration_seconds)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS result_blobs ("
+                "run_id TEXT NOT NULL, question_id TEXT NOT NULL, name TEXT NOT NULL, "
+                "raw_bytes INTEGER NOT NULL, data BLOB NOT NULL, PRIMARY KEY (run_id, question_id, name))"
+            )
+
+    @contextmanager
+    def _connect(self):
+        """Open a connection that commits on success and is always closed."""
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def write_run(
+        self,
+        run_id: str,
+        results_df: pd.DataFrame,
+        question_ids: Sequence[str],
+        question_columns: Sequence[str],
+        meta: Optional[Dict] = None
+    ) -> None:
+        """Replace a run's results with the rows of a merged results frame."""
+        start = time.perf_counter()
+        question_columns = list(question_columns)
+        rows, blobs = [], []
+        raw_bytes = stored_bytes = 0
+        for position, (question_id, (_, record)) in enumerate(zip(question_ids, results_df.iterrows())):
+            fields = {col: _clean(record[col]) for col in question_columns}
+            rows.append((
+                run_id, str(question_id), position,
+                _clean(record.get('Question')), _clean(record.get('Complexity Level')),
+                json.dumps(fields, default=str),
+                *[_clean(record.get(name)) for name in RESULT_FIELDS],
+            ))
+            for name in BLOB_COLUMNS:
+                text = _clean(record.get(name))
+                if not text:
+                    continue
+                raw = str(text).encode('utf-8')
+                data = zlib.compress(raw, COMPRESS_LEVEL)
+                raw_bytes += len(raw)
+                stored_bytes += len(data)
+                blobs.append((run_id, str(question_id), name, len(raw), data))
+
+        placeholders = ", ".join("?" for _ in range(6 + len(RESULT_FIELDS)))
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO runs VALUES (?, ?, ?, ?)",
+                (run_id, json.dumps(question_columns), json.dumps(meta or {}, default=str), time.time())
+            )
+            conn.execute("DELETE FROM results WHERE run_id = ?", (run_id,))
+            conn.execute("DELETE FROM result_blobs WHERE run_id = ?", (run_id,))
+            conn.executemany(
+                f"INSERT INTO results (run_id, question_id, position, question, complexity_level, question_fields, "
+                f"{', '.join(RESULT_FIELDS)}) VALUES ({placeholders})",
+                rows
+            )
+            conn.executemany("INSERT INTO result_blobs VALUES (?, ?, ?, ?, ?)", blobs)
+        self.logger.debug(
+            f"Stored {len(rows)} results of run {run_id} in {time.perf_counter() - start:.3f}s, "
+            f"blobs {raw_bytes} -> {stored_bytes} bytes"
+        )
+
+    def query(
+        self,
+        run_id: Optional[str] = None,
+        question: Optional[str] = None,
+        status: Optional[str] = None,
+        passed: Optional[bool] = None,
+        complexity_level: Optional[str] = None,
+        min_duration: Optional[float] = None,
+        max_duration: Optional[float] = None,
+        limit: Optional[int] = None
+    ) -> pd.DataFrame:
+        """Filter results without their blobs.
+
+        ``question`` matches a case-insensitive substring of the question
+        text; the other filters are exact or inclusive bounds.
+        """
+        clauses, params = [], []
+        filters = [
+            ("run_id = ?", run_id),
+            ("question LIKE ?", f"%{question}%" if question else None),
+            ("status = ?", status),
+            ("test_status = ?", int(passed) if passed is not None else None),
+            ("complexity_level = ?", complexity_level),
+            ("duration_seconds >= ?", min_duration),
+            ("duration_seconds <= ?", max_duration),
+        ]
+        for clause, value in filters:
+            if value is not None:
+                clauses.append(clause)
+                params.append(value)
+        sql = "SELECT * FROM results"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY run_id, position"
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+        with self._connect() as conn:
+            df = pd.read_sql_query(sql, conn, params=params)
+        df['test_status'] = df['test_status'].astype('boolean')
+        return df
+
+    def blobs(self, run_id: str, question_id: str) -> Dict[str, str]:
+        """Decompressed debug output, raw response and conversation history of one answer."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT name, data FROM result_blobs WHERE run_id = ? AND question_id = ?",
+                (run_id, str(question_id))
+            ).fetchall()
+        return {name: zlib.decompress(data).decode('utf-8') for name, data in rows}
+
+    def runs(self) -> pd.DataFrame:
+        """One row per stored run with its size, pass/error counts and latency."""
+        with self._connect() as conn:
+            return pd.read_sql_query(
+                "SELECT r.run_id, COUNT(*) AS questions, SUM(COALESCE(test_status, 0)) AS passed, "
+                "SUM(status != 'success') AS errors, AVG(duration_seconds) AS mean_duration_seconds, "
+                "(SELECT COALESCE(SUM(raw_bytes), 0) FROM result_blobs b WHERE b.run_id = r.run_id) AS blob_bytes "
+                "FROM results r GROUP BY r.run_id ORDER BY r.run_id",
+                conn
+            )
+
+    def run_frame(self, run_id: str, include_blobs: bool = False) -> pd.DataFrame:
+        """Rebuild a run in the old results layout: question columns followed by result columns."""
+        with self._connect() as conn:
+            row = conn.execute("SELECT question_columns FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+        if row is None:
+            raise KeyError(f"No stored run '{run_id}'")
+        results = self.query(run_id=run_id)
+        questions = pd.DataFrame(
+            [json.loads(fields) for fields in results['question_fields']], columns=json.loads(row[0])
+        )
+        frame = pd.concat([questions, results[['run_id', *RESULT_FIELDS]]], axis=1)
+        if include_blobs:
+            for name in BLOB_COLUMNS:
+                frame[name] = ''
+            with self._connect() as conn:
+                blob_rows = conn.execute(
+                    "SELECT question_id, name, data FROM result_blobs WHERE run_id = ?", (run_id,)
+                ).fetchall()
+            positions = dict(zip(results['question_id'], results.index))
+            for question_id, name, data in blob_rows:
+                frame.at[positions[question_id], name] = zlib.decompress(data).decode('utf-8')
+        return frame
+
+    def export(self, run_id: str, path: Path, include_blobs: bool = False) -> Path:
+        """Write a run to CSV or XLSX, chosen by the file suffix."""
+        path = Path(path)
+        frame = self.run_frame(run_id, include_blobs=include_blobs)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if path.suffix.lower() == '.xlsx':
+            frame = frame.apply(
+                lambda col: col.map(lambda v: v[:XLSX_CELL_LIMIT] if isinstance(v, str) else v)
+                if pd.api.types.is_string_dtype(col) or col.dtype == object else col
+            )
+            frame.to_excel(path, index=False)
+        else:
+            frame.to_csv(path, index=False, encoding='utf-8-sig')
+        self.logger.debug(f"Exported {len(frame)} results of run {run_id} to {path}")
+        return path
+
+_store: Optional[ResultsStore] = None
+_store_lock = threading.Lock()
+
+def get_results_store(path: Optional[Path] = None) -> ResultsStore:
+    """Get the process-wide results store."""
+    global _store
+    with _store_lock:
+        if _store is None or (path is not None and Path(path) != _store.path):
+            _store = ResultsStore(path)
+        return _store
@@ -0,0 +1,278 @@
+import json
+import re
+import sqlite3
+from typing import Any, Dict, List, Optional
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Bookkeeping table: one row per rollup with the spec it was built from and
+# the base rowid it covers up to
+ROLLUPS_TABLE = "_baai_rollups"
+
+GRAINS = {
+    'daily': ('year', 'month', 'day'),
+    'monthly': ('year', 'month'),
+    'yearly': ('year',),
+}
+
+# Column-name suffixes that identify split date parts, e.g. s_date_year
+_DATE_PART_SUFFIXES = {
+    'year': ('year',),
+    'month': ('month',),
+    'day': ('dayofmonth', 'day'),
+}
+_ISO_DATE_RE = re.compile(r"^\d{4}-\d{2}-\d{2}")
+_DIMENSION_NAME_RE = re.compile(r"(id|code|category|sku|number|type|store|region|product|merchant)", re.IGNORECASE)
+
+def _quote(name: str) -> str:
+    return '"' + str(name).replace('"', '""') + '"'
+
+def _find_date_part(columns: Dict[str, Dict[str, Any]], part: str) -> Optional[str]:
+    for name, stats in columns.items():
+        lower = name.lower()
+        if stats['type'] != 'INTEGER':
+            continue
+        for suffix in _DATE_PART_SUFFIXES[part]:
+            if lower == suffix or lower.endswith('_' + suffix):
+                return name
+    return None
+
+def detect_rollup_spec(
+    catalog: Dict[str, Any],
+    max_dimensions: int = 4,
+    max_dimension_cardinality: int = 1000
+) -> Optional[Dict[str, Any]]:
+    """Work out date parts, key dimensions and measures for a table from its catalog.
+
+    Dates are either split integer columns (``month``/``day``/``year`` or
+    ``*_year``/``*_month``/``*_dayofmonth``) or an ISO date text column.
+    Dimensions are low-cardinality text columns and integer columns named like
+    keys (``SELL_ID``, ``SKU``, ``MerchantCode_number``). Every other numeric
+    column is a measure. Returns None when the table has no usable date.
+    """
+    columns = catalog['columns']
+    date_exprs: Dict[str, str] = {}
+    date_columns = set()
+
+    year_col = _find_date_part(columns, 'year')
+    if year_col:
+        date_exprs['year'] = _quote(year_col)
+        date_columns.add(year_col)
+        for part in ('month', 'day'):
+            col = _find_date_part(columns, part)
+            if col:
+                date_exprs[part] = _quote(col)
+                date_columns.add(col)
+    else:
+        for name, stats in columns.items():
+            if stats['type'] == 'TEXT' and 'date' in name.lower() and _ISO_DATE_RE.match(str(stats['min'] or '')):
+                col = _quote(name)
+                date_exprs = {
+                    'year': f"CAST(strftime('%Y', {col}) AS INTEGER)",
+                    'month': f"CAST(strftime('%m', {col}) AS INTEGER)",
+                    'day': f"CAST(strftime('%d', {col}) AS INTEGER)",
+                }
+                date_columns.add(name)
+                break
+    if not date_exprs:
+        return None
+
+    dimensions = []
+    measures = []
+    for name, stats in columns.items():
+        if name in date_columns:
+            continue
+        distinct = stats['approx_distinct']
+        is_key = (
+            (stats['type'] == 'TEXT' or (stats['type'] == 'INTEGER' and _DIMENSION_NAME_RE.search(name)))
+            and 1 < distinct <= max_dimension_cardinality
+        )
+        if is_key:
+            dimensions.append((distinct, name))
+        elif stats['type'] in ('INTEGER', 'REAL'):
+            measures.append(name)
+
+    grains = {grain: parts for grain, parts in GRAINS.items() if all(p in date_exprs for p in parts)}
+    return {
+        'types': {name: stats['type'] for name, stats in columns.items()},
+        'date_exprs': date_exprs,
+        'grains': grains,
+        'dimensions': [name for _, name in sorted(dimensions)[:max_dimensions]],
+        'measures': measures,
+    }
+
+def rollup_name(table_name: str, grain: str, dimension: Optional[str]) -> str:
+    """Name of the rollup table for a base table, grain and optional dimension."""
+    if dimension:
+        return f"{table_name}__{grain}_by_{re.sub(r'[^0-9A-Za-z_]', '_', dimension)}"
+    return f"{table_name}__{grain}"
+
+def _rollup_select(table_name: str, spec: Dict[str, Any], grain: str, dimension: Optional[str], min_rowid: int) -> str:
+    keys = [f"{spec['date_exprs'][part]} AS {part}" for part in spec['grains'][grain]]
+    group_by = list(spec['grains'][grain])
+    if dimension:
+        keys.append(_quote(dimension))
+        group_by.append(_quote(dimension))
+    aggregates = ["COUNT(*) AS row_count"]
+    for measure in spec['measures']:
+        col = _quote(measure)
+        aggregates += [
+            f"COUNT({col}) AS {_quote('count_' + measure)}",
+            f"SUM({col}) AS {_quote('sum_' + measure)}",
+            f"MIN({col}) AS {_quote('min_' + measure)}",
+            f"MAX({col}) AS {_quote('max_' + measure)}",
+        ]
+    where = f" WHERE rowid > {int(min_rowid)}" if min_rowid else ""
+    return (
+        f"SELECT {', '.join(keys + aggregates)} FROM {_quote(table_name)}{where} "
+        f"GROUP BY {', '.join(group_by)}"
+    )
+
+def _rollup_columns(spec: Dict[str, Any], grain: str, dimension: Optional[str]) -> str:
+    """Column definitions for a rollup table, so get_schema shows real types."""
+    defs = [f"{part} INTEGER" for part in spec['grains'][grain]]
+    if dimension:
+        defs.append(f"{_quote(dimension)} {spec['types'][dimension]}")
+    defs.append("row_count INTEGER")
+    for measure in spec['measures']:
+        measure_type = spec['types'][measure]
+        defs += [
+            f"{_quote('count_' + measure)} INTEGER",
+            f"{_quote('sum_' + measure)} {measure_type}",
+            f"{_quote('min_' + measure)} {measure_type}",
+            f"{_quote('max_' + measure)} {measure_type}",
+        ]
+    return ", ".join(defs)
+
+def _merge_select(rollup_table: str, delta_select: str, spec: Dict[str, Any], grain: str, dimension: Optional[str]) -> str:
+    """Combine an existing rollup with a delta rollup into one grouped SELECT."""
+    keys = list(spec['grains'][grain]) + ([_quote(dimension)] if dimension else [])
+    aggregates = ["SUM(row_count) AS row_count"]
+    for measure in spec['measures']:
+        aggregates += [
+            f"SUM({_quote('count_' + measure)}) AS {_quote('count_' + measure)}",
+            f"SUM({_quote('sum_' + measure)}) AS {_quote('sum_' + measure)}",
+            f"MIN({_quote('min_' + measure)}) AS {_quote('min_' + measure)}",
+            f"MAX({_quote('max_' + measure)}) AS {_quote('max_' + measure)}",
+        ]
+    return (
+        f"SELECT {', '.join(keys + aggregates)} FROM "
+        f"(SELECT * FROM {_quote(rollup_table)} UNION ALL {delta_select}) "
+        f"GROUP BY {', '.join(keys)}"
+    )
+
+def ensure_rollups_table(conn: sqlite3.Connection) -> None:
+    """Create the rollup bookkeeping table if it does not exist."""
+    conn.execute(
+        f"CREATE TABLE IF NOT EXISTS {ROLLUPS_TABLE} ("
+        "rollup_table TEXT PRIMARY KEY, base_table TEXT NOT NULL, grain TEXT NOT NULL, "
+        "dimension TEXT, last_rowid INTEGER NOT NULL, spec TEXT)"
+    )
+    columns = {row[1] for row in conn.execute(f"PRAGMA table_info({ROLLUPS_TABLE})").fetchall()}
+    if 'spec' not in columns:
+        # Rollups recorded before specs were stored are rebuilt on their next refresh
+        conn.execute(f"ALTER TABLE {ROLLUPS_TABLE} ADD COLUMN spec TEXT")
+
+def _spec_key(spec: Dict[str, Any], grain: str, dimension: Optional[str]) -> str:
+    """The parts of a spec one rollup's columns and rows depend on, as stored text."""
+    return json.dumps({
+        'date_exprs': [spec['date_exprs'][part] for part in spec['grains'][grain]],
+        'dimension': [dimension, spec['types'][dimension]] if dimension else None,
+        'measures': [[measure, spec['types'][measure]] for measure in spec['measures']],
+    })
+
+def build_rollups(
+    conn: sqlite3.Connection,
+    table_name: str,
+    spec: Dict[str, Any],
+    incremental: bool = False
+) -> List[str]:
+    """Create or incrementally refresh every rollup of ``table_name``; returns rollup names.
+
+    Runs on the caller's write connection. Incremental refreshes aggregate
+    only base rows past each rollup's recorded rowid and merge them into the
+    existing rollup, so the base table is not rescanned. A rollup built from a
+    different spec (new measures, dimensions or column types) is rebuilt
+    from scratch instead, since its columns no longer line up with the delta.
+    """
+    ensure_rollups_table(conn)
+    max_rowid = conn.execute(f"SELECT COALESCE(MAX(rowid), 0) FROM {_quote(table_name)}").fetchone()[0]
+    existing = {
+        row[0]: (row[1], row[2]) for row in conn.execute(
+            f"SELECT rollup_table, last_rowid, spec FROM {ROLLUPS_TABLE} WHERE base_table = ?", (table_name,)
+        ).fetchall()
+    }
+
+    wanted = {}
+    for grain in spec['grains']:
+        for dimension in [None] + spec['dimensions']:
+            wanted[rollup_name(table_name, grain, dimension)] = (grain, dimension)
+
+    # Rollups whose definition no longer applies are dropped
+    for name in set(existing) - set(wanted):
+        conn.execute(f"DROP TABLE IF EXISTS {_quote(name)}")
+        conn.execute(f"DELETE FROM {ROLLUPS_TABLE} WHERE rollup_table = ?", (name,))
+
+    rebuilt = 0
+    for name, (grain, dimension) in wanted.items():
+        last_rowid, built_spec = existing.get(name, (None, None))
+        spec_key = _spec_key(spec, grain, dimension)
+        if incremental and last_rowid is not None and built_spec == spec_key:
+            if last_rowid >= max_rowid:
+                continue
+            delta = _rollup_select(table_name, spec, grain, dimension, last_rowid)
+            merged = _merge_select(name, delta, spec, grain, dimension)
+            tmp_name = name + "__merge"
+            conn.execute(f"DROP TABLE IF EXISTS {_quote(tmp_name)}")
+            conn.execute(f"CREATE TABLE {_quote(tmp_name)} ({_rollup_columns(spec, grain, dimension)})")
+            conn.execute(f"INSERT INTO {_quote(tmp_name)} {merged}")
+            conn.execute(f"DROP TABLE {_quote(name)}")
+            conn.execute(f"ALTER TABLE {_quote(tmp_name)} RENAME TO {_quote(name)}")
+        else:
+            conn.execute(f"DROP TABLE IF EXISTS {_quote(name)}")
+            conn.execute(f"CREATE TABLE {_quote(name)} ({_rollup_columns(spec, grain, dimension)})")
+            conn.execute(f"INSERT INTO {_quote(name)} {_rollup_select(table_name, spec, grain, dimension, 0)}")
+            rebuilt += 1
+        conn.execute(
+            f"INSERT OR REPLACE INTO {ROLLUPS_TABLE} (rollup_table, base_table, grain, dimension, last_rowid, spec) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (name, table_name, grain, dimension, max_rowid, spec_key)
+        )
+
+    logger.debug(
+        f"Refreshed {len(wanted)} rollups for '{table_name}' "
+        f"({'incremental' if incremental else 'full'}, {rebuilt} rebuilt from scratch)"
+    )
+    return list(wanted)
+
+def describe_rollups(rollups: List[Dict[str, Any]]) -> str:
+    """List rollup tables by grain and dimension for prompts, without their full schemas."""
+    if not rollups:
+        return ""
+    lines = [
+        f"Rollups of {rollups[0]['base_table']} (table: grain, dimension); "
+        f"measures: {', '.join(rollups[0]['measures']) or 'none'}"
+    ]
+    for rollup in rollups:
+        lines.append(f"  - {rollup['rollup_table']}: {rollup['grain']}, {rollup['dimension'] or 'none'}")
+    return "\n".join(lines)
+
+def list_rollups(conn: sqlite3.Connection, table_name: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Return rollup metadata, optionally for one base table."""
+    try:
+        query = f"SELECT rollup_table, base_table, grain, dimension, last_rowid, spec FROM {ROLLUPS_TABLE}"
+        params: tuple = ()
+        if table_name is not None:
+            query += " WHERE base_table = ?"
+            params = (table_name,)
+        rows = conn.execute(query, params).fetchall()
+    except sqlite3.OperationalError:
+        return []
+    return [
+        {
+            'rollup_table': r[0], 'base_table': r[1], 'grain': r[2], 'dimension': r[3], 'last_rowid': r[4],
+            'measures': [measure for measure, _ in json.loads(r[5])['measures']] if r[5] else [],
+        }
+        for r in rows
+    ]
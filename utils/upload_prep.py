@@ -0,0 +1,247 @@
+import gzip
+import hashlib
+import os
+import shutil
+import time
+import zipfile
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Optional, Sequence
+import pandas as pd
+from openai import NotFoundError
+from config import UPLOAD_CACHE_MB, UPLOAD_FORMAT
+from utils.chunked import ChunkedFrame, is_out_of_core
+from utils.data_loader import file_content_hash, load_csv
+from utils.dataset_registry import get_dataset_registry
+from utils.logger import get_logger
+
+try:
+    import pyarrow  # noqa: F401 - needed for Parquet uploads
+except ImportError:
+    pyarrow = None
+
+logger = get_logger(__name__)
+
+UPLOAD_FORMATS = ('csv', 'gzip', 'zip', 'parquet')
+UPLOAD_CACHE_DIR = Path("data/upload_cache")
+# The OpenAI API itself, as opposed to a stand-in set through OPENAI_BASE_URL
+DEFAULT_BASE_URL = "https://api.openai.com/v1"
+
+# Level 3 compresses ~4x faster than the default 6 for a ~20% larger file
+COMPRESS_LEVEL = 3
+
+_EXTENSIONS = {'csv': '.csv', 'gzip': '.csv.gz', 'zip': '.zip', 'parquet': '.parquet'}
+
+@dataclass
+class PreparedUpload:
+    """A file ready to send to the code interpreter, and how to read it back."""
+    path: Path
+    upload_format: str
+    original_bytes: int
+    upload_bytes: int
+    prepare_seconds: float
+    dropped_columns: List[str] = field(default_factory=list)
+
+    @property
+    def instructions(self) -> str:
+        """How the assistant should load this file."""
+        return read_instructions(self.upload_format, self.dropped_columns)
+
+    @property
+    def variant(self) -> str:
+        """Registry key for this format and column selection."""
+        return upload_variant(self.upload_format, self.dropped_columns)
+
+def upload_variant(upload_format: str, drop_columns: Optional[Sequence[str]] = None) -> str:
+    """Key identifying an upload variant, e.g. ``gzip`` or ``parquet-drop:notes,url``."""
+    if drop_columns:
+        return f"{upload_format}-drop:{','.join(sorted(drop_columns))}"
+    return upload_format
+
+def read_instructions(upload_format: str, drop_columns: Optional[Sequence[str]] = None) -> str:
+    """Tell the assistant how to load an uploaded variant in the code interpreter."""
+    readers = {
+        'csv': "It is a plain CSV file: load it with pd.read_csv(path).",
+        'gzip': "It is a gzip-compressed CSV file: load it with pd.read_csv(path, compression='gzip').",
+        'zip': "It is a zip archive holding one CSV file: load it with pd.read_csv(path, compression='zip').",
+        'parquet': "It is a Parquet file: load it with pd.read_parquet(path). Column types are already set.",
+    }
+    text = readers[upload_format]
+    if drop_columns:
+        text += f" These columns were removed as irrelevant: {', '.join(drop_columns)}."
+    return text
+
+def read_header(file_path: str) -> List[str]:
+    """Column names of a CSV, read without parsing any rows."""
+    return list(pd.read_csv(file_path, nrows=0).columns)
+
+def resolve_drop_columns(file_path: str, drop_columns: Optional[Sequence[str]] = None) -> List[str]:
+    """The requested columns that the file actually has, sorted; unknown names are ignored."""
+    if not drop_columns:
+        return []
+    header = set(read_header(file_path))
+    unknown = sorted(set(drop_columns) - header)
+    if unknown:
+        logger.warning(f"Ignoring columns not in {file_path}: {unknown}")
+    return sorted(set(drop_columns) & header)
+
+def prune_upload_cache(max_bytes: int = UPLOAD_CACHE_MB * 1024 * 1024, keep: Optional[Path] = None) -> List[Path]:
+    """Delete the least recently used prepared uploads until the cache fits ``max_bytes``.
+
+    ``keep`` is never deleted. Returns the deleted paths.
+    """
+    if not UPLOAD_CACHE_DIR.exists():
+        return []
+    # Files still being written are left alone
+    files = [path for path in UPLOAD_CACHE_DIR.iterdir() if path.is_file() and path.suffix != '.tmp']
+    stats = {path: path.stat() for path in files}
+    total = sum(stat.st_size for stat in stats.values())
+    deleted = []
+    for path in sorted(files, key=lambda path: stats[path].st_mtime):
+        if total <= max_bytes:
+            break
+        if path == keep:
+            continue
+        path.unlink(missing_ok=True)
+        total -= stats[path].st_size
+        deleted.append(path)
+    if deleted:
+        logger.debug(f"Pruned {len(deleted)} prepared uploads from {UPLOAD_CACHE_DIR}")
+    return deleted
+
+def _write_csv_variant(
+    file_path: str,
+    target: Path,
+    upload_format: str,
+    keep_columns: Optional[List[str]]
+) -> None:
+    """Write a CSV (optionally column-pruned) as plain, gzip or zip output without loading it whole."""
+    opener = {
+        'csv': lambda: open(target, 'wb'),
+        'gzip': lambda: gzip.open(target, 'wb', compresslevel=COMPRESS_LEVEL),
+    }
+    if upload_format == 'zip':
+        archive = zipfile.ZipFile(target, 'w', compression=zipfile.ZIP_DEFLATED, compresslevel=COMPRESS_LEVEL)
+        sink = archive.open(Path(file_path).name, 'w', force_zip64=True)
+    else:
+        archive, sink = None, opener[upload_format]()
+    try:
+        if keep_columns is None:
+            with open(file_path, 'rb') as source:
+                shutil.copyfileobj(source, sink, 1024 * 1024)
+        else:
+            for i, chunk in enumerate(ChunkedFrame(file_path, columns=keep_columns).iter_chunks()):
+                sink.write(chunk.to_csv(index=False, header=i == 0).encode('utf-8'))
+    finally:
+        sink.close()
+        if archive is not None:
+            archive.close()
+
+def resolve_upload_format(file_path: str, upload_format: Optional[str] = None) -> str:
+    """Pick the format actually used for a file, falling back to gzip where Parquet cannot be written."""
+    upload_format = upload_format or UPLOAD_FORMAT
+    if upload_format not in UPLOAD_FORMATS:
+        raise ValueError(f"Unknown upload format '{upload_format}', expected one of {UPLOAD_FORMATS}")
+    # Parquet is written from the loaded frame, so very large files are compressed as text instead
+    if upload_format == 'parquet' and (pyarrow is None or is_out_of_core(file_path)):
+        return 'gzip'
+    return upload_format
+
+def prepare_upload(
+    file_path: str,
+    upload_format: Optional[str] = None,
+    drop_columns: Optional[Sequence[str]] = None
+) -> PreparedUpload:
+    """Convert a CSV into the format that will be uploaded, caching the result by content.
+
+    ``gzip`` and ``zip`` compress the CSV text; ``parquet`` stores typed,
+    compressed columns that load without parsing, with the dtypes
+    pd.read_csv would infer. ``drop_columns`` removes
+    columns the user marked as irrelevant; names the file does not have are
+    ignored. See resolve_upload_format for when Parquet falls back to gzip.
+    Prepared files are kept in UPLOAD_CACHE_DIR within UPLOAD_CACHE_MB.
+    """
+    upload_format = resolve_upload_format(file_path, upload_format)
+
+    drop_columns = resolve_drop_columns(file_path, drop_columns)
+    original_bytes = Path(file_path).stat().st_size
+    if upload_format == 'csv' and not drop_columns:
+        return PreparedUpload(Path(file_path), 'csv', original_bytes, original_bytes, 0.0)
+
+    start = time.perf_counter()
+    variant = upload_variant(upload_format, drop_columns)
+    digest = file_content_hash(file_path)[:16]
+    suffix = f"_{hashlib.sha256(variant.encode()).hexdigest()[:8]}" if drop_columns else ""
+    target = UPLOAD_CACHE_DIR / f"{Path(file_path).stem}_{digest}{suffix}{_EXTENSIONS[upload_format]}"
+    if target.exists():
+        # Mark as recently used for prune_upload_cache
+        os.utime(target)
+    else:
+        UPLOAD_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        tmp_target = target.with_name(target.name + '.tmp')
+        if upload_format == 'parquet':
+            # Default dtypes, as pd.read_csv gives the code interpreter; the compact
+            # categoricals and downcast integers of the local frames would change its results
+            df = load_csv(file_path, optimize=False)
+            df.drop(columns=drop_columns).to_parquet(tmp_target, index=False, compression='snappy')
+        else:
+            keep_columns = None
+            if drop_columns:
+                keep_columns = [col for col in read_header(file_path) if col not in drop_columns]
+            _write_csv_variant(file_path, tmp_target, upload_format, keep_columns)
+        tmp_target.replace(target)
+        prune_upload_cache(keep=target)
+
+    prepared = PreparedUpload(
+        target, upload_format, original_bytes, target.stat().st_size,
+        time.perf_counter() - start, drop_columns
+    )
+    logger.debug(
+        f"Prepared {variant} upload of {file_path}: {original_bytes} -> {prepared.upload_bytes} bytes "
+        f"in {prepared.prepare_seconds:.3f}s"
+    )
+    return prepared
+
+def upload_dataset(
+    client,
+    file_path: str,
+    upload_format: Optional[str] = None,
+    drop_columns: Optional[Sequence[str]] = None
+) -> str:
+    """Upload a dataset variant to OpenAI once per content and API, and return its file ID.
+
+    Uploads are keyed by the client's base URL, so files uploaded to a local
+    stand-in are never reused against the real API. A recorded file the API
+    no longer knows is uploaded again. The bytes and time saved against the
+    raw CSV are recorded in the dataset registry (see
+    DatasetRegistry.upload_savings).
+    """
+    registry = get_dataset_registry()
+    dataset = registry.register(file_path)
+    drop_columns = resolve_drop_columns(file_path, drop_columns)
+    variant = upload_variant(resolve_upload_format(file_path, upload_format), drop_columns)
+    base_url = str(client.base_url).rstrip('/')
+    file_id = registry.find_upload(dataset.content_hash, variant, base_url)
+    if file_id:
+        try:
+            client.files.retrieve(file_id)
+            logger.debug(f"Reusing uploaded file {file_id} for {dataset.dataset_key} ({variant})")
+            return file_id
+        except NotFoundError:
+            logger.warning(f"Uploaded file {file_id} no longer exists at {base_url}, uploading again")
+            registry.forget_upload(dataset.content_hash, variant, base_url)
+
+    prepared = prepare_upload(file_path, upload_format, drop_columns)
+    start = time.perf_counter()
+    with open(prepared.path, 'rb') as file:
+        response = client.files.create(
+            file=(prepared.path.name, file),
+            purpose='assistants'
+        )
+    registry.record_upload(
+        dataset.content_hash, variant, base_url, response.id, prepared.original_bytes, prepared.upload_bytes,
+        prepared.prepare_seconds, time.perf_counter() - start
+    )
+    if variant == 'csv' and base_url == DEFAULT_BASE_URL:
+        registry.set_openai_file_id(dataset.content_hash, response.id)
+    return response.id
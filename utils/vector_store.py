@@ -12,13 +12,14 @@ from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_openai import OpenAIEmbeddings
 from langchain_community.vectorstores import FAISS
 from langchain.docstore.document import Document
+from config import OPENAI_BASE_URL
 
 class DocumentProcessor:
     def __init__(self, docs_dir: str = "docs"):
         self.docs_dir = Path(docs_dir)
         self.docs_dir.mkdir(parents=True, exist_ok=True)
         self.vector_store = None
-        self.embeddings = OpenAIEmbeddings()
+        self.embeddings = OpenAIEmbeddings(base_url=OPENAI_BASE_URL)
         self.index_path = Path("vector_store")
         self.index_path.mkdir(parents=True, exist_ok=True)
         